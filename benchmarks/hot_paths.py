@@ -0,0 +1,232 @@
+"""
+Latency and query counts of the hot views and game_helper functions against
+a generated club (generate_load_data) at several scales, compared with the
+committed baseline (benchmarks/baseline.json).
+
+Every scale runs on a fresh SQLite file, no other services are needed. The
+cache is cleared before every call, so the database work is measured. A path
+regresses when its p50 exceeds the baseline by more than --threshold (and by
+at least --min-delta-ms, short paths are noisy) or it issues more queries than
+the baseline; the script then exits with status 1.
+Timings depend on the machine, refresh the baseline on the machine comparing
+against it.
+
+    python benchmarks/hot_paths.py [--scales small,medium] [--iterations 50]
+        [--threshold 0.25] [--min-delta-ms 5] [--baseline benchmarks/baseline.json] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# options of generate_load_data
+SCALES = {
+    "small": {"players": 100, "games": 20, "clicks_per_game": 20},
+    "medium": {"players": 1000, "games": 100, "clicks_per_game": 50},
+    "large": {"players": 5000, "games": 300, "clicks_per_game": 100},
+}
+
+
+def _setup_django(database: Path):
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DJANGO_SETTINGS_MODULE"] = "futsal_app.settings"
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["EMAIL_OUTBOX_ENABLED"] = "True"
+    os.environ["DEBUG"] = "False"
+    os.environ["ALLOWED_HOSTS"] = "testserver"
+
+    import django
+
+    django.setup()
+
+
+def _seed(scale: str):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from games.models import CurrentBookingForGame, Game, GameStatus, StatusChoices
+
+    call_command("migrate", verbosity=0)
+    call_command("generate_load_data", seed=1, verbosity=0, **SCALES[scale])
+    admin = get_user_model().objects.create_superuser(
+        username="bench_admin", email="bench_admin@example.com", password=None
+    )
+    game = (
+        Game.objects.filter(status=GameStatus.PLANNED, when__gte=date.today())
+        .order_by("when")
+        .first()
+    )
+    planned = (
+        CurrentBookingForGame.objects.filter(game=game, status=StatusChoices.PLANNED)
+        .select_related("player")
+        .first()
+        .player
+    )
+    return admin, game, planned
+
+
+def _paths(admin, game, planned) -> dict:
+    """{name: callable} of the measured paths, every call returns the response or result."""
+    from django.test import Client
+    from django.urls import reverse
+
+    from games.helpers import game_helper
+    from games.models import StatusChoices
+
+    client = Client()
+    client.force_login(admin)
+    clicks = {"checked": "off"}
+
+    def status_update():
+        # the planned player drops out and comes back on the next call
+        response = client.post(
+            reverse("game_player_status_update_url", args=[game.id]),
+            {"player_id": planned.id, "checked": clicks["checked"]},
+            headers={"accept": "application/json"},
+        )
+        clicks["checked"] = "on" if clicks["checked"] == "off" else "off"
+        return response
+
+    return {
+        "next_games": lambda: client.get(reverse("next_games_url")),
+        "game_details": lambda: client.get(reverse("game_details_url", args=[game.id])),
+        "game_player_status_update": status_update,
+        "booking_history": lambda: client.get(reverse("booking_history_url")),
+        "game_helper.get_roster": lambda: game_helper.get_roster(game),
+        "game_helper.get_players_by_status": lambda: game_helper.get_players_by_status(
+            [StatusChoices.AWAITING, StatusChoices.RESERVED], game
+        ),
+    }
+
+
+def _measure(func, iterations: int) -> dict:
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    durations = []
+    queries = 0
+    for _ in range(iterations + 1):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            began = time.perf_counter()
+            result = func()
+            durations.append(time.perf_counter() - began)
+        if getattr(result, "status_code", 200) != 200:
+            raise RuntimeError(f"{func} returned {result.status_code}")
+        queries = max(queries, len(captured))
+    durations = durations[1:]  # the first call warms up the connection
+    return {
+        "p50_ms": round(statistics.median(durations) * 1000, 2),
+        "p95_ms": round(statistics.quantiles(durations, n=20)[-1] * 1000, 2),
+        "queries": queries,
+    }
+
+
+def _run(scale: str, iterations: int) -> dict:
+    paths = _paths(*_seed(scale))
+    return {name: _measure(func, iterations) for name, func in paths.items()}
+
+
+def _compare(
+    results: dict, baseline: dict, threshold: float, min_delta_ms: float
+) -> list[str]:
+    regressions = []
+    print(
+        f"{'scale':<7} {'path':<52} {'p50 ms':>8} {'p95 ms':>8} {'queries':>7} "
+        f"{'base p50':>9} {'change':>7}"
+    )
+    for scale, paths in results.items():
+        for name, result in paths.items():
+            base = baseline.get(scale, {}).get(name)
+            change = ""
+            if base:
+                ratio = result["p50_ms"] / base["p50_ms"] - 1
+                change = f"{ratio:+.0%}"
+                delta_ms = result["p50_ms"] - base["p50_ms"]
+                if ratio > threshold and delta_ms >= min_delta_ms:
+                    regressions.append(
+                        f"{scale} {name}: p50 {result['p50_ms']} ms, "
+                        f"baseline {base['p50_ms']} ms"
+                    )
+                if result["queries"] > base["queries"]:
+                    regressions.append(
+                        f"{scale} {name}: {result['queries']} queries, "
+                        f"baseline {base['queries']}"
+                    )
+            print(
+                f"{scale:<7} {name:<52} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+                f"{result['queries']:>7} {base['p50_ms'] if base else '-':>9} "
+                f"{change:>7}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="small,medium")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative increase of p50 over the baseline.",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=5,
+        help="Smallest increase of p50 reported as a regression.",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results of the measured scales as the new baseline.",
+    )
+    args = parser.parse_args()
+    scales = args.scales.split(",")
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(sorted(unknown))}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        _setup_django(Path(directory) / "default.sqlite3")
+        from django.db import connections
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()  # the test client needs the testserver host
+
+        for scale in scales:
+            connections.close_all()
+            connections.settings["default"]["NAME"] = str(
+                Path(directory) / f"{scale}.sqlite3"
+            )
+            results[scale] = _run(scale, args.iterations)
+        connections.close_all()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = _compare(results, baseline, args.threshold, args.min_delta_ms)
+
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n"
+        )
+        print(f"Baseline written to {args.baseline}.")
+    elif regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
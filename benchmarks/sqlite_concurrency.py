@@ -0,0 +1,147 @@
+"""
+Read and write throughput of the game page under concurrent load on a SQLite
+file database, with the default settings and with the SQLITE_TUNING profile.
+
+Writers are players clicking their own checkbox (game_player_status_update),
+readers reload game_details. Every run uses a fresh database file.
+
+    python benchmarks/sqlite_concurrency.py [--writers 4] [--readers 8] [--seconds 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _setup_django(database: Path):
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ["DJANGO_SETTINGS_MODULE"] = "futsal_app.settings"
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["EMAIL_OUTBOX_ENABLED"] = "True"
+    os.environ["DEBUG"] = "False"
+    os.environ["ALLOWED_HOSTS"] = "testserver"
+
+    import django
+
+    django.setup()
+
+
+def _seed(players: int):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from games.helpers import booking_helper
+    from games.models import Game, Player, PlayerRole
+
+    call_command("migrate", verbosity=0)
+    game = Game.objects.create(when="2030-01-01")
+    users = [
+        get_user_model().objects.create_user(username=f"bench_{idx}")
+        for idx in range(players)
+    ]
+    booking_helper.create_bookings(
+        game,
+        [Player.objects.create(user=user, role=PlayerRole.PERMANENT) for user in users],
+        "planned",
+    )
+    return game, users
+
+
+def _run(label: str, tuning: bool, writers: int, readers: int, seconds: float):
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db import connection, connections
+    from django.test import Client
+    from django.urls import reverse
+
+    settings.SQLITE_TUNING = tuning
+    cache.clear()
+    game, users = _seed(writers + readers)
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    connections.close_all()
+
+    details_url = reverse("game_details_url", args=[game.id])
+    update_url = reverse("game_player_status_update_url", args=[game.id])
+    results = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    start = threading.Barrier(writers + readers + 1)
+    stop = threading.Event()
+
+    def worker(user, write: bool):
+        client = Client()
+        client.force_login(user)
+        player_id = user.player.id
+        checked = False
+        start.wait()
+        while not stop.is_set():
+            try:
+                if write:
+                    response = client.post(
+                        update_url,
+                        {"player_id": player_id, "checked": "on" if checked else "off"},
+                        headers={"accept": "application/json"},
+                    )
+                    checked = not checked
+                else:
+                    response = client.get(details_url)
+                ok = response.status_code == 200
+            except Exception:  # pylint: disable=broad-except
+                ok = False
+            with lock:
+                if ok:
+                    results["writes" if write else "reads"] += 1
+                else:
+                    results["errors"] += 1
+        connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(user, idx < writers))
+        for idx, user in enumerate(users)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    print(
+        f"{label:<8} journal={journal_mode:<6} "
+        f"reads/s={results['reads'] / elapsed:8.1f} "
+        f"writes/s={results['writes'] / elapsed:8.1f} "
+        f"errors={results['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        _setup_django(Path(directory) / "default.sqlite3")
+        from django.db import connections
+
+        for label, tuning in [("default", False), ("tuned", True)]:
+            connections.close_all()
+            connections.settings["default"]["NAME"] = str(
+                Path(directory) / f"{label}.sqlite3"
+            )
+            _run(label, tuning, args.writers, args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,116 @@
+from datetime import date, timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 
-from games.models import Player, PlayerRole
+from games.models import (
+    BookingHistoryForGame,
+    Game,
+    GameStatus,
+    Player,
+    PlayerRole,
+    PlayerSeasonStats,
+    PlayerStatus,
+    StatusChoices,
+)
 
 User = get_user_model()
 
 
+def seed_season(players: int = 300, games: int = 40, today: date | None = None):
+    """
+    Seeds a realistic club in bulk: `players` players (one in ten permanent,
+    a quarter inactive), a weekly season of `games` games around today (the
+    past ones played) with every active player booked and changing their mind
+    a few times (thousands of history rows), absences and the season stats.
+    """
+    today = today or date.today()
+    User.objects.bulk_create(
+        [
+            User(
+                username=f"season_{idx}",
+                first_name=f"First{idx}",
+                last_name=f"Last{idx}",
+                email=f"season_{idx}@example.com",
+                password="!",
+            )
+            for idx in range(players)
+        ],
+        batch_size=500,
+    )
+    users = User.objects.filter(username__startswith="season_").order_by("id")
+    Player.objects.bulk_create(
+        [
+            Player(
+                user=user,
+                mobile_number="123456789",
+                role=(
+                    PlayerRole.PERMANENT
+                    if idx % 10 == 0
+                    else PlayerRole.INACTIVE if idx % 4 == 1 else PlayerRole.ACTIVE
+                ),
+            )
+            for idx, user in enumerate(users)
+        ],
+        batch_size=500,
+    )
+    season_players = list(
+        Player.objects.filter(user__username__startswith="season_").order_by("id")
+    )
+
+    first_day = today - timedelta(weeks=games // 2)
+    season_games = Game.objects.bulk_create(
+        [
+            Game(
+                when=first_day + timedelta(weeks=week),
+                status=(
+                    GameStatus.PLAYED
+                    if first_day + timedelta(weeks=week) < today
+                    else GameStatus.PLANNED
+                ),
+                description=f"Season game {week}",
+            )
+            for week in range(games)
+        ]
+    )
+
+    permanent = [p for p in season_players if p.role == PlayerRole.PERMANENT]
+    active = [p for p in season_players if p.role == PlayerRole.ACTIVE]
+    bookings = []
+    for week, game in enumerate(season_games):
+        for player in permanent:
+            bookings.append((game, player, StatusChoices.PLANNED))
+        for idx, player in enumerate(active):
+            bookings.append((game, player, StatusChoices.RESERVED))
+            if (idx + week) % 5 == 0:
+                bookings.append((game, player, StatusChoices.AWAITING))
+            if (idx + week) % 15 == 0:
+                bookings.append((game, player, StatusChoices.RESERVED))
+    BookingHistoryForGame.objects.bulk_record(
+        [
+            BookingHistoryForGame(game=game, player=player, status=status)
+            for game, player, status in bookings
+        ]
+    )
+
+    PlayerStatus.objects.bulk_create(
+        [
+            PlayerStatus(
+                player=player,
+                status=StatusChoices.RESTING,
+                date_start=first_day + timedelta(days=idx % (7 * games)),
+                date_end=first_day + timedelta(days=idx % (7 * games) + 14),
+                description="Holidays",
+            )
+            for idx, player in enumerate(active[: players // 3])
+        ]
+    )
+    for season in sorted({game.season for game in season_games}):
+        PlayerSeasonStats.objects.refresh(season)
+    return season_players, season_games
+
+
 class BaseTestCase(TestCase):
     """
     BaseTestCase sets up a common test fixture for futsal_app tests.
@@ -37,6 +142,7 @@ class BaseTestCase(TestCase):
     """
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
 
         self.superuser = User.objects.create_superuser(
@@ -0,0 +1,93 @@
+import socketserver
+import threading
+
+
+def _address(command: str) -> str:
+    return command[command.find("<") + 1 : command.rfind(">")]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 localhost stand-in SMTP")
+        envelope = {}
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-localhost")
+                self._reply("250 8BITMIME")
+            elif verb in ("HELO", "NOOP", "RSET"):
+                self._reply("250 OK")
+            elif verb == "MAIL":
+                with server.lock:
+                    refuse = server.failures > 0
+                    server.failures -= int(refuse)
+                if refuse:
+                    self._reply("451 Try again later")
+                else:
+                    envelope = {"from": _address(command), "to": []}
+                    self._reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(_address(command))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data.append(chunk)
+                envelope["data"] = b"".join(data).decode(errors="replace")
+                with server.lock:
+                    server.messages.append(envelope)
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                break
+            else:
+                self._reply("502 Command not implemented")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server for tests. It records received messages and the
+    number of opened connections, and refuses the next `failures` messages
+    with a temporary error.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.failures = 0
+        self.messages = []
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def email_settings(self) -> dict:
+        return {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": self.port,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+            "EMAIL_USE_TLS": False,
+        }
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
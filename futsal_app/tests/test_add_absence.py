@@ -1,9 +1,14 @@
-from datetime import datetime
+import random
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from games.models import (
     BookingHistoryForGame,
+    CurrentBookingForGame,
     Game,
     Player,
     PlayerStatus,
@@ -48,3 +53,199 @@ class SimpleAddAbsenceTest(BaseTestCase):
         ).last()
         self.assertIsNotNone(booking_obj)
         self.assertEqual(booking_obj.status, StatusChoices.CANCELLED)
+
+    def _post_absence(self, player: Player, date_start: str, date_end: str):
+        return self.client.post(
+            reverse("add_absence_url"),
+            {
+                "player": player.pk,
+                "date_start": date_start,
+                "date_end": date_end,
+                "status": "resting",
+            },
+        )
+
+    def test_add_absence_applies_status_to_all_games_in_range(self):
+        player = Player.objects.get(user=self.user_1_per)
+        planned = Game.objects.create(when=date(2025, 11, 16))
+        confirmed = Game.objects.create(when=date(2025, 11, 18))
+        not_booked = Game.objects.create(when=date(2025, 11, 19))
+        outside = Game.objects.create(when=date(2025, 11, 25))
+        for game, status in [
+            (planned, StatusChoices.PLANNED),
+            (confirmed, StatusChoices.CONFIRMED),
+            (outside, StatusChoices.PLANNED),
+        ]:
+            BookingHistoryForGame.objects.create(
+                game=game, player=player, status=status
+            )
+
+        self.client.force_login(self.superuser)
+        response = self._post_absence(player, "2025-11-15", "2025-11-20")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            dict(
+                CurrentBookingForGame.objects.filter(player=player).values_list(
+                    "game", "status"
+                )
+            ),
+            {
+                planned.id: StatusChoices.CANCELLED,
+                confirmed.id: StatusChoices.RESERVED,
+                not_booked.id: StatusChoices.RESTING,
+                outside.id: StatusChoices.PLANNED,
+            },
+        )
+
+    def test_add_absence_query_count_does_not_grow_with_games(self):
+        player = Player.objects.get(user=self.user_1_per)
+        self.client.force_login(self.superuser)
+        for day in range(1, 3):
+            Game.objects.create(when=date(2025, 10, day))
+        with CaptureQueriesContext(connection) as few_games:
+            self._post_absence(player, "2025-10-01", "2025-10-31")
+
+        for day in range(1, 30):
+            Game.objects.create(when=date(2025, 12, day))
+        with CaptureQueriesContext(connection) as many_games:
+            self._post_absence(player, "2025-12-01", "2025-12-31")
+
+        self.assertEqual(len(few_games), len(many_games))
+        self.assertEqual(
+            BookingHistoryForGame.objects.filter(game__when__month=12).count(), 29
+        )
+
+    def test_add_absence_locks_the_games_before_reading_the_statuses(self):
+        player = Player.objects.get(user=self.user_1_per)
+        Game.objects.create(when=date(2025, 11, 16))
+        self.client.force_login(self.superuser)
+        with CaptureQueriesContext(connection) as queries:
+            self._post_absence(player, "2025-11-15", "2025-11-20")
+
+        sql = [query["sql"] for query in queries]
+        lock_marker = (
+            "FOR UPDATE"
+            if connection.features.has_select_for_update
+            else 'INSERT INTO "games_playerstatus"'
+        )
+        locked = next(i for i, q in enumerate(sql) if lock_marker in q)
+        read = next(i for i, q in enumerate(sql) if "games_currentbookingforgame" in q)
+        self.assertLess(locked, read)
+
+    def test_add_absence_is_atomic(self):
+        player = Player.objects.get(user=self.user_1_per)
+        Game.objects.create(when=date(2025, 11, 16))
+        self.client.force_login(self.superuser)
+
+        with patch.object(
+            BookingHistoryForGame.objects,
+            "bulk_record",
+            side_effect=ValueError("broken insert"),
+        ):
+            response = self._post_absence(player, "2025-11-15", "2025-11-20")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PlayerStatus.objects.exists())
+        self.assertFalse(BookingHistoryForGame.objects.exists())
+
+    def test_invalid_absence_shows_an_error(self):
+        player = Player.objects.get(user=self.user_1_per)
+        Game.objects.create(when=date(2025, 11, 16))
+        self.client.force_login(self.superuser)
+        url = reverse("add_absence_url")
+        cases = [
+            ({"date_start": "2025-11-15", "date_end": "2025-11-20"}, "unknown status"),
+            (
+                {
+                    "date_start": "2025-11-15",
+                    "date_end": "2025-11-20",
+                    "status": StatusChoices.AWAITING,
+                },
+                "unknown status",
+            ),
+            (
+                {
+                    "date_start": "2025-11-20",
+                    "date_end": "2025-11-15",
+                    "status": "resting",
+                },
+                "the absence ends before it starts",
+            ),
+            ({"date_start": "soon", "date_end": "2025-11-15", "status": "resting"}, ""),
+        ]
+        for data, error in cases:
+            response = self.client.post(url, {"player": player.pk, **data})
+            self.assertEqual(response.status_code, 200, data)
+            self.assertContains(response, f"Error while adding absence: {error}")
+        self.assertFalse(PlayerStatus.objects.exists())
+        self.assertFalse(BookingHistoryForGame.objects.exists())
+
+
+class AbsenceLookupTests(BaseTestCase):
+    """PlayerStatus date lookups checked against a brute-force scan."""
+
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(21)
+        players = list(Player.objects.all())
+        first_day = date(2024, 1, 1)
+        PlayerStatus.objects.bulk_create(
+            [
+                PlayerStatus(
+                    player=rng.choice(players),
+                    date_start=(
+                        start := first_day + timedelta(days=rng.randrange(365))
+                    ),
+                    date_end=start + timedelta(days=rng.choice([0, 1, 6, 13, 40])),
+                    status=StatusChoices.RESTING,
+                )
+                for _ in range(300)
+            ]
+        )
+        self.absences = list(PlayerStatus.objects.all())
+        self.days = [first_day + timedelta(days=offset) for offset in range(-3, 410)]
+
+    def test_absences_on_a_day(self):
+        for day in self.days:
+            expected = {
+                absence.id
+                for absence in self.absences
+                if absence.date_start <= day <= absence.date_end
+            }
+            self.assertEqual(
+                set(PlayerStatus.objects.on(day).values_list("id", flat=True)),
+                expected,
+                day,
+            )
+            self.assertEqual(
+                PlayerStatus.objects.absent_player_ids_on(day),
+                {
+                    absence.player_id
+                    for absence in self.absences
+                    if absence.id in expected
+                },
+                day,
+            )
+
+    def test_absences_overlapping_a_range(self):
+        rng = random.Random(12)
+        ranges = [(day, day) for day in self.days[::7]] + [
+            (start, start + timedelta(days=rng.randrange(60)))
+            for start in rng.sample(self.days, 100)
+        ]
+        for date_start, date_end in ranges:
+            expected = {
+                absence.id
+                for absence in self.absences
+                if absence.date_start <= date_end and date_start <= absence.date_end
+            }
+            self.assertEqual(
+                set(
+                    PlayerStatus.objects.overlapping(date_start, date_end).values_list(
+                        "id", flat=True
+                    )
+                ),
+                expected,
+                (date_start, date_end),
+            )
@@ -1,6 +1,15 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
 from games.helpers import game_helper, player_helper
 from games.models import (
+    BOOKING_COUNTER_FIELDS,
     BookingHistoryForGame,
+    CurrentBookingForGame,
     Game,
     GameStatus,
     StatusChoices,
@@ -98,3 +107,256 @@ class BookingModelTests(BaseTestCase):
         # Now total players should be 1 (only user_1_per.player is confirmed)
         total_players = game_helper.get_total_players_for_game(game)
         self.assertEqual(total_players, 1)
+
+
+class CurrentBookingTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(
+            when="2024-11-01",
+            description="current booking test game",
+            status=GameStatus.PLANNED,
+        )
+        self.player = self.user_1_per.player
+
+    def test_current_booking_follows_latest_history_entry(self):
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.PLANNED
+        )
+        latest = BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.CANCELLED
+        )
+
+        current = CurrentBookingForGame.objects.get(game=self.game, player=self.player)
+        self.assertEqual(current.booking, latest)
+        self.assertEqual(current.status, StatusChoices.CANCELLED)
+        self.assertEqual(CurrentBookingForGame.objects.count(), 1)
+
+    def test_deleting_latest_entry_restores_previous_status(self):
+        first = BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.PLANNED
+        )
+        latest = BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.CANCELLED
+        )
+
+        latest.delete()
+
+        current = CurrentBookingForGame.objects.get(game=self.game, player=self.player)
+        self.assertEqual(current.booking, first)
+        self.assertEqual(current.status, StatusChoices.PLANNED)
+
+    def test_queryset_delete_restores_previous_status(self):
+        first = BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.PLANNED
+        )
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.CANCELLED
+        )
+
+        BookingHistoryForGame.objects.filter(status=StatusChoices.CANCELLED).delete()
+
+        current = CurrentBookingForGame.objects.get(game=self.game, player=self.player)
+        self.assertEqual(current.booking, first)
+        self.assertEqual(current.status, StatusChoices.PLANNED)
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.planned_count, self.game.cancelled_count), (1, 0))
+        self.assertEqual(
+            list(game_helper.get_players_by_status([StatusChoices.PLANNED], self.game)),
+            [self.player],
+        )
+
+    def test_rebuild_current_bookings_command(self):
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.PLANNED
+        )
+        latest = BookingHistoryForGame.objects.create(
+            game=self.game, player=self.player, status=StatusChoices.CANCELLED
+        )
+        BookingHistoryForGame.objects.create(
+            game=self.game,
+            player=self.user_4_act.player,
+            status=StatusChoices.RESERVED,
+        )
+        CurrentBookingForGame.objects.all().delete()
+
+        call_command("rebuild_current_bookings", stdout=StringIO())
+
+        self.assertEqual(CurrentBookingForGame.objects.count(), 2)
+        self.assertEqual(
+            player_helper.get_latest_booking_for_game(self.player, self.game), latest
+        )
+        self.assertEqual(game_helper.get_total_players_for_game(self.game), 0)
+
+
+class GameCounterTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when="2024-12-01", status=GameStatus.PLANNED)
+
+    def _counters(self) -> dict[str, int]:
+        self.game.refresh_from_db()
+        return {
+            status: getattr(self.game, field_name)
+            for status, field_name in BOOKING_COUNTER_FIELDS.items()
+            if getattr(self.game, field_name)
+        }
+
+    def test_counters_follow_current_bookings(self):
+        bolek = self.user_1_per.player
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=bolek, status=StatusChoices.PLANNED
+        )
+        latest = BookingHistoryForGame.objects.create(
+            game=self.game, player=bolek, status=StatusChoices.CANCELLED
+        )
+        BookingHistoryForGame.objects.bulk_record(
+            [
+                BookingHistoryForGame(
+                    game=self.game, player=player, status=StatusChoices.RESERVED
+                )
+                for player in [self.user_4_act.player, self.user_2_per.player]
+            ]
+        )
+        self.assertEqual(
+            self._counters(),
+            {StatusChoices.CANCELLED: 1, StatusChoices.RESERVED: 2},
+        )
+
+        latest.delete()
+        self.assertEqual(
+            self._counters(),
+            {StatusChoices.PLANNED: 1, StatusChoices.RESERVED: 2},
+        )
+        self.assertEqual(self.game.number_of_booked_players, 1)
+
+    def test_counters_follow_cascading_deletes(self):
+        other_game = Game.objects.create(when="2024-12-08", status=GameStatus.PLANNED)
+        for game in [self.game, other_game]:
+            BookingHistoryForGame.objects.bulk_record(
+                [
+                    BookingHistoryForGame(
+                        game=game, player=player, status=StatusChoices.PLANNED
+                    )
+                    for player in [
+                        self.user_1_per.player,
+                        self.user_2_per.player,
+                        self.user_3_per.player,
+                    ]
+                ]
+            )
+        BookingHistoryForGame.objects.create(
+            game=self.game,
+            player=self.user_3_per.player,
+            status=StatusChoices.CANCELLED,
+        )
+
+        self.user_1_per.player.delete()
+        self.assertEqual(
+            self._counters(), {StatusChoices.PLANNED: 1, StatusChoices.CANCELLED: 1}
+        )
+        # the admin deletes users, which cascades to their player
+        self.user_3_per.delete()
+        self.assertEqual(self._counters(), {StatusChoices.PLANNED: 1})
+        other_game.refresh_from_db()
+        self.assertEqual(other_game.planned_count, 1)
+
+        out = StringIO()
+        call_command("verify_game_counters", stdout=out)
+        self.assertIn("All game counters are correct", out.getvalue())
+
+    def test_delete_queries_do_not_grow_with_the_bookings(self):
+        players = [self.user_1_per.player, self.user_2_per.player]
+        for idx in range(6):
+            game = Game.objects.create(when=f"2025-01-{idx + 1:02}")
+            for status in [StatusChoices.PLANNED, StatusChoices.CANCELLED]:
+                BookingHistoryForGame.objects.bulk_record(
+                    [
+                        BookingHistoryForGame(game=game, player=player, status=status)
+                        for player in players
+                    ]
+                )
+
+        def delete_queries(delete) -> int:
+            with CaptureQueriesContext(connection) as queries:
+                delete()
+            return len(queries)
+
+        # one player's rows of one game, then of the other five games
+        few = delete_queries(
+            BookingHistoryForGame.objects.filter(
+                player=players[0],
+                status=StatusChoices.CANCELLED,
+                game__when="2025-01-01",
+            ).delete
+        )
+        many = delete_queries(
+            BookingHistoryForGame.objects.filter(
+                player=players[0], status=StatusChoices.CANCELLED
+            ).delete
+        )
+        self.assertEqual(many, few)
+        self.assertEqual(
+            set(
+                CurrentBookingForGame.objects.filter(player=players[0]).values_list(
+                    "status", flat=True
+                )
+            ),
+            {StatusChoices.PLANNED},
+        )
+
+        few = delete_queries(self.user_1_per.delete)
+        many = delete_queries(self.user_2_per.delete)
+        self.assertEqual(many, few)
+        # the six games and the one of setUp
+        self.assertEqual(
+            Game.objects.filter(planned_count=0, cancelled_count=0).count(), 7
+        )
+
+    def test_saving_a_stale_game_keeps_the_counters(self):
+        stale = Game.objects.get(pk=self.game.pk)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.user_1_per.player, status=StatusChoices.PLANNED
+        )
+
+        stale.description = "Hall B"
+        stale.save()
+        self.assertEqual(self._counters(), {StatusChoices.PLANNED: 1})
+        self.assertEqual(self.game.description, "Hall B")
+
+        self.client.force_login(self.superuser)
+        self.client.post(
+            reverse("game_status_update_url", args=[self.game.pk]),
+            {"status": GameStatus.CANCELLED},
+        )
+        self.assertEqual(self._counters(), {StatusChoices.PLANNED: 1})
+        self.assertEqual(self.game.status, GameStatus.CANCELLED)
+
+    def test_counters_are_read_only_in_admin(self):
+        self.client.force_login(self.superuser)
+        response = self.client.get(
+            reverse("admin:games_game_change", args=[self.game.pk])
+        )
+        self.assertContains(response, "Planned count")
+        self.assertNotContains(response, 'name="planned_count"')
+
+    def test_verify_game_counters_repairs_wrong_counters(self):
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.user_1_per.player, status=StatusChoices.PLANNED
+        )
+        Game.objects.filter(pk=self.game.pk).update(planned_count=5, awaiting_count=1)
+
+        out = StringIO()
+        call_command("verify_game_counters", stdout=out)
+        self.assertIn("planned_count is 5, expected 1", out.getvalue())
+        self.assertIn("1 games have wrong counters", out.getvalue())
+        self.assertEqual(self._counters()[StatusChoices.PLANNED], 5)
+
+        call_command("verify_game_counters", repair=True, stdout=StringIO())
+        self.assertEqual(self._counters(), {StatusChoices.PLANNED: 1})
+
+        out = StringIO()
+        call_command("verify_game_counters", stdout=out)
+        self.assertIn("All game counters are correct", out.getvalue())
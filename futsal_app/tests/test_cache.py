@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from games.helpers import booking_helper, cache_helper
+from games.models import (
+    BookingHistoryForGame,
+    Game,
+    Player,
+    PlayerRole,
+    PlayerStatus,
+    StatusChoices,
+)
+
+from .base import BaseTestCase
+
+
+class GameCacheTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when=date.today() + timedelta(days=1))
+        booking_helper.create_bookings(
+            self.game,
+            Player.objects.filter(role=PlayerRole.PERMANENT),
+            StatusChoices.PLANNED,
+        )
+        self.bolek = Player.objects.get(user=self.user_1_per)
+        self.reksio = Player.objects.get(user=self.user_4_act)
+
+    def test_roster_is_cached_until_a_booking_changes(self):
+        cache_helper.get_roster(self.game)
+        with self.assertNumQueries(0):
+            roster = cache_helper.get_roster(self.game)
+        self.assertEqual(len(roster.planned), 3)
+
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.bolek, status=StatusChoices.CANCELLED
+        )
+        roster = cache_helper.get_roster(self.game)
+        self.assertEqual(roster.cancelled, [self.bolek])
+        self.assertEqual(cache_helper.get_cache_stats(), {"hits": 1, "misses": 2})
+
+    def test_bulk_bookings_and_absences_invalidate_the_roster(self):
+        cache_helper.get_roster(self.game)
+        booking_helper.create_bookings(self.game, [self.reksio], StatusChoices.RESERVED)
+        self.assertEqual(cache_helper.get_roster(self.game).reserved, [self.reksio])
+
+        PlayerStatus.objects.create(
+            player=self.reksio,
+            status=StatusChoices.RESTING,
+            date_start=self.game.when,
+            date_end=self.game.when,
+        )
+        with self.assertNumQueries(1):
+            cache_helper.get_roster(self.game)
+
+    def test_player_names_invalidate_the_roster(self):
+        cache_helper.get_roster(self.game)
+        self.user_1_per.first_name = "Bolesław"
+        self.user_1_per.save()
+
+        roster = cache_helper.get_roster(self.game)
+        self.assertEqual(roster.planned[0].user.first_name, "Bolesław")
+
+    def test_next_games_tiles_follow_game_and_booking_changes(self):
+        self.client.force_login(self.user_1_per)
+        url = reverse("next_games_url")
+        self.client.get(url)
+        with self.assertNumQueries(3):  # session, user and the ETag of the page
+            response = self.client.get(url)
+        self.assertEqual(response.context["games"][0].number_of_booked_players, 3)
+
+        booking_helper.change_player_status(self.game, self.bolek, False)
+        later_game = Game.objects.create(when=date.today() + timedelta(days=8))
+
+        response = self.client.get(url)
+        self.assertEqual(
+            [game.id for game in response.context["games"]],
+            [self.game.id, later_game.id],
+        )
+        self.assertEqual(response.context["games"][0].number_of_booked_players, 2)
+
+    def test_cache_stats_command(self):
+        cache_helper.get_roster(self.game)
+        cache_helper.get_roster(self.game)
+
+        out = StringIO()
+        call_command("cache_stats", "--reset", stdout=out)
+
+        self.assertIn("Hits: 1, misses: 1, hit ratio: 50.0%", out.getvalue())
+        self.assertEqual(cache_helper.get_cache_stats(), {"hits": 0, "misses": 0})
+
+    def test_commands_warn_about_a_process_local_cache(self):
+        out = StringIO()
+        call_command("rebuild_current_bookings", stdout=out)
+        self.assertIn(cache_helper.PROCESS_LOCAL_WARNING, out.getvalue())
+
+        with TemporaryDirectory() as location:
+            file_cache = {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }
+            with self.settings(CACHES={"default": file_cache}):
+                out = StringIO()
+                call_command("rebuild_current_bookings", stdout=out)
+        self.assertNotIn(cache_helper.PROCESS_LOCAL_WARNING, out.getvalue())
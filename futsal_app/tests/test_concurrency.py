@@ -0,0 +1,86 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+
+from games.helpers import booking_helper, game_helper
+from games.models import (
+    BookingHistoryForGame,
+    Game,
+    Player,
+    PlayerRole,
+    StatusChoices,
+)
+
+User = get_user_model()
+
+
+class ConcurrentStatusChangeTests(TransactionTestCase):
+    """
+    Players clicking at the same moment (one thread = one gunicorn worker)
+    must never be promoted into the same free slot.
+    """
+
+    ROUNDS = 3
+
+    def _create_players(self, prefix: str, count: int, role: str) -> list[Player]:
+        return [
+            Player.objects.create(
+                user=User.objects.create_user(username=f"{prefix}_{idx}"), role=role
+            )
+            for idx in range(count)
+        ]
+
+    def _click_concurrently(self, game: Game, clicks: list[tuple[Player, bool]]):
+        barrier = threading.Barrier(len(clicks))
+        errors = []
+
+        def click(player: Player, checked: bool):
+            try:
+                barrier.wait()
+                booking_helper.change_player_status(game, player, checked)
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=click, args=(player, checked))
+            for player, checked in clicks
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_free_slots_are_filled_exactly_once(self):
+        for round_no in range(self.ROUNDS):
+            game = Game.objects.create(when=f"2025-07-0{round_no + 1}")
+            planned = self._create_players(f"planned_{round_no}", 6, "Permanent")
+            reserved = self._create_players(
+                f"reserved_{round_no}", 6, PlayerRole.ACTIVE
+            )
+            booking_helper.create_bookings(game, planned, StatusChoices.PLANNED)
+            booking_helper.create_bookings(game, reserved, StatusChoices.RESERVED)
+
+            # 3 planned players drop out while all reserve players want to play
+            self._click_concurrently(
+                game,
+                [(player, False) for player in planned[:3]]
+                + [(player, True) for player in reserved],
+            )
+
+            roster = game_helper.get_roster(game)
+            self.assertEqual(len(roster.cancelled), 3)
+            self.assertEqual(len(roster.planned), 3)
+            self.assertEqual(len(roster.confirmed), 3)
+            self.assertEqual(len(roster.awaiting), 3)
+            # nobody was confirmed twice
+            self.assertEqual(
+                BookingHistoryForGame.objects.filter(
+                    game=game, status=StatusChoices.CONFIRMED
+                ).count(),
+                3,
+            )
@@ -0,0 +1,143 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games.helpers import booking_helper
+from games.models import (
+    BOOKING_COUNTER_FIELDS,
+    BookingHistoryArchive,
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    GameStatus,
+    Player,
+    StatusChoices,
+)
+
+from .base import BaseTestCase
+
+
+class BookingHistoryArchiveTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.players = list(Player.objects.order_by("id"))
+        old = date.today() - timedelta(days=400)
+        self.old_games = [
+            Game.objects.create(when=old + timedelta(days=7 * idx), status=status)
+            for idx, status in enumerate([GameStatus.PLAYED, GameStatus.CANCELLED])
+        ]
+        self.recent_game = Game.objects.create(
+            when=date.today() - timedelta(days=7), status=GameStatus.PLAYED
+        )
+        for game in self.old_games + [self.recent_game]:
+            booking_helper.create_bookings(game, self.players, StatusChoices.PLANNED)
+            booking_helper.create_bookings(
+                game, self.players[:2], StatusChoices.CANCELLED
+            )
+            booking_helper.create_bookings(
+                game, self.players[:1], StatusChoices.PLANNED
+            )
+
+    def current(self) -> set[tuple]:
+        return set(
+            CurrentBookingForGame.objects.values_list(
+                "game_id", "player_id", "booking_id", "status"
+            )
+        )
+
+    def test_moves_superseded_rows_to_the_archive(self):
+        history = {
+            game.id: list(
+                BookingHistoryForGame.objects.filter(game=game)
+                .order_by("id")
+                .values_list("id", "player_id", "status")
+            )
+            for game in self.old_games
+        }
+        current = self.current()
+        counters = list(
+            Game.objects.order_by("id").values(*BOOKING_COUNTER_FIELDS.values())
+        )
+
+        call_command("archive_booking_history", batch_size=1, stdout=StringIO())
+
+        # the final status of every player is still in the hot table
+        self.assertEqual(self.current(), current)
+        self.assertEqual(
+            list(Game.objects.order_by("id").values(*BOOKING_COUNTER_FIELDS.values())),
+            counters,
+        )
+        for game in self.old_games:
+            self.assertEqual(
+                BookingHistoryForGame.objects.filter(game=game).count(),
+                len(self.players),
+            )
+            archived = [
+                (row["id"], row["player_id"], row["status"])
+                for row in game.history_archive.rows()
+            ]
+            self.assertEqual(game.history_archive.row_count, 3)
+            kept = set(
+                BookingHistoryForGame.objects.filter(game=game).values_list(
+                    "id", "player_id", "status"
+                )
+            )
+            self.assertEqual(sorted(archived + list(kept)), history[game.id])
+        self.assertFalse(
+            BookingHistoryArchive.objects.filter(game=self.recent_game).exists()
+        )
+        self.assertEqual(
+            BookingHistoryForGame.objects.filter(game=self.recent_game).count(),
+            len(self.players) + 3,
+        )
+
+    def test_archiving_again_appends(self):
+        game = self.old_games[0]
+        BookingHistoryArchive.objects.archive([game.id])
+        booking_helper.create_bookings(game, self.players[:1], StatusChoices.CANCELLED)
+
+        self.assertEqual(BookingHistoryArchive.objects.archive([game.id]), 1)
+        game.history_archive.refresh_from_db()
+        self.assertEqual(game.history_archive.row_count, 4)
+        self.assertEqual(BookingHistoryArchive.objects.archive([game.id]), 0)
+
+    def test_queries_are_per_batch(self):
+        game_ids = [game.id for game in self.old_games]
+        with CaptureQueriesContext(connection) as queries:
+            BookingHistoryArchive.objects.archive(game_ids)
+        # no statement per archived row or per game
+        self.assertLessEqual(len(queries), 8)
+
+    def test_batches_and_dry_run(self):
+        out = StringIO()
+        call_command("archive_booking_history", dry_run=True, stdout=out)
+        self.assertIn("Would archive 6 booking history rows of 2 games", out.getvalue())
+        self.assertFalse(BookingHistoryArchive.objects.exists())
+
+        out = StringIO()
+        call_command("archive_booking_history", batch_size=1, max_batches=1, stdout=out)
+        self.assertEqual(
+            list(BookingHistoryArchive.objects.values_list("game_id", flat=True)),
+            [self.old_games[0].id],
+        )
+
+        call_command("archive_booking_history", older_than_days=1, stdout=out)
+        self.assertEqual(BookingHistoryArchive.objects.count(), 3)
+        self.assertFalse(
+            BookingHistoryArchive.objects.superseded(
+                Game.objects.values_list("id", flat=True)
+            ).exists()
+        )
+
+    def test_game_details_after_archiving(self):
+        BookingHistoryArchive.objects.archive([self.old_games[0].id])
+        self.client.force_login(self.user_1_per)
+        response = self.client.get(
+            reverse("game_details_url", args=[self.old_games[0].id])
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import tempfile
+from datetime import date
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games.helpers import booking_helper, history_export_helper
+from games.models import BookingHistoryForGame, Game, Player, StatusChoices
+
+from .base import BaseTestCase
+
+
+class BookingHistoryExportTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.players = list(Player.objects.order_by("id"))
+        self.games = [
+            Game.objects.create(when=date(2025, month, 1)) for month in [3, 4, 5]
+        ]
+        for game in self.games:
+            booking_helper.create_bookings(game, self.players, StatusChoices.PLANNED)
+            booking_helper.create_bookings(
+                game, self.players[:2], StatusChoices.CANCELLED
+            )
+
+    def exported_ids(self, lines) -> list[int]:
+        return [int(row["id"]) for row in csv.DictReader(io.StringIO("".join(lines)))]
+
+    def test_csv_export(self):
+        lines = list(
+            history_export_helper.export_csv(
+                history_export_helper.get_booking_history(), chunk_size=5
+            )
+        )
+        self.assertEqual(
+            lines[0].strip(), ",".join(history_export_helper.EXPORT_FIELDS)
+        )
+        self.assertEqual(
+            self.exported_ids(lines),
+            list(
+                BookingHistoryForGame.objects.order_by("id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+        row = next(csv.DictReader(io.StringIO("".join(lines))))
+        self.assertEqual(row["game_date"], "2025-03-01")
+        self.assertEqual(row["username"], "bolek")
+        self.assertEqual(row["status"], StatusChoices.PLANNED)
+
+    def test_filters(self):
+        history = history_export_helper.get_booking_history
+        cases = [
+            (
+                history(date_from=date(2025, 4, 1)),
+                BookingHistoryForGame.objects.filter(game__in=self.games[1:]),
+            ),
+            (
+                history(date_to=date(2025, 4, 1)),
+                BookingHistoryForGame.objects.filter(game__in=self.games[:2]),
+            ),
+            (
+                history(game_id=self.games[0].id, player_id=self.players[0].id),
+                BookingHistoryForGame.objects.filter(
+                    game=self.games[0], player=self.players[0]
+                ),
+            ),
+        ]
+        for exported, expected in cases:
+            self.assertEqual(
+                self.exported_ids(history_export_helper.export_csv(exported)),
+                list(expected.order_by("id").values_list("id", flat=True)),
+            )
+
+    def test_rows_are_read_in_one_query(self):
+        export = history_export_helper.export_csv(
+            history_export_helper.get_booking_history(), chunk_size=4
+        )
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(export)
+        self.assertEqual(len(rows), BookingHistoryForGame.objects.count() + 1)
+        self.assertEqual(len(queries), 1)
+
+    def test_json_export(self):
+        exported = json.loads(
+            "".join(
+                history_export_helper.export_json(
+                    history_export_helper.get_booking_history(game_id=self.games[2].id)
+                )
+            )
+        )
+        self.assertEqual(len(exported), len(self.players) + 2)
+        self.assertEqual(set(exported[0]), set(history_export_helper.EXPORT_FIELDS))
+        self.assertEqual(exported[0]["game_date"], "2025-05-01")
+
+        empty = history_export_helper.get_booking_history(date_from=date(2030, 1, 1))
+        self.assertEqual(
+            json.loads("".join(history_export_helper.export_json(empty))), []
+        )
+
+    def test_export_view(self):
+        self.client.force_login(self.user_1_per)
+        url = reverse("export_booking_history_url")
+
+        response = self.client.get(url, {"date_from": "2025-05-01"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            self.exported_ids([content]),
+            list(
+                BookingHistoryForGame.objects.filter(game=self.games[2])
+                .order_by("id")
+                .values_list("id", flat=True)
+            ),
+        )
+
+        response = self.client.get(
+            url, {"format": "json", "player": self.players[1].id}
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual({row["player_id"] for row in rows}, {self.players[1].id})
+
+        response = self.client.get(url, {"date_from": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command(self):
+        with tempfile.NamedTemporaryFile("r", suffix=".json") as file:
+            call_command(
+                "export_booking_history",
+                format="json",
+                game=self.games[0].id,
+                output=file.name,
+            )
+            rows = json.load(file)
+        self.assertEqual({row["game_id"] for row in rows}, {self.games[0].id})
+        self.assertEqual(len(rows), len(self.players) + 2)
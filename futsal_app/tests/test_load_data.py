@@ -0,0 +1,102 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from games.models import (
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    PlayerStatus,
+    StatusChoices,
+)
+
+from .base import BaseTestCase
+
+
+class GenerateLoadDataTests(BaseTestCase):
+
+    def generate(self, prefix="load", seed=1):
+        call_command(
+            "generate_load_data",
+            players=60,
+            games=12,
+            start=date(2030, 1, 1),
+            seed=seed,
+            prefix=prefix,
+            batch_size=300,
+            stdout=StringIO(),
+        )
+        return Game.objects.filter(description__startswith=f"{prefix} ").order_by(
+            "when"
+        )
+
+    def history(self, games) -> list[list[tuple[str, str]]]:
+        """(username without the prefix, status) of every history row per game."""
+        return [
+            [
+                (booking.player.user.username.split("_", 1)[1], booking.status)
+                for booking in BookingHistoryForGame.objects.filter(game=game)
+                .select_related("player__user")
+                .order_by("creation_date", "id")
+            ]
+            for game in games
+        ]
+
+    def test_generates_a_consistent_club(self):
+        games = self.generate()
+        self.assertEqual(games.count(), 12)
+        self.assertTrue(PlayerStatus.objects.exists())
+        self.assertGreater(BookingHistoryForGame.objects.count(), 12 * 40)
+
+        self.assertEqual(
+            set(CurrentBookingForGame.objects.values_list("booking_id", flat=True)),
+            set(
+                BookingHistoryForGame.objects.latest_per_player().values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+        out = StringIO()
+        call_command("verify_game_counters", stdout=out)
+        self.assertIn("All game counters are correct", out.getvalue())
+
+        for game in games:
+            # awaiting players are confirmed as soon as a slot is free
+            self.assertLessEqual(game.confirmed_count, game.cancelled_count)
+            if game.awaiting_count:
+                self.assertEqual(game.confirmed_count, game.cancelled_count)
+
+    def test_same_seed_generates_the_same_history(self):
+        first = self.history(self.generate(prefix="first", seed=7))
+        second = self.history(self.generate(prefix="second", seed=7))
+        other = self.history(self.generate(prefix="other", seed=8))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_rejects_an_existing_prefix(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+    def test_history_follows_the_status_changes(self):
+        allowed = {
+            (StatusChoices.PLANNED, StatusChoices.CANCELLED),
+            (StatusChoices.CANCELLED, StatusChoices.PLANNED),
+            (StatusChoices.RESERVED, StatusChoices.AWAITING),
+            (StatusChoices.AWAITING, StatusChoices.CONFIRMED),
+            (StatusChoices.AWAITING, StatusChoices.RESERVED),
+            (StatusChoices.CONFIRMED, StatusChoices.RESERVED),
+        }
+        for game in self.generate():
+            seeded_at = None
+            status = {}
+            for booking in BookingHistoryForGame.objects.filter(game=game).order_by(
+                "creation_date", "id"
+            ):
+                seeded_at = seeded_at or booking.creation_date
+                old_status = status.get(booking.player_id)
+                if booking.creation_date > seeded_at:
+                    self.assertIn((old_status, booking.status), allowed)
+                status[booking.player_id] = booking.status
@@ -0,0 +1,192 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import override_settings
+from django.utils import timezone
+
+from games.mailer import (
+    send_player_status_update_email_to_admins,
+    send_player_status_update_notifications,
+    send_queued_emails,
+)
+from games.models import (
+    BookingHistoryForGame,
+    Game,
+    OutboundEmail,
+    OutboundEmailStatus,
+    Player,
+    StatusChoices,
+)
+
+from .base import BaseTestCase
+from .smtp_server import StandInSMTPServer
+
+User = get_user_model()
+
+
+class MailOutboxTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when="2025-06-06")
+        self.tola = Player.objects.get(user=self.user_3_per)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.tola, status=StatusChoices.PLANNED
+        )
+
+    def _cancel_tola(self):
+        self.client.force_login(self.user_3_per)
+        response = self.client.post(
+            f"/games/game/{self.game.id}/update-player-status/",
+            {"player_id": self.tola.id, "checked": "off"},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_status_update_enqueues_emails_instead_of_sending(self):
+        self._cancel_tola()
+
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.order_by("id")
+        self.assertEqual(
+            [email.to for email in queued],
+            [["tola@lubi.jabola"], ["admin@example.com"]],
+        )
+        self.assertTrue(all(email.html_body for email in queued))
+        self.assertEqual(OutboundEmail.objects.due().count(), 2)
+
+    def test_worker_sends_queued_emails_over_one_connection(self):
+        self._cancel_tola()
+
+        with StandInSMTPServer() as server:
+            with override_settings(**server.email_settings()):
+                call_command("send_queued_mail", stdout=StringIO())
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.messages), 2)
+        self.assertIn("Your status is now cancelled", server.messages[0]["data"])
+        self.assertFalse(
+            OutboundEmail.objects.exclude(status=OutboundEmailStatus.SENT).exists()
+        )
+
+    @override_settings(EMAIL_OUTBOX_RETRY_DELAY=60)
+    def test_failed_email_is_retried_with_backoff(self):
+        self._cancel_tola()
+
+        with StandInSMTPServer() as server:
+            server.failures = 1
+            with override_settings(**server.email_settings()), self.assertLogs(
+                "games.mailer", "WARNING"
+            ):
+                self.assertEqual(send_queued_emails(), 2)
+
+                failed = OutboundEmail.objects.get(attempts=1, sent_at=None)
+                self.assertEqual(failed.status, OutboundEmailStatus.PENDING)
+                self.assertIn("Try again later", failed.last_error)
+                self.assertGreater(failed.next_attempt_at, timezone.now())
+                # not due yet
+                self.assertEqual(send_queued_emails(), 0)
+
+                OutboundEmail.objects.filter(pk=failed.pk).update(
+                    next_attempt_at=timezone.now()
+                )
+                self.assertEqual(send_queued_emails(), 1)
+
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, OutboundEmailStatus.SENT)
+        self.assertEqual(failed.attempts, 2)
+        self.assertEqual(len(server.messages), 2)
+
+    @override_settings(EMAIL_OUTBOX_RETRY_DELAY=0)
+    def test_email_fails_after_max_attempts(self):
+        self._cancel_tola()
+
+        with StandInSMTPServer() as server:
+            server.failures = 10
+            with override_settings(**server.email_settings()), self.assertLogs(
+                "games.mailer", "WARNING"
+            ):
+                call_command("send_queued_mail", max_attempts=3, stdout=StringIO())
+
+        self.assertEqual(
+            list(OutboundEmail.objects.values_list("status", "attempts")),
+            [(OutboundEmailStatus.FAILED, 3), (OutboundEmailStatus.FAILED, 3)],
+        )
+        self.assertEqual(server.messages, [])
+
+    def test_claimed_emails_are_not_taken_by_another_worker(self):
+        self._cancel_tola()
+
+        first = OutboundEmail.objects.claim(limit=1, lease=600)
+        second = OutboundEmail.objects.claim(limit=10, lease=600)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first[0].pk, second[0].pk)
+        self.assertEqual(OutboundEmail.objects.claim(limit=10, lease=600), [])
+        self.assertFalse(OutboundEmail.objects.due().exists())
+
+        # the emails of a worker which stopped are due again after the lease
+        OutboundEmail.objects.filter(pk=first[0].pk).update(
+            next_attempt_at=timezone.now()
+        )
+        self.assertEqual(OutboundEmail.objects.claim(limit=10, lease=600), [first[0]])
+
+    def test_malformed_email_does_not_block_the_outbox(self):
+        OutboundEmail.objects.create(
+            subject="Broken", body="-", from_email="admin@example.com", to=["a@b@c"]
+        )
+        self._cancel_tola()
+
+        with StandInSMTPServer() as server:
+            with override_settings(**server.email_settings()), self.assertLogs(
+                "games.mailer", "ERROR"
+            ):
+                call_command("send_queued_mail", stdout=StringIO())
+
+        broken = OutboundEmail.objects.get(subject="Broken")
+        self.assertEqual(broken.status, OutboundEmailStatus.FAILED)
+        self.assertEqual(broken.attempts, 1)
+        self.assertIn("ValueError", broken.last_error)
+        self.assertEqual(
+            OutboundEmail.objects.filter(status=OutboundEmailStatus.SENT).count(), 2
+        )
+        self.assertEqual(len(server.messages), 2)
+
+
+@override_settings(EMAIL_OUTBOX_ENABLED=False)
+class AdminNotificationBatchTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        User.objects.create_superuser(username="admin_2", email="admin2@example.com")
+        User.objects.create_superuser(username="admin_no_email", email="")
+        self.game = Game.objects.create(when="2025-06-07")
+        self.tola = Player.objects.get(user=self.user_3_per)
+
+    def test_admin_notifications_are_sent_over_one_connection(self):
+        with StandInSMTPServer() as server:
+            with override_settings(**server.email_settings()), patch(
+                "games.mailer.render_to_string", wraps=render_to_string
+            ) as mock_render:
+                send_player_status_update_email_to_admins(
+                    self.tola, self.game, StatusChoices.CANCELLED
+                )
+
+        self.assertEqual(server.connections, 1)
+        mock_render.assert_called_once()
+        recipients = sorted(message["to"][0] for message in server.messages)
+        self.assertEqual(recipients, ["admin2@example.com", "admin@example.com"])
+
+    def test_player_and_admin_notifications_are_one_batch(self):
+        with StandInSMTPServer() as server:
+            with override_settings(**server.email_settings()):
+                send_player_status_update_notifications(
+                    self.tola, self.game, StatusChoices.CANCELLED
+                )
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.messages), 3)
@@ -0,0 +1,111 @@
+import json
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games.helpers import booking_helper
+from games.models import Game, Player, PlayerRole, StatusChoices
+
+from .base import BaseTestCase
+
+
+@override_settings(PERFORMANCE_MONITORING=True, PERFORMANCE_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when=date.today() + timedelta(days=1))
+        booking_helper.create_bookings(
+            self.game,
+            Player.objects.filter(role=PlayerRole.PERMANENT),
+            StatusChoices.PLANNED,
+        )
+        self.client.force_login(self.superuser)
+
+    def get_logged(self, request) -> tuple[dict, object]:
+        with self.assertLogs("games.performance", "INFO") as logs:
+            response = request()
+        self.assertEqual(len(logs.records), 1)
+        return json.loads(logs.records[0].getMessage()), response
+
+    def test_logs_the_request_metrics(self):
+        url = reverse("game_details_url", args=[self.game.id])
+        with CaptureQueriesContext(connection) as queries:
+            record, response = self.get_logged(lambda: self.client.get(url))
+
+        self.assertEqual(record["url_name"], "game_details_url")
+        self.assertEqual(record["method"], "GET")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["sql_count"], len(queries))
+        self.assertGreater(record["template_count"], 0)
+        self.assertEqual(record["mail_count"], 0)
+        self.assertGreaterEqual(
+            record["total_ms"], max(record["sql_ms"], record["template_ms"])
+        )
+
+        timings = dict(
+            entry.split(";", 1) for entry in response["Server-Timing"].split(", ")
+        )
+        self.assertEqual(set(timings), {"total", "sql", "template"})
+        self.assertTrue(timings["sql"].endswith(f'desc="{len(queries)}"'))
+
+    def test_measures_the_mailer(self):
+        player = Player.objects.get(user=self.user_1_per)
+        record, _ = self.get_logged(
+            lambda: self.client.post(
+                reverse("game_player_status_update_url", args=[self.game.id]),
+                {"player_id": player.id, "checked": "off"},
+            )
+        )
+        self.assertEqual(record["url_name"], "game_player_status_update_url")
+        self.assertEqual(record["mail_count"], 1)
+        self.assertGreater(record["mail_ms"], 0)
+
+    async def test_measures_async_requests(self):
+        await self.async_client.aforce_login(self.superuser)
+        url = reverse("game_details_url", args=[self.game.id])
+        with self.assertLogs("games.performance", "INFO") as logs:
+            response = await self.async_client.get(url)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["url_name"], "game_details_url")
+        self.assertGreater(record["sql_count"], 0)
+        self.assertGreater(record["template_count"], 0)
+        self.assertIn("Server-Timing", response)
+
+    @override_settings(ROSTER_EVENTS_POLL_INTERVAL=0.05, ROSTER_EVENTS_MAX_DURATION=1)
+    async def test_streams_the_roster_events_without_waiting_for_them(self):
+        await self.async_client.aforce_login(self.superuser)
+        url = reverse("game_roster_events_url", args=[self.game.id])
+        with self.assertLogs("games.performance", "INFO") as logs:
+            response = await self.async_client.get(url)
+        # logged once the stream starts, before its content is sent
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["url_name"], "game_roster_events_url")
+        self.assertLess(record["total_ms"], 1000)
+
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertIn(b"event: snapshot", b"".join(chunks))
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=False)
+    def test_server_timing_header_is_optional(self):
+        client = Client()
+        _, response = self.get_logged(lambda: client.get(reverse("login_url")))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0)
+    def test_requests_outside_the_sample_are_not_measured(self):
+        client = Client()
+        with self.assertNoLogs("games.performance"):
+            response = client.get(reverse("login_url"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PERFORMANCE_MONITORING=False)
+    def test_disabled_by_default(self):
+        client = Client()
+        with self.assertNoLogs("games.performance"):
+            response = client.get(reverse("login_url"))
+        self.assertNotIn("Server-Timing", response)
@@ -3,6 +3,7 @@ from unittest.mock import patch
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from games.helpers.booking_helper import create_bookings
 from games.helpers.game_helper import get_players_by_status
 from games.models import (
     BookingHistoryForGame,
@@ -12,7 +13,6 @@ from games.models import (
     PlayerRole,
     StatusChoices,
 )
-from games.views import _create_booking_for_players
 from .base import BaseTestCase
 
 User = get_user_model()
@@ -128,7 +128,7 @@ class PlayerModelTests(BaseTestCase):
         tola = Player.objects.get(user__username="tola")
         players = [reksio, tola]
 
-        _create_booking_for_players(game, players, StatusChoices.PLANNED)
+        create_bookings(game, players, StatusChoices.PLANNED)
 
         bookings = BookingHistoryForGame.objects.filter(game=game)
         self.assertEqual(bookings.count(), 2)
@@ -142,7 +142,7 @@ class PlayerModelTests(BaseTestCase):
             description="another test game",
             status=GameStatus.PLANNED,
         )
-        _create_booking_for_players(
+        create_bookings(
             game,
             Player.objects.filter(role=PlayerRole.PERMANENT),
             StatusChoices.PLANNED,
@@ -0,0 +1,198 @@
+import csv
+import io
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games.helpers import player_csv_helper
+from games.models import Player, PlayerRole
+
+from .base import BaseTestCase
+
+User = get_user_model()
+
+HEADER = "username,first_name,last_name,email,mobile_number,role\n"
+
+
+def players_csv(count: int, start=0) -> str:
+    return HEADER + "".join(
+        f"new_{idx},First{idx},Last{idx},new_{idx}@example.com,123456789,"
+        f"{PlayerRole.ACTIVE if idx % 3 else PlayerRole.PERMANENT}\n"
+        for idx in range(start, start + count)
+    )
+
+
+class PlayerImportTests(BaseTestCase):
+
+    def test_imports_players_in_bulk(self):
+        result = player_csv_helper.import_players(io.StringIO(players_csv(5)))
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(len(result.players), 5)
+        player = Player.objects.select_related("user").get(user__username="new_3")
+        self.assertEqual(player.user.email, "new_3@example.com")
+        self.assertEqual(player.user.first_name, "First3")
+        self.assertEqual(player.role, PlayerRole.PERMANENT)
+        self.assertFalse(player.user.has_usable_password())
+
+    def test_queries_are_not_per_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = player_csv_helper.import_players(io.StringIO(players_csv(300)))
+        self.assertEqual(len(result.players), 300)
+        # the inserts are split only by the database's limit of parameters
+        self.assertLess(len(queries), 15)
+
+    def test_uniqueness_is_checked_per_batch(self):
+        # one query for the usernames and one for the emails of every batch
+        with CaptureQueriesContext(connection) as queries:
+            result = player_csv_helper.import_players(
+                io.StringIO(players_csv(10)), batch_size=4
+            )
+        self.assertEqual(result.errors, [])
+        selects = [q for q in queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 3 * 2)
+
+    def test_invalid_file_imports_nothing(self):
+        rows = (
+            players_csv(2)
+            + "bolek,Bo,Lek,bolek@example.com,123456789,Active\n"  # line 4
+            + "new_0,Re,Peat,other@example.com,123456789,Active\n"  # line 5
+            + "fresh,Fr,Esh,NEW_1@example.com,123456789,Active\n"  # line 6
+            + "broken,,,not-an-email,12,Captain\n"  # line 7
+        )
+        result = player_csv_helper.import_players(io.StringIO(rows))
+
+        self.assertEqual(result.players, [])
+        self.assertEqual(result.rows, 6)
+        lines = [line for line, _ in result.errors]
+        self.assertEqual(sorted(set(lines)), [4, 5, 6, 7])
+        self.assertIn((4, "username bolek already exists"), result.errors)
+        self.assertIn((5, "username new_0 is repeated"), result.errors)
+        self.assertFalse(User.objects.filter(username__startswith="new_").exists())
+
+    def test_taken_email_is_found_in_any_case(self):
+        User.objects.create_user(username="taken", email="New_1@Example.com")
+
+        result = player_csv_helper.import_players(io.StringIO(players_csv(2)))
+
+        self.assertEqual(
+            result.errors, [(3, "email new_1@example.com is already taken")]
+        )
+        self.assertEqual(result.players, [])
+
+    def test_missing_columns(self):
+        result = player_csv_helper.import_players(
+            io.StringIO("username,email\nnew,new@example.com\n")
+        )
+        self.assertEqual(
+            result.errors,
+            [(1, "missing columns: first_name, last_name, mobile_number, role")],
+        )
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(players_csv(4))
+            file.flush()
+            out = StringIO()
+            call_command("import_players", file.name, stdout=out)
+            self.assertIn("Imported 4 players", out.getvalue())
+
+            with self.assertRaises(CommandError):
+                call_command("import_players", file.name, stderr=StringIO())
+        self.assertEqual(
+            Player.objects.filter(user__username__startswith="new_").count(), 4
+        )
+
+
+class PlayerExportTests(BaseTestCase):
+
+    def test_export_round_trips(self):
+        player_csv_helper.import_players(io.StringIO(players_csv(3)))
+        exported = "".join(player_csv_helper.export_players(chunk_size=2))
+
+        rows = list(csv.DictReader(io.StringIO(exported)))
+        self.assertEqual(len(rows), Player.objects.count())
+        self.assertIn(
+            {
+                "username": "new_1",
+                "first_name": "First1",
+                "last_name": "Last1",
+                "email": "new_1@example.com",
+                "mobile_number": "123456789",
+                "role": PlayerRole.ACTIVE,
+            },
+            rows,
+        )
+        # every exported player exists already
+        result = player_csv_helper.import_players(io.StringIO(exported))
+        self.assertEqual(len({line for line, _ in result.errors}), len(rows))
+
+    def test_export_command(self):
+        with tempfile.NamedTemporaryFile("r", suffix=".csv") as file:
+            call_command("export_players", output=file.name)
+            self.assertEqual(file.read().splitlines()[0], HEADER.strip())
+
+
+class PlayerCsvViewTests(BaseTestCase):
+
+    def test_upload_imports_players(self):
+        self.client.force_login(self.superuser)
+        response = self.client.post(
+            reverse("import_players_url"),
+            {"file": SimpleUploadedFile("players.csv", players_csv(3).encode())},
+        )
+        self.assertRedirects(response, reverse("all_players_url"))
+        self.assertEqual(
+            Player.objects.filter(user__username__startswith="new_").count(), 3
+        )
+
+    def test_upload_with_errors_lists_them(self):
+        self.client.force_login(self.superuser)
+        response = self.client.post(
+            reverse("import_players_url"),
+            {
+                "file": SimpleUploadedFile(
+                    "players.csv",
+                    (players_csv(1) + players_csv(1)[len(HEADER) :]).encode(),
+                )
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Line 3: username new_0 is repeated")
+        self.assertFalse(User.objects.filter(username="new_0").exists())
+
+    def test_upload_not_in_utf8_is_an_error(self):
+        self.client.force_login(self.superuser)
+        response = self.client.post(
+            reverse("import_players_url"),
+            {
+                "file": SimpleUploadedFile(
+                    "players.csv",
+                    players_csv(1).replace("First", "Zoë").encode("cp1250"),
+                )
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "The file is not UTF-8 encoded")
+        self.assertFalse(User.objects.filter(username="new_0").exists())
+
+    def test_export_streams_csv(self):
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse("export_players_url"))
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("bolek,", content)
+
+    def test_only_admins(self):
+        self.client.force_login(self.user_1_per)
+        for url_name in ["import_players_url", "export_players_url"]:
+            response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 302, url_name)
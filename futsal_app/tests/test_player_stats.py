@@ -0,0 +1,245 @@
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games.helpers import booking_helper
+from games.models import (
+    BookingHistoryArchive,
+    BookingHistoryForGame,
+    Game,
+    GameStatus,
+    Player,
+    PlayerSeasonStats,
+    StatusChoices,
+)
+
+from .base import BaseTestCase, seed_season
+
+
+def stats_of(player: Player, season=2025) -> dict:
+    stats = PlayerSeasonStats.objects.get(player=player, season=season)
+    return {
+        "played": stats.games_played,
+        "substituted": stats.games_substituted,
+        "cancelled": stats.games_cancelled,
+        "late": stats.late_cancellations,
+        "reserve": stats.games_on_reserve,
+        "promotions": stats.promotions,
+    }
+
+
+class PlayerSeasonStatsTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bolek, self.lolek, self.tola, self.reksio = Player.objects.order_by("id")
+        self.games = [Game.objects.create(when=date(2025, 3, day)) for day in [3, 10]]
+
+    def book(self, game, player, status, created: datetime | None = None):
+        booking = BookingHistoryForGame.objects.create(
+            game=game, player=player, status=status
+        )
+        if created:
+            # creation_date is auto_now_add, the test moves it back in time
+            BookingHistoryForGame.objects.filter(id=booking.id).update(
+                creation_date=created
+            )
+            game.current_bookings.filter(booking=booking).update(creation_date=created)
+        return booking
+
+    def play(self, game):
+        game.status = GameStatus.PLAYED
+        game.save()
+
+    def test_aggregates_the_final_statuses(self):
+        early = datetime(2025, 2, 1, tzinfo=dt_timezone.utc)
+        first, second = self.games
+        for game in self.games:
+            self.book(game, self.bolek, StatusChoices.PLANNED)
+            self.book(game, self.lolek, StatusChoices.RESERVED)
+        # bolek drops out early from the first game and late from the second
+        self.book(first, self.bolek, StatusChoices.CANCELLED, created=early)
+        self.book(second, self.bolek, StatusChoices.CANCELLED)
+        # lolek is promoted in both games, but gives up the second place
+        self.book(first, self.lolek, StatusChoices.CONFIRMED)
+        self.book(second, self.lolek, StatusChoices.CONFIRMED)
+        self.book(second, self.lolek, StatusChoices.RESERVED)
+        self.book(second, self.tola, StatusChoices.PLANNED)
+        self.book(second, self.reksio, StatusChoices.RESTING)
+
+        for game in self.games:
+            self.play(game)
+
+        self.assertEqual(
+            stats_of(self.bolek),
+            {
+                "played": 0,
+                "substituted": 0,
+                "cancelled": 2,
+                "late": 1,
+                "reserve": 0,
+                "promotions": 0,
+            },
+        )
+        self.assertEqual(
+            stats_of(self.lolek),
+            {
+                "played": 1,
+                "substituted": 1,
+                "cancelled": 0,
+                "late": 0,
+                "reserve": 1,
+                "promotions": 2,
+            },
+        )
+        self.assertEqual(stats_of(self.tola)["played"], 1)
+        self.assertEqual(stats_of(self.reksio)["played"], 0)
+
+        stats = PlayerSeasonStats.objects.get(player=self.bolek)
+        self.assertEqual(stats.attendance_rate, 0)
+        self.assertEqual(stats.cancellation_rate, 1)
+        self.assertEqual(
+            PlayerSeasonStats.objects.get(player=self.tola).attendance_rate, 1
+        )
+
+    def test_refreshed_when_a_game_moves_to_and_from_played(self):
+        first, second = self.games
+        booking_helper.create_bookings(first, [self.bolek], StatusChoices.PLANNED)
+        booking_helper.create_bookings(second, [self.bolek], StatusChoices.PLANNED)
+        self.assertFalse(PlayerSeasonStats.objects.exists())
+
+        self.play(first)
+        self.assertEqual(stats_of(self.bolek)["played"], 1)
+        # only the players of the played game
+        self.assertFalse(PlayerSeasonStats.objects.exclude(player=self.bolek).exists())
+
+        self.client.force_login(self.superuser)
+        self.client.post(
+            reverse("game_status_update_url", args=[second.id]),
+            {"status": GameStatus.PLAYED},
+        )
+        self.assertEqual(stats_of(self.bolek)["played"], 2)
+
+        # a correction of an already played game is recounted right away
+        booking_helper.create_bookings(second, [self.bolek], StatusChoices.CANCELLED)
+        self.assertEqual(stats_of(self.bolek)["played"], 1)
+        call_command("refresh_player_stats", season=[2025], stdout=StringIO())
+        self.assertEqual(stats_of(self.bolek)["played"], 1)
+
+        second = Game.objects.get(id=second.id)
+        second.status = GameStatus.PLANNED
+        second.save()
+        self.assertEqual(stats_of(self.bolek)["cancelled"], 0)
+
+        first.delete()
+        self.assertFalse(PlayerSeasonStats.objects.exists())
+
+    def test_refreshed_when_the_bookings_of_a_played_game_change(self):
+        game = self.games[0]
+        self.book(game, self.bolek, StatusChoices.PLANNED)
+        self.book(game, self.lolek, StatusChoices.RESERVED)
+        self.play(game)
+
+        self.book(game, self.lolek, StatusChoices.CONFIRMED)
+        self.assertEqual(stats_of(self.lolek)["substituted"], 1)
+        self.assertEqual(stats_of(self.lolek)["promotions"], 1)
+
+        cancelled = self.book(game, self.bolek, StatusChoices.CANCELLED)
+        self.assertEqual(stats_of(self.bolek)["cancelled"], 1)
+        cancelled.delete()
+        self.assertEqual(stats_of(self.bolek)["played"], 1)
+        self.assertEqual(stats_of(self.bolek)["cancelled"], 0)
+
+        BookingHistoryForGame.objects.filter(game=game, player=self.lolek).delete()
+        self.assertFalse(PlayerSeasonStats.objects.filter(player=self.lolek).exists())
+
+    def test_late_cancellation_starts_the_day_before_the_game(self):
+        first, second = self.games  # on March 3rd and 10th
+        for game in self.games:
+            self.book(game, self.bolek, StatusChoices.PLANNED)
+        self.book(
+            first,
+            self.bolek,
+            StatusChoices.CANCELLED,
+            created=datetime(2025, 3, 1, 23, 59, tzinfo=dt_timezone.utc),
+        )
+        self.book(
+            second,
+            self.bolek,
+            StatusChoices.CANCELLED,
+            created=datetime(2025, 3, 9, 0, 0, tzinfo=dt_timezone.utc),
+        )
+        for game in self.games:
+            self.play(game)
+
+        self.assertEqual(stats_of(self.bolek)["cancelled"], 2)
+        self.assertEqual(stats_of(self.bolek)["late"], 1)
+
+    def test_saving_a_played_game_again_does_not_refresh(self):
+        booking_helper.create_bookings(
+            self.games[0], [self.bolek], StatusChoices.PLANNED
+        )
+        self.play(self.games[0])
+        game = Game.objects.get(id=self.games[0].id)
+        game.description = "3:2"
+        with CaptureQueriesContext(connection) as queries:
+            game.save()
+        self.assertEqual(len(queries), 1)
+
+    def test_counts_archived_promotions(self):
+        game = Game.objects.create(when=date(2024, 5, 5))
+        self.book(game, self.lolek, StatusChoices.RESERVED)
+        self.book(game, self.lolek, StatusChoices.CONFIRMED)
+        self.book(game, self.lolek, StatusChoices.RESERVED)
+        self.play(game)
+        BookingHistoryArchive.objects.archive([game.id])
+
+        PlayerSeasonStats.objects.refresh(2024)
+        self.assertEqual(stats_of(self.lolek, 2024)["promotions"], 1)
+        self.assertEqual(stats_of(self.lolek, 2024)["reserve"], 1)
+
+    def test_refresh_queries_do_not_depend_on_the_players(self):
+        def refresh_queries() -> int:
+            with CaptureQueriesContext(connection) as queries:
+                PlayerSeasonStats.objects.refresh(2025)
+            return len(queries)
+
+        booking_helper.create_bookings(
+            self.games[0], [self.bolek], StatusChoices.PLANNED
+        )
+        self.play(self.games[0])
+        few = refresh_queries()
+        seed_season(players=100, games=6, today=date(2025, 6, 30))
+        self.assertGreater(PlayerSeasonStats.objects.count(), 50)
+        self.assertEqual(refresh_queries(), few)
+
+    def test_shown_on_the_player_pages(self):
+        booking_helper.create_bookings(
+            self.games[0], [self.bolek], StatusChoices.PLANNED
+        )
+        self.play(self.games[0])
+        self.client.force_login(self.user_1_per)
+
+        response = self.client.get(reverse("player_details_url", args=[self.bolek.id]))
+        self.assertEqual(
+            list(response.context["season_stats"]),
+            [PlayerSeasonStats.objects.get(player=self.bolek)],
+        )
+        self.assertContains(response, "100%")
+
+        response = self.client.get(reverse("player_details_url", args=[self.tola.id]))
+        self.assertContains(response, "No played games yet.")
+
+        Game.objects.filter(id=self.games[0].id).update(when=date.today())
+        PlayerSeasonStats.objects.refresh(date.today().year)
+        response = self.client.get(reverse("all_players_url"))
+        played = {
+            player.id: player.games_played for player in response.context["players"]
+        }
+        self.assertEqual(played[self.bolek.id], 1)
+        self.assertIsNone(played[self.lolek.id])
@@ -0,0 +1,364 @@
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from games import urls as games_urls
+from games.helpers import booking_helper
+from games.models import Game, Player, PlayerRole, StatusChoices
+
+from .base import BaseTestCase, seed_season
+
+# Maximum number of SQL queries per request of every URL in games.urls,
+# including the session and user lookups. They must not depend on the size
+# of the data: a view over the hundreds of seeded players and thousands of
+# history rows has to stay within the same budget as over a few.
+QUERY_BUDGETS = {
+    "next_games_url": 5,
+    "past_games_url": 4,
+    "game_details_url": 8,
+    "game_remove_url": 11,  # POST deletes the bookings with a statement per table
+    "game_status_update_url": 10,  # Played refreshes the players' stats set-based
+    # a drop out and the promotion of an awaiting player, each notified
+    "game_player_status_update_url": 32,
+    "all_players_url": 4,
+    "player_details_url": 8,
+    "import_players_url": 12,  # POST validates and inserts the rows in bulk
+    "export_players_url": 3,
+    "add_player_url": 6,
+    # bookings written in bulk look up which of their games are played, see
+    # signals.bookings_changed_in_bulk
+    "add_game_url": 17,
+    "add_absence_url": 18,
+    "booking_history_url": 4,
+    "export_booking_history_url": 3,  # streamed from a single query
+    "logout_url": 4,
+    "login_url": 9,
+    "check_username_and_email": 4,
+}
+
+# URLs which can't be measured per request
+EXEMPT_URLS = {
+    # an endless async stream, one roster query per event, see test_roster_events
+    "game_roster_events_url",
+}
+
+
+class QueryBudgetTests(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.season_players, cls.season_games = seed_season()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.superuser)
+        # the next game with a full roster
+        self.game = next(game for game in self.season_games if game.status == "Planned")
+
+    def assertQueryBudget(self, url_name: str, request, expected_status=200):
+        budget = QUERY_BUDGETS[url_name]
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertEqual(response.status_code, expected_status, url_name)
+        if len(queries) > budget:
+            captured = "\n".join(
+                f"{idx}. {query['sql']}"
+                for idx, query in enumerate(queries.captured_queries, start=1)
+            )
+            self.fail(
+                f"{url_name} issued {len(queries)} queries, "
+                f"its budget is {budget}:\n{captured}"
+            )
+        return response
+
+    def assertSameQueryCount(self, small, full):
+        """
+        The request issues as many queries for a game with a few bookings as
+        for a full game of the seeded season, with more rows than a batch.
+        """
+        with CaptureQueriesContext(connection) as small_queries:
+            small()
+        with CaptureQueriesContext(connection) as full_queries:
+            full()
+        self.assertEqual(len(full_queries), len(small_queries))
+
+    def small_game(self) -> Game:
+        game = Game.objects.create(when=self.game.when + timedelta(days=1))
+        booking_helper.create_bookings(
+            game, self.season_players[:2], StatusChoices.PLANNED
+        )
+        return game
+
+    def test_every_url_has_a_budget(self):
+        url_names = {
+            pattern.name
+            for pattern in games_urls.urlpatterns
+            if isinstance(pattern, URLPattern)
+        }
+        self.assertEqual(url_names - EXEMPT_URLS, set(QUERY_BUDGETS))
+
+    def test_next_games(self):
+        self.assertQueryBudget(
+            "next_games_url", lambda: self.client.get(reverse("next_games_url"))
+        )
+
+    def test_past_games(self):
+        url = reverse("past_games_url")
+        self.assertQueryBudget("past_games_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "past_games_url", lambda: self.client.get(url, {"games_page": 2})
+        )
+
+    def test_game_details(self):
+        url = reverse("game_details_url", args=[self.game.id])
+        self.assertQueryBudget("game_details_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "game_details_url", lambda: self.client.get(url, {"history_page": 5})
+        )
+
+        player = Player.objects.filter(role=PlayerRole.ACTIVE).first()
+        self.client.force_login(player.user)
+        self.assertQueryBudget("game_details_url", lambda: self.client.get(url))
+
+    def test_game_remove(self):
+        url = reverse("game_remove_url", args=[self.game.id])
+        self.assertQueryBudget("game_remove_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "game_remove_url", lambda: self.client.post(url), expected_status=302
+        )
+        self.assertFalse(Game.objects.filter(id=self.game.id).exists())
+
+        small, full = self.small_game(), self.season_games[-1]
+        self.assertSameQueryCount(
+            lambda: self.client.post(reverse("game_remove_url", args=[small.id])),
+            lambda: self.client.post(reverse("game_remove_url", args=[full.id])),
+        )
+
+    def test_game_status_update(self):
+        self.assertQueryBudget(
+            "game_status_update_url",
+            lambda: self.client.post(
+                reverse("game_status_update_url", args=[self.game.id]),
+                {"status": "Cancelled", "description": "Hall closed"},
+            ),
+            expected_status=302,
+        )
+        # refreshes the season stats of the game's players
+        self.assertQueryBudget(
+            "game_status_update_url",
+            lambda: self.client.post(
+                reverse("game_status_update_url", args=[self.game.id]),
+                {"status": "Played"},
+            ),
+            expected_status=302,
+        )
+
+    def test_stats_refresh_does_not_grow_with_the_players(self):
+        small = self.small_game()
+        self.assertSameQueryCount(
+            lambda: self.client.post(
+                reverse("game_status_update_url", args=[small.id]),
+                {"status": "Played"},
+            ),
+            lambda: self.client.post(
+                reverse("game_status_update_url", args=[self.game.id]),
+                {"status": "Played"},
+            ),
+        )
+
+    def test_game_player_status_update(self):
+        url = reverse("game_player_status_update_url", args=[self.game.id])
+        permanent = Player.objects.filter(
+            role=PlayerRole.PERMANENT, user__username__startswith="season_"
+        ).first()
+        # a planned player drops out and the first awaiting player is confirmed
+        response = self.assertQueryBudget(
+            "game_player_status_update_url",
+            lambda: self.client.post(
+                url,
+                {"player_id": permanent.id, "checked": "off"},
+                headers={"accept": "application/json"},
+            ),
+        )
+        self.assertEqual(
+            [row["status"] for row in response.json()["changed"]],
+            [StatusChoices.CANCELLED, StatusChoices.CONFIRMED],
+        )
+        self.assertQueryBudget(
+            "game_player_status_update_url",
+            lambda: self.client.post(url, {"player_id": permanent.id, "checked": "on"}),
+            expected_status=302,
+        )
+
+    def test_all_players(self):
+        url = reverse("all_players_url")
+        self.assertQueryBudget("all_players_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "all_players_url",
+            lambda: self.client.get(url, {"name": "First1", "status": "active"}),
+        )
+
+    def test_player_details(self):
+        player = self.season_players[1]
+        url = reverse("player_details_url", args=[player.id])
+        self.assertQueryBudget("player_details_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "player_details_url",
+            lambda: self.client.post(
+                url,
+                {
+                    "form_type": "profile",
+                    "username": player.user.username,
+                    "first_name": "Renamed",
+                    "last_name": player.user.last_name,
+                    "email": player.user.email,
+                    "mobile_number": "987654321",
+                    "role": PlayerRole.ACTIVE,
+                },
+            ),
+            expected_status=302,
+        )
+
+    def test_import_players(self):
+        url = reverse("import_players_url")
+        self.assertQueryBudget("import_players_url", lambda: self.client.get(url))
+        rows = "".join(
+            f"import_{idx},First,Last,import_{idx}@example.com,123456789,Active\n"
+            for idx in range(300)
+        )
+        self.assertQueryBudget(
+            "import_players_url",
+            lambda: self.client.post(
+                url,
+                {
+                    "file": SimpleUploadedFile(
+                        "players.csv",
+                        (
+                            "username,first_name,last_name,email,mobile_number,role\n"
+                            + rows
+                        ).encode(),
+                    )
+                },
+            ),
+            expected_status=302,
+        )
+
+    def test_export_players(self):
+        def export():
+            response = self.client.get(reverse("export_players_url"))
+            b"".join(response.streaming_content)
+            return response
+
+        self.assertQueryBudget("export_players_url", export)
+
+    def test_add_player(self):
+        url = reverse("add_player_url")
+        self.assertQueryBudget("add_player_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "add_player_url",
+            lambda: self.client.post(
+                url,
+                {
+                    "username": "newcomer",
+                    "first_name": "New",
+                    "last_name": "Comer",
+                    "email": "newcomer@example.com",
+                    "mobile_number": "123456789",
+                    "role": PlayerRole.ACTIVE,
+                },
+            ),
+            expected_status=302,
+        )
+
+    def test_add_game(self):
+        url = reverse("add_game_url")
+        self.assertQueryBudget("add_game_url", lambda: self.client.get(url))
+        # seeds the roster of hundreds of players and applies the absences
+        self.assertQueryBudget(
+            "add_game_url",
+            lambda: self.client.post(
+                url,
+                {
+                    "when": self.season_games[-1].when + timedelta(weeks=1),
+                    "set_players": "on",
+                },
+            ),
+            expected_status=302,
+        )
+
+    def test_add_absence(self):
+        url = reverse("add_absence_url")
+        self.assertQueryBudget("add_absence_url", lambda: self.client.get(url))
+        self.assertQueryBudget(
+            "add_absence_url", lambda: self.client.get(url, {"status_page": 3})
+        )
+        # covers every upcoming game of the season
+        self.assertQueryBudget(
+            "add_absence_url",
+            lambda: self.client.post(
+                url,
+                {
+                    "player": self.season_players[2].id,
+                    "date_start": self.game.when,
+                    "date_end": self.season_games[-1].when,
+                    "status": StatusChoices.RESTING,
+                },
+            ),
+            expected_status=302,
+        )
+
+    def test_booking_history(self):
+        url = reverse("booking_history_url")
+        first_page = self.assertQueryBudget(
+            "booking_history_url", lambda: self.client.get(url, {"page_size": 100})
+        )
+        self.assertQueryBudget(
+            "booking_history_url",
+            lambda: self.client.get(
+                url,
+                {
+                    "page_size": 100,
+                    "before": first_page.context["booking_history"].next_cursor,
+                },
+            ),
+        )
+
+    def test_export_booking_history(self):
+        def export(params):
+            response = self.client.get(reverse("export_booking_history_url"), params)
+            b"".join(response.streaming_content)
+            return response
+
+        self.assertQueryBudget("export_booking_history_url", lambda: export({}))
+        self.assertQueryBudget(
+            "export_booking_history_url",
+            lambda: export({"format": "json", "game": self.game.id}),
+        )
+
+    def test_login_and_logout(self):
+        self.assertQueryBudget(
+            "logout_url", lambda: self.client.post(reverse("logout_url")), 302
+        )
+        self.assertQueryBudget(
+            "login_url", lambda: self.client.get(reverse("login_url"))
+        )
+        self.assertQueryBudget(
+            "login_url",
+            lambda: self.client.post(
+                reverse("login_url"),
+                {"username": "admin", "password": "password123"},
+            ),
+            expected_status=302,
+        )
+
+    def test_check_username_and_email(self):
+        self.assertQueryBudget(
+            "check_username_and_email",
+            lambda: self.client.get(
+                reverse("check_username_and_email"),
+                {"username": "season_1", "email": "nobody@example.com"},
+            ),
+        )
@@ -0,0 +1,145 @@
+import re
+from unittest import skipUnless
+
+from django.db import connection
+
+from games.helpers import game_helper, player_helper
+from games.models import (
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    Player,
+    PlayerStatus,
+    StatusChoices,
+)
+
+from .base import BaseTestCase
+
+BOOKING_TABLES = ("games_bookinghistoryforgame", "games_currentbookingforgame")
+
+
+@skipUnless(
+    connection.vendor in ("sqlite", "postgresql"), "EXPLAIN format is vendor specific"
+)
+class HotQueryPlanTests(BaseTestCase):
+    """
+    Guards the access paths of the hot game_helper queries: every read of the
+    booking tables has to be an index lookup, not a full scan.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when="2025-05-05")
+        self.player = Player.objects.get(user=self.user_1_per)
+        for status in [StatusChoices.PLANNED, StatusChoices.CANCELLED]:
+            BookingHistoryForGame.objects.create(
+                game=self.game, player=self.player, status=status
+            )
+
+    def _capture_selects(self, func) -> list[tuple[str, tuple]]:
+        selects = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith("SELECT"):
+                selects.append((sql, tuple(params or ())))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            func()
+        self.assertTrue(selects)
+        return selects
+
+    def _explain(self, sql: str, params: tuple) -> list[str]:
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                return [row[-1] for row in cursor.fetchall()]
+            # tiny test tables are always cheaper to scan, so make the planner
+            # show whether a usable index exists at all
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _assert_booking_tables_use_indexes(self, func, tables=BOOKING_TABLES):
+        for sql, params in self._capture_selects(func):
+            for line in self._explain(sql, params):
+                if not any(table in line for table in tables):
+                    continue
+                if connection.vendor == "sqlite":
+                    self.assertRegex(line, r"^SEARCH ", msg=sql)
+                else:
+                    self.assertNotIn("Seq Scan", line, msg=sql)
+
+    def test_get_roster_uses_index(self):
+        self._assert_booking_tables_use_indexes(
+            lambda: game_helper.get_roster(self.game)
+        )
+
+    def test_get_players_by_status_uses_index(self):
+        self._assert_booking_tables_use_indexes(
+            lambda: game_helper.get_players_by_status(
+                [StatusChoices.AWAITING], self.game
+            )
+        )
+
+    def test_total_players_for_game_uses_index(self):
+        self._assert_booking_tables_use_indexes(
+            lambda: game_helper.get_total_players_for_game(self.game)
+        )
+
+    def test_get_latest_booking_for_game_uses_index(self):
+        self._assert_booking_tables_use_indexes(
+            lambda: player_helper.get_latest_booking_for_game(self.player, self.game)
+        )
+
+    def test_latest_entry_from_history_uses_index(self):
+        self._assert_booking_tables_use_indexes(
+            lambda: CurrentBookingForGame.objects.refresh(
+                {(self.game.id, self.player.id)}
+            )
+        )
+
+    def test_game_booking_history_uses_index(self):
+        self._assert_booking_tables_use_indexes(
+            lambda: list(
+                BookingHistoryForGame.objects.filter(game=self.game).order_by(
+                    "-creation_date"
+                )[:25]
+            )
+        )
+
+    def test_latest_entry_index_matches_access_path(self):
+        # other players' entries of the game make the (game, player) index the
+        # selective one; PostgreSQL needs the statistics to notice
+        BookingHistoryForGame.objects.bulk_record(
+            [
+                BookingHistoryForGame(game=self.game, player=player, status=status)
+                for player in Player.objects.exclude(id=self.player.id)
+                for status in [StatusChoices.PLANNED, StatusChoices.CANCELLED] * 25
+            ]
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE games_bookinghistoryforgame")
+        sql, params = self._capture_selects(
+            lambda: BookingHistoryForGame.objects.filter(
+                game=self.game, player=self.player
+            )
+            .order_by("-creation_date")
+            .first()
+        )[0]
+        plan = "\n".join(self._explain(sql, params))
+        self.assertTrue(re.search(r"booking_game_player_date_idx", plan), plan)
+
+    def test_absence_lookups_use_index(self):
+        for lookup in [
+            lambda: list(PlayerStatus.objects.on(self.game.when)),
+            lambda: list(
+                PlayerStatus.objects.overlapping(self.game.when, self.game.when)
+            ),
+            lambda: PlayerStatus.objects.absent_player_ids_on(self.game.when),
+            lambda: list(Game.objects.filter(when__gte=self.game.when)),
+        ]:
+            self._assert_booking_tables_use_indexes(
+                lookup, tables=("games_playerstatus", "games_game")
+            )
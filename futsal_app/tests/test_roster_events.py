@@ -0,0 +1,201 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from games.helpers import booking_helper, roster_events
+from games.models import BookingHistoryForGame, Game, Player, PlayerRole, StatusChoices
+
+from .base import BaseTestCase
+
+
+def _parse_event(chunk: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+async def _next_event(stream, timeout: float) -> tuple[str, dict]:
+    while True:
+        chunk = await asyncio.wait_for(anext(stream), timeout)
+        if chunk.startswith("event:"):
+            return _parse_event(chunk)
+
+
+class RosterEventsTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when="2025-09-01")
+        booking_helper.create_bookings(
+            self.game,
+            Player.objects.filter(role=PlayerRole.PERMANENT),
+            StatusChoices.PLANNED,
+        )
+        self.bolek = Player.objects.get(user=self.user_1_per)
+        self.reksio = Player.objects.get(user=self.user_4_act)
+        booking_helper.create_bookings(self.game, [self.reksio], StatusChoices.AWAITING)
+        self.url = reverse("game_player_status_update_url", args=[self.game.id])
+
+    def test_json_status_update_returns_changed_rows(self):
+        self.client.force_login(self.user_1_per)
+        response = self.client.post(
+            self.url,
+            {"player_id": self.bolek.id, "checked": "off"},
+            headers={"accept": "application/json"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "changed": [
+                    {
+                        "player_id": self.bolek.id,
+                        "name": "bolek",
+                        "status": StatusChoices.CANCELLED,
+                    },
+                    {
+                        "player_id": self.reksio.id,
+                        "name": "reksio",
+                        "status": StatusChoices.CONFIRMED,
+                    },
+                ]
+            },
+        )
+
+    def test_json_status_update_errors(self):
+        self.client.force_login(self.user_1_per)
+        response = self.client.post(
+            self.url,
+            {"player_id": self.reksio.id, "checked": "on"},
+            headers={"accept": "application/json"},
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(
+            response.json(), {"error": "You can only change your own status."}
+        )
+
+    def test_roster_diff(self):
+        old = roster_events.get_roster_state(self.game.id)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.bolek, status=StatusChoices.CANCELLED
+        )
+        new = roster_events.get_roster_state(self.game.id)
+
+        self.assertEqual(len(new), 4)
+        self.assertEqual(
+            roster_events.roster_diff(old, new),
+            {
+                "changed": [
+                    {
+                        "player_id": self.bolek.id,
+                        "name": "bolek",
+                        "status": StatusChoices.CANCELLED,
+                    }
+                ],
+                "removed": [],
+            },
+        )
+        self.assertEqual(
+            roster_events.roster_diff(new, {})["removed"], list(new.keys())
+        )
+
+    def test_rows_are_limited_to_what_the_page_shows(self):
+        lolek = Player.objects.get(user=self.user_2_per)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=lolek, status=StatusChoices.CANCELLED
+        )
+        reserved = Player.objects.create(
+            user=User.objects.create_user(username="filemon", password="pass_5")
+        )
+        booking_helper.create_bookings(self.game, [reserved], StatusChoices.RESERVED)
+        state = roster_events.get_roster_state(self.game.id)
+
+        def visible(user):
+            superuser, player_id = roster_events._viewer(user)
+            return {
+                row["player_id"]: row["status"]
+                for row in roster_events.visible_state(
+                    state, superuser, player_id
+                ).values()
+            }
+
+        self.assertEqual(visible(self.superuser).keys(), state.keys())
+        # the awaiting player stays hidden from the players of the planned table
+        self.assertNotIn(self.reksio.id, visible(self.user_1_per))
+        self.assertNotIn(reserved.id, visible(self.user_1_per))
+        # the reserve table shows the awaiting players, but not the other reserves
+        self.assertEqual(visible(reserved.user)[self.reksio.id], StatusChoices.AWAITING)
+        self.assertEqual(visible(reserved.user)[reserved.id], StatusChoices.RESERVED)
+        self.assertNotIn(reserved.id, visible(self.user_4_act))
+
+        # a confirmed substitute is listed next to the cancelled player
+        self.client.force_login(self.user_4_act)
+        self.client.post(self.url, {"player_id": self.reksio.id, "checked": "on"})
+        state = roster_events.get_roster_state(self.game.id)
+        self.assertEqual(
+            visible(self.user_1_per)[self.reksio.id], StatusChoices.CONFIRMED
+        )
+
+    def test_stamp_follows_booking_changes(self):
+        stamp = roster_events.get_roster_stamp(self.game.id)
+        self.assertEqual(roster_events.get_roster_stamp(self.game.id), stamp)
+
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.bolek, status=StatusChoices.CANCELLED
+        )
+        self.assertNotEqual(roster_events.get_roster_stamp(self.game.id), stamp)
+
+    @override_settings(ROSTER_EVENTS_POLL_INTERVAL=30, ROSTER_EVENTS_MAX_DURATION=60)
+    async def test_stream_sends_snapshot_then_published_diffs(self):
+        stream = roster_events.roster_event_stream(self.game.id, self.superuser)
+        try:
+            name, snapshot = await _next_event(stream, timeout=5)
+            self.assertEqual(name, "snapshot")
+            self.assertEqual(len(snapshot["changed"]), 4)
+
+            await sync_to_async(BookingHistoryForGame.objects.create)(
+                game=self.game, player=self.bolek, status=StatusChoices.CANCELLED
+            )
+            # committed changes are published by games.signals
+            roster_events.broker.publish(self.game.id)
+
+            # woken up by the broker long before the next poll
+            name, diff = await _next_event(stream, timeout=5)
+            self.assertEqual(name, "diff")
+            self.assertEqual(
+                [(row["player_id"], row["status"]) for row in diff["changed"]],
+                [(self.bolek.id, StatusChoices.CANCELLED)],
+            )
+        finally:
+            await stream.aclose()
+
+    @override_settings(ROSTER_EVENTS_POLL_INTERVAL=0.05, ROSTER_EVENTS_MAX_DURATION=60)
+    async def test_stream_polls_for_changes_of_other_processes(self):
+        stream = roster_events.roster_event_stream(self.game.id, self.superuser)
+        try:
+            await _next_event(stream, timeout=5)
+            await sync_to_async(BookingHistoryForGame.objects.create)(
+                game=self.game, player=self.reksio, status=StatusChoices.RESERVED
+            )
+
+            name, diff = await _next_event(stream, timeout=5)
+            self.assertEqual(name, "diff")
+            self.assertEqual(diff["changed"][0]["status"], StatusChoices.RESERVED)
+        finally:
+            await stream.aclose()
+
+    @override_settings(ROSTER_EVENTS_POLL_INTERVAL=0.05, ROSTER_EVENTS_MAX_DURATION=0.2)
+    async def test_events_endpoint(self):
+        await self.async_client.aforce_login(self.user_1_per)
+        response = await self.async_client.get(
+            reverse("game_roster_events_url", args=[self.game.id])
+        )
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(_parse_event(chunks[1].decode())[0], "snapshot")
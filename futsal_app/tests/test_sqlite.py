@@ -0,0 +1,34 @@
+from unittest import skipUnless
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, override_settings
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite tuning profile")
+class SQLiteTuningTests(SimpleTestCase):
+    databases = {"default"}
+
+    def _pragmas(self, *names: str) -> dict:
+        new_connection = connections.create_connection("default")
+        try:
+            with new_connection.cursor() as cursor:
+                values = {}
+                for name in names:
+                    cursor.execute(f"PRAGMA {name}")
+                    values[name] = cursor.fetchone()[0]
+                return values
+        finally:
+            new_connection.close()
+
+    @override_settings(SQLITE_TUNING=True)
+    def test_tuning_profile_is_applied_to_new_connections(self):
+        self.assertEqual(
+            self._pragmas("synchronous", "busy_timeout", "cache_size"),
+            # synchronous=NORMAL is 1
+            {"synchronous": 1, "busy_timeout": 5000, "cache_size": -20000},
+        )
+
+    @override_settings(SQLITE_TUNING=False)
+    def test_connections_are_untouched_by_default(self):
+        # synchronous=FULL is 2
+        self.assertEqual(self._pragmas("synchronous")["synchronous"], 2)
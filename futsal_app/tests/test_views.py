@@ -1,14 +1,27 @@
-from games.helpers import game_helper
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from games.helpers import conditional_helper, game_helper
+from games.helpers.booking_helper import create_bookings
 from games.helpers.game_helper import get_total_players_for_game
 from games.models import (
     BookingHistoryForGame,
     Game,
     Player,
+    PlayerRole,
+    PlayerStatus,
     StatusChoices,
 )
 
 from .base import BaseTestCase
 
+User = get_user_model()
+
 
 class AddGameViewTests(BaseTestCase):
 
@@ -168,3 +181,310 @@ class AddGameViewTests(BaseTestCase):
             len(game_helper.get_players_by_status([StatusChoices.CANCELLED], game)), 1
         )
         self.assertEqual(get_total_players_for_game(game), 3)
+
+    def _post_game(self, when: str):
+        response = self.client.post(
+            "/games/add_game",
+            {"when": when, "status": "Planned", "set_players": "on"},
+        )
+        self.assertEqual(response.status_code, 302)
+        return Game.objects.get(when=when)
+
+    def test_post_with_set_players_applies_absences_on_game_date(self):
+        bolek = Player.objects.get(user=self.user_1_per)
+        reksio = Player.objects.get(user=self.user_4_act)
+        inactive = Player.objects.create(
+            user=User.objects.create_user(username="inactive"),
+            role=PlayerRole.INACTIVE,
+        )
+        for player, status in [
+            (bolek, StatusChoices.RESTING),
+            (reksio, StatusChoices.RESTING),
+            (inactive, StatusChoices.RESERVED),
+        ]:
+            PlayerStatus.objects.create(
+                player=player,
+                date_start="2025-05-01",
+                date_end="2025-05-31",
+                status=status,
+            )
+        PlayerStatus.objects.create(
+            player=Player.objects.get(user=self.user_2_per),
+            date_start="2025-06-01",
+            date_end="2025-06-30",
+            status=StatusChoices.RESTING,
+        )
+
+        self.client.force_login(self.superuser)
+        game = self._post_game("2025-05-10")
+
+        roster = game_helper.get_roster(game)
+        self.assertEqual(roster.cancelled, [bolek])
+        self.assertEqual(
+            [player.user.username for player in roster.planned], ["lolek", "tola"]
+        )
+        self.assertEqual(roster.reserved, [reksio, inactive])
+        self.assertEqual(BookingHistoryForGame.objects.filter(game=game).count(), 7)
+
+    def test_add_game_query_count_does_not_grow_with_players_and_absences(self):
+        self.client.force_login(self.superuser)
+        with CaptureQueriesContext(connection) as few_players:
+            self._post_game("2025-05-10")
+
+        for idx in range(10):
+            player = Player.objects.create(
+                user=User.objects.create_user(username=f"extra_{idx}"),
+                role=PlayerRole.PERMANENT if idx % 2 else PlayerRole.ACTIVE,
+            )
+            PlayerStatus.objects.create(
+                player=player,
+                date_start="2025-05-01",
+                date_end="2025-05-31",
+                status=StatusChoices.RESTING,
+            )
+
+        with CaptureQueriesContext(connection) as many_players:
+            game = self._post_game("2025-05-17")
+
+        self.assertEqual(len(few_players), len(many_players))
+        self.assertEqual(len(game_helper.get_roster(game).cancelled), 5)
+
+
+class GameDetailsViewTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when="2025-04-04", description="roster game")
+        for player in Player.objects.filter(role=PlayerRole.PERMANENT):
+            BookingHistoryForGame.objects.create(
+                game=self.game, player=player, status=StatusChoices.PLANNED
+            )
+        self.reksio = Player.objects.get(user=self.user_4_act)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.reksio, status=StatusChoices.RESERVED
+        )
+
+    def _add_players(self, count: int):
+        for idx in range(count):
+            user = User.objects.create_user(username=f"extra_{idx}")
+            player = Player.objects.create(user=user, mobile_number="123456789")
+            for status in [StatusChoices.RESERVED, StatusChoices.AWAITING]:
+                BookingHistoryForGame.objects.create(
+                    game=self.game, player=player, status=status
+                )
+
+    def test_get_roster_splits_players_by_latest_status(self):
+        bolek = Player.objects.get(user=self.user_1_per)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=bolek, status=StatusChoices.CANCELLED
+        )
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.reksio, status=StatusChoices.CONFIRMED
+        )
+
+        with self.assertNumQueries(1):
+            roster = game_helper.get_roster(self.game)
+            usernames = [player.user.username for player in roster.planned]
+
+        self.assertEqual(usernames, ["lolek", "tola"])
+        self.assertEqual(roster.cancelled, [bolek])
+        self.assertEqual(roster.confirmed, [self.reksio])
+        self.assertEqual(roster.reserved, [])
+        self.assertEqual(roster.confirmed[0].latest_status, StatusChoices.CONFIRMED)
+
+    def test_game_details_query_count_does_not_grow_with_players(self):
+        self.client.force_login(self.superuser)
+        url = reverse("game_details_url", args=[self.game.id])
+
+        with CaptureQueriesContext(connection) as few_players:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self._add_players(10)
+        with CaptureQueriesContext(connection) as many_players:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["awaiting_players_for_game"]), 10)
+
+        self.assertEqual(len(few_players), len(many_players))
+        self.assertLessEqual(len(many_players), 8)
+
+
+class NextGamesViewTests(BaseTestCase):
+
+    def _create_games(self, count: int) -> list[Game]:
+        games = []
+        for idx in range(count):
+            game = Game.objects.create(when=date.today() + timedelta(days=7 * idx))
+            create_bookings(
+                game,
+                Player.objects.filter(role=PlayerRole.PERMANENT),
+                StatusChoices.PLANNED,
+            )
+            games.append(game)
+        return games
+
+    def test_next_games_query_count_does_not_grow_with_games(self):
+        self.client.force_login(self.user_1_per)
+        url = reverse("next_games_url")
+        self._create_games(1)
+
+        with CaptureQueriesContext(connection) as few_games:
+            response = self.client.get(url)
+
+        self._create_games(5)
+        with CaptureQueriesContext(connection) as many_games:
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.context["games"]), 6)
+        self.assertEqual(response.context["games"][0].number_of_booked_players, 3)
+        self.assertEqual(len(few_games), len(many_games))
+
+
+class BookingHistoryViewTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        players = list(Player.objects.all())
+        games = [Game.objects.create(when=f"2025-08-0{day}") for day in range(1, 6)]
+        self.bookings = BookingHistoryForGame.objects.bulk_record(
+            [
+                BookingHistoryForGame(game=game, player=player, status=status)
+                for game in games
+                for player in players
+                for status in [StatusChoices.RESERVED, StatusChoices.AWAITING]
+            ]
+        )
+        self.ids = sorted((booking.id for booking in self.bookings), reverse=True)
+        self.client.force_login(self.superuser)
+
+    def _get_page(self, **params):
+        response = self.client.get(
+            reverse("booking_history_url"), {"page_size": 10, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.context["booking_history"]
+
+    def test_cursor_pages_walk_the_history_newest_first(self):
+        page = self._get_page()
+        self.assertFalse(page.has_previous)
+        pages = [page]
+        while page.has_next:
+            page = self._get_page(before=page.next_cursor)
+            self.assertTrue(page.has_previous)
+            pages.append(page)
+
+        self.assertEqual(len(pages), 4)
+        self.assertEqual([record.id for page in pages for record in page], self.ids)
+
+        back = self._get_page(after=pages[-1].previous_cursor)
+        self.assertEqual([record.id for record in back], self.ids[20:30])
+        self.assertTrue(back.has_next)
+
+        back_to_first = self._get_page(after=pages[1].previous_cursor)
+        self.assertEqual([record.id for record in back_to_first], self.ids[:10])
+        self.assertFalse(back_to_first.has_previous)
+
+    def test_cursor_page_query_count_does_not_depend_on_depth(self):
+        self._get_page()  # fills the cached total
+        with CaptureQueriesContext(connection) as first_page:
+            self._get_page()
+        with CaptureQueriesContext(connection) as deep_page:
+            self._get_page(before=self.ids[19])
+
+        self.assertEqual(len(first_page), len(deep_page))
+        # the total is cached, deep pages don't count the rows again
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in deep_page.captured_queries)
+        )
+
+    @override_settings(BOOKING_HISTORY_PAGINATION="offset")
+    def test_offset_pagination_mode(self):
+        page = self._get_page(page=2)
+        self.assertEqual([record.id for record in page], self.ids[10:20])
+        self.assertEqual(page.paginator.num_pages, 4)
+
+
+class ConditionalGetTests(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(when=date.today() + timedelta(days=1))
+        create_bookings(
+            self.game,
+            Player.objects.filter(role=PlayerRole.PERMANENT),
+            StatusChoices.PLANNED,
+        )
+        self.bolek = Player.objects.get(user=self.user_1_per)
+        self.url = reverse("game_details_url", args=[self.game.id])
+        self.client.force_login(self.user_1_per)
+        # the first page sets the CSRF cookie, which is part of the ETag
+        self.client.get(self.url)
+
+    def _revalidate(self, url: str, response):
+        return self.client.get(
+            url,
+            headers={
+                "if-none-match": response["ETag"],
+                "if-modified-since": response["Last-Modified"],
+            },
+        )
+
+    def test_unchanged_game_details_returns_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as revalidation:
+            second = self._revalidate(self.url, first)
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        # session, user and the game's modification times
+        self.assertLessEqual(len(revalidation), 3)
+
+    def test_booking_and_game_changes_invalidate_game_details(self):
+        first = self.client.get(self.url)
+        BookingHistoryForGame.objects.create(
+            game=self.game, player=self.bolek, status=StatusChoices.CANCELLED
+        )
+        second = self._revalidate(self.url, first)
+        self.assertEqual(second.status_code, 200)
+
+        self.game.description = "moved to the big hall"
+        self.game.save()
+        third = self._revalidate(self.url, second)
+        self.assertEqual(third.status_code, 200)
+        self.assertContains(third, "moved to the big hall")
+
+    def test_etag_varies_per_user(self):
+        etags = []
+        for user in [self.user_1_per, self.user_4_act]:
+            request = RequestFactory().get(self.url)
+            request.user = user
+            request.META["CSRF_COOKIE"] = "same-cookie"
+            etags.append(conditional_helper.game_details_etag(request, self.game.id))
+
+        self.assertNotEqual(etags[0], etags[1])
+
+    def test_pending_messages_are_always_rendered(self):
+        first = self.client.get(self.url)
+        reksio = Player.objects.get(user=self.user_4_act)
+        self.client.post(
+            reverse("game_player_status_update_url", args=[self.game.id]),
+            {"player_id": reksio.id, "checked": "on"},
+        )
+        second = self._revalidate(self.url, first)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, "You can only change your own status.")
+
+    def test_next_games_not_modified_until_a_game_is_added(self):
+        url = reverse("next_games_url")
+        first = self.client.get(url)
+        self.assertEqual(self._revalidate(url, first).status_code, 304)
+
+        Game.objects.create(when=date.today() + timedelta(days=8))
+        second = self._revalidate(url, first)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.context["games"]), 2)
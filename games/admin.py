@@ -1,14 +1,48 @@
 from django.contrib import admin
 
-from .models import BookingHistoryForGame, Game
+from .models import (
+    BOOKING_COUNTER_FIELDS,
+    BookingHistoryArchive,
+    BookingHistoryForGame,
+    Game,
+    OutboundEmail,
+    PlayerSeasonStats,
+)
 
 
 class GameAdmin(admin.ModelAdmin):
     list_filter = ("status",)
     list_display = ("when", "status", "description")
     date_hierarchy = "when"
+    # kept up to date by the bookings, see Game.save
+    readonly_fields = tuple(BOOKING_COUNTER_FIELDS.values())
+
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_filter = ("status",)
+    list_display = ("subject", "to", "status", "attempts", "next_attempt_at", "sent_at")
+
+
+class BookingHistoryArchiveAdmin(admin.ModelAdmin):
+    list_display = ("game", "row_count", "archived_at")
+    exclude = ("data",)
+
+
+class PlayerSeasonStatsAdmin(admin.ModelAdmin):
+    list_filter = ("season",)
+    list_display = (
+        "player",
+        "season",
+        "games_played",
+        "games_cancelled",
+        "late_cancellations",
+        "promotions",
+    )
 
 
 # Register your models here.
 admin.site.register(Game, GameAdmin)
 admin.site.register(BookingHistoryForGame)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+admin.site.register(BookingHistoryArchive, BookingHistoryArchiveAdmin)
+admin.site.register(PlayerSeasonStats, PlayerSeasonStatsAdmin)
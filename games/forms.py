@@ -56,3 +56,15 @@ class PlayerProfileForm(forms.ModelForm):
         player.save()
 
         return player
+
+
+class BookingHistoryExportForm(forms.Form):
+    """Filters of the booking history export, all optional."""
+
+    format = forms.ChoiceField(
+        choices=[("csv", "CSV"), ("json", "JSON")], required=False
+    )
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    game = forms.IntegerField(required=False, min_value=1)
+    player = forms.IntegerField(required=False, min_value=1)
@@ -0,0 +1,268 @@
+import time
+from datetime import date
+from typing import Callable, Iterable
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from games.mailer import send_player_status_update_notifications
+from games.models import (
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    Player,
+    PlayerRole,
+    PlayerStatus,
+    StatusChoices,
+)
+
+from . import game_helper, player_helper
+
+# SQLite reports lock conflicts instead of waiting for them in some setups
+# (shared cache, exceeded busy timeout), such transactions are retried
+SQLITE_LOCK_RETRIES = 50
+SQLITE_LOCK_RETRY_DELAY = 0.02  # seconds
+
+
+def get_status_for_absence(current_status: str | None, absence_status: str) -> str:
+    """
+    Status of a player in a game after an absence (PlayerStatus) is applied.
+    A resting player keeps their place in the queue: planned players become
+    cancelled and confirmed players go back to the reserve list.
+    """
+    if absence_status != StatusChoices.RESTING or current_status is None:
+        return absence_status
+    if current_status in [StatusChoices.PLANNED, StatusChoices.CANCELLED]:
+        return StatusChoices.CANCELLED
+    if current_status in [StatusChoices.CONFIRMED, StatusChoices.RESERVED]:
+        return StatusChoices.RESERVED
+    return absence_status
+
+
+def create_bookings(
+    game: Game, players: Iterable[Player], status: str
+) -> list[BookingHistoryForGame]:
+    return BookingHistoryForGame.objects.bulk_record(
+        [
+            BookingHistoryForGame(game=game, player=player, status=status)
+            for player in players
+        ]
+    )
+
+
+def seed_game_roster(game: Game) -> list[BookingHistoryForGame]:
+    """
+    Books permanent players as planned and active players as reserved,
+    then applies absences covering the game date. Runs a constant number
+    of queries regardless of the number of players or absences.
+    """
+    game_date = game.when.date() if hasattr(game.when, "date") else game.when
+    initial_status = {
+        PlayerRole.PERMANENT: StatusChoices.PLANNED,
+        PlayerRole.ACTIVE: StatusChoices.RESERVED,
+    }
+
+    with transaction.atomic():
+        bookings = []
+        current_status = {}
+        players = Player.objects.filter(role__in=initial_status.keys()).order_by("id")
+        # permanent players first, like they were always booked
+        for role in [PlayerRole.PERMANENT, PlayerRole.ACTIVE]:
+            for player in players:
+                if player.role == role:
+                    bookings.append(
+                        BookingHistoryForGame(
+                            game=game, player=player, status=initial_status[role]
+                        )
+                    )
+                    current_status[player.id] = initial_status[role]
+
+        for absence in _get_absences_on(game_date):
+            new_status = get_status_for_absence(
+                current_status.get(absence.player_id), absence.status
+            )
+            bookings.append(
+                BookingHistoryForGame(
+                    game=game, player_id=absence.player_id, status=new_status
+                )
+            )
+            current_status[absence.player_id] = new_status
+
+        return BookingHistoryForGame.objects.bulk_record(bookings)
+
+
+def _add_absence(
+    player: Player, date_start: date, date_end: date, status: str, description
+) -> PlayerStatus:
+    absence = PlayerStatus.objects.create(
+        player=player,
+        date_start=date_start,
+        date_end=date_end,
+        status=status,
+        description=description,
+    )
+    games = Game.objects.filter(when__gte=date_start, when__lte=date_end)
+    if connection.features.has_select_for_update:
+        # locked in id order, so overlapping absences can't deadlock
+        games = games.select_for_update()
+    # on SQLite the absence insert above already holds the database write lock
+    game_ids = list(games.order_by("id").values_list("id", flat=True))
+    current_status = dict(
+        CurrentBookingForGame.objects.filter(
+            player=player, game_id__in=game_ids
+        ).values_list("game_id", "status")
+    )
+    BookingHistoryForGame.objects.bulk_record(
+        [
+            BookingHistoryForGame(
+                game_id=game_id,
+                player=player,
+                status=get_status_for_absence(current_status.get(game_id), status),
+            )
+            for game_id in game_ids
+        ]
+    )
+    return absence
+
+
+def add_absence(
+    player: Player, date_start: date, date_end: date, status: str, description=""
+) -> PlayerStatus:
+    """
+    Records the absence and books its status for every game in the date range
+    as one atomic operation: the affected games are locked like in
+    change_player_status, their current statuses are read in one query and
+    the new history rows are inserted in bulk.
+    """
+    return _run_serialized(
+        _add_absence, player, date_start, date_end, status, description
+    )
+
+
+def _get_absences_on(day: date):
+    return PlayerStatus.objects.on(day).order_by("date_start", "id")
+
+
+def _check_if_empty_slots(game: Game) -> str:
+    # function to determine if there are empty slots
+    game.refresh_from_db(
+        fields=["cancelled_count", "confirmed_count", "awaiting_count"]
+    )
+
+    if game.cancelled_count > game.confirmed_count:
+        return StatusChoices.CONFIRMED
+
+    return StatusChoices.AWAITING
+
+
+def get_next_status(
+    current_status: str | None, checked: bool, has_free_slot: Callable[[], bool]
+) -> str:
+    """
+    Status of a player after clicking their checkbox. has_free_slot is asked
+    only when an awaiting player wants to play: a slot is free when more
+    players cancelled than were confirmed in their place.
+    """
+    status_handler = {
+        (StatusChoices.PLANNED, False): lambda: StatusChoices.CANCELLED,
+        (StatusChoices.CANCELLED, True): lambda: StatusChoices.PLANNED,
+        (StatusChoices.RESERVED, True): lambda: StatusChoices.AWAITING,
+        (StatusChoices.AWAITING, True): lambda: (
+            StatusChoices.CONFIRMED if has_free_slot() else StatusChoices.AWAITING
+        ),
+        (StatusChoices.AWAITING, False): lambda: StatusChoices.RESERVED,
+        (StatusChoices.CONFIRMED, False): lambda: StatusChoices.RESERVED,
+        (StatusChoices.PLANNED, True): lambda: StatusChoices.PLANNED,
+    }
+    try:
+        return status_handler[(current_status, checked)]()
+    except KeyError:
+        raise ValueError(f"No handler for status={current_status}, checked={checked}")
+
+
+def apply_status_change_logic(current_status: str | None, checked: bool, game: Game):
+    return get_next_status(
+        current_status,
+        checked,
+        lambda: _check_if_empty_slots(game) == StatusChoices.CONFIRMED,
+    )
+
+
+def _lock_game(game_id: int) -> Game:
+    """
+    Locks the game row until the end of the transaction, so that status changes
+    of one game are applied one after another.
+    """
+    if connection.features.has_select_for_update:
+        return Game.objects.select_for_update().get(pk=game_id)
+    # SQLite has no row locks, but the first write takes the database write lock
+    Game.objects.filter(pk=game_id).update(when=F("when"))
+    return Game.objects.get(pk=game_id)
+
+
+def _run_serialized(func: Callable, *args):
+    """Runs func in a transaction, retrying it when SQLite reports a lock conflict."""
+    retries = SQLITE_LOCK_RETRIES
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        retries = 0
+    for attempt in range(retries + 1):
+        try:
+            with transaction.atomic():
+                return func(*args)
+        except OperationalError as e:
+            if attempt == retries or "locked" not in str(e):
+                raise
+            time.sleep(SQLITE_LOCK_RETRY_DELAY * (attempt + 1))
+
+
+def _apply_transition_from_awaiting_to_confirmed(
+    game: Game,
+) -> BookingHistoryForGame | None:
+    if StatusChoices.CONFIRMED == _check_if_empty_slots(game) and game.awaiting_count:
+        awaiting_players = game_helper.get_players_by_status(
+            [StatusChoices.AWAITING], game, order_by="latest_creation_date"
+        )
+        return BookingHistoryForGame.objects.create(
+            player=awaiting_players[0],
+            game=game,
+            status=StatusChoices.CONFIRMED,
+        )
+    return None
+
+
+def _change_player_status(
+    game_id: int, player: Player, checked: bool
+) -> list[BookingHistoryForGame]:
+    game = _lock_game(game_id)
+    changes = []
+
+    current_booking = player_helper.get_latest_booking_for_game(player, game)
+    current_status = current_booking.status if current_booking else None
+    new_status = apply_status_change_logic(current_status, checked, game)
+    if current_status != new_status:
+        changes.append(
+            BookingHistoryForGame.objects.create(
+                player=player, game=game, status=new_status
+            )
+        )
+
+    promoted = _apply_transition_from_awaiting_to_confirmed(game)
+    if promoted:
+        changes.append(promoted)
+    return changes
+
+
+def change_player_status(
+    game: Game, player: Player, checked: bool
+) -> list[BookingHistoryForGame]:
+    """
+    Applies a player's checkbox click to the game and promotes the first awaiting
+    player when a slot is free. Status changes of one game are serialized
+    (the game row is locked), so concurrent clicks can't fill the same free slot
+    twice. Returns the created history rows; the affected players are notified
+    after the transaction is committed.
+    """
+    changes = _run_serialized(_change_player_status, game.id, player, checked)
+    for booking in changes:
+        send_player_status_update_notifications(booking.player, game, booking.status)
+    return changes
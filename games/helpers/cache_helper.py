@@ -0,0 +1,154 @@
+"""
+Cached roster and tile data of games.
+
+Every game has a version number in the cache, which is bumped by the signal
+handlers in games/signals.py whenever the game, its bookings or the absences
+covering it change. Cached data is keyed by the version, so a bump makes all
+the previous entries of the game unreachable (they expire on their own).
+"""
+
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from games.models import Game
+
+from . import game_helper
+
+STATS_KEYS = {"hits": "cache_stats:hits", "misses": "cache_stats:misses"}
+
+PROCESS_LOCAL_WARNING = (
+    "The cache is local to each process (CACHE_BACKEND=locmem): running workers "
+    "keep serving their cached rosters and game tiles until GAME_CACHE_TIMEOUT "
+    "expires or they are restarted."
+)
+
+
+def _timeout() -> int:
+    return getattr(settings, "GAME_CACHE_TIMEOUT", 3600)
+
+
+def is_process_local() -> bool:
+    """Whether versions bumped here go unnoticed by the other processes."""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def _bump(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # a fresh version must not collide with one that was evicted
+        cache.set(key, time.time_ns(), None)
+
+
+def _get_version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _game_version_key(game_id: int) -> str:
+    return f"game:{game_id}:version"
+
+
+def bump_game_version(*game_ids: int):
+    for game_id in game_ids:
+        _bump(_game_version_key(game_id))
+
+
+def bump_schedule_version():
+    """The list of games (dates, added or removed games) has changed."""
+    _bump("games:schedule:version")
+
+
+def bump_players_version():
+    """Player names shown in the rosters have changed."""
+    _bump("games:players:version")
+
+
+def get_players_version() -> int:
+    return _get_version("games:players:version")
+
+
+def _record(hit: bool):
+    key = STATS_KEYS["hits" if hit else "misses"]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_cache_stats() -> dict[str, int]:
+    values = cache.get_many(STATS_KEYS.values())
+    return {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def reset_cache_stats():
+    cache.delete_many(STATS_KEYS.values())
+
+
+def get_roster(game: Game) -> game_helper.Roster:
+    """game_helper.get_roster, cached until the game's version is bumped."""
+    key = (
+        f"game:{game.id}:v{_get_version(_game_version_key(game.id))}"
+        f":p{get_players_version()}:roster"
+    )
+    roster = cache.get(key)
+    _record(roster is not None)
+    if roster is None:
+        roster = game_helper.get_roster(game)
+        cache.set(key, roster, _timeout())
+    return roster
+
+
+def get_games(game_ids: list[int]) -> list[Game]:
+    """Games (with their booking counters) for tiles, in the order of game_ids."""
+    version_keys = {game_id: _game_version_key(game_id) for game_id in game_ids}
+    versions = cache.get_many(version_keys.values())
+    tile_keys = {}
+    for game_id, version_key in version_keys.items():
+        version = versions.get(version_key) or _get_version(version_key)
+        tile_keys[game_id] = f"game:{game_id}:v{version}:tile"
+
+    tiles = cache.get_many(tile_keys.values())
+    games = {game_id: tiles[key] for game_id, key in tile_keys.items() if key in tiles}
+    missing = [game_id for game_id in game_ids if game_id not in games]
+    for game_id in game_ids:
+        _record(game_id not in missing)
+    if missing:
+        found = Game.objects.in_bulk(missing)
+        cache.set_many(
+            {tile_keys[game_id]: game for game_id, game in found.items()}, _timeout()
+        )
+        games.update(found)
+    return [games[game_id] for game_id in game_ids if game_id in games]
+
+
+def get_upcoming_game_ids(today: date) -> list[int]:
+    """Ids of games from today on which are not played yet, by date."""
+    key = f"games:v{_get_version('games:schedule:version')}:upcoming:{today}"
+    game_ids = cache.get(key)
+    _record(game_ids is not None)
+    if game_ids is None:
+        game_ids = list(
+            game_helper.get_upcoming_games(today).values_list("id", flat=True)
+        )
+        cache.set(key, game_ids, _timeout())
+    return game_ids
+
+
+def get_past_game_ids(today: date) -> list[int]:
+    """Ids of games before today or played, latest first."""
+    key = f"games:v{_get_version('games:schedule:version')}:past:{today}"
+    game_ids = cache.get(key)
+    _record(game_ids is not None)
+    if game_ids is None:
+        game_ids = list(game_helper.get_past_games(today).values_list("id", flat=True))
+        cache.set(key, game_ids, _timeout())
+    return game_ids
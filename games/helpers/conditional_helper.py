@@ -0,0 +1,110 @@
+"""
+ETag and Last-Modified of the game pages, used with django.views.decorators.http.condition.
+
+Both are derived from the game's updated_at and the creation date of its newest
+booking history entry, read in one query. The ETag also depends on the user
+(the reserved table and the admin actions differ per user), the CSRF cookie
+(the forms in a reused page must still be accepted) and the day (past and next
+games are split by today). Pages with pending flash messages are always
+rendered, so the messages are shown.
+"""
+
+import hashlib
+from datetime import datetime
+
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.http import HttpRequest
+from django.utils import timezone
+
+from games.models import Game
+
+from . import cache_helper, game_helper
+
+
+def _has_pending_messages(request: HttpRequest) -> bool:
+    return len(messages.get_messages(request)) > 0
+
+
+def _latest(*timestamps: datetime | None) -> datetime | None:
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def _game_details_state(request: HttpRequest, game_id: int) -> dict | None:
+    if not hasattr(request, "_game_details_state"):
+        request._game_details_state = (
+            Game.objects.filter(id=game_id)
+            .annotate(latest_booking=Max("bookinghistoryforgame__creation_date"))
+            .values("updated_at", "latest_booking")
+            .first()
+        )
+    return request._game_details_state
+
+
+def _next_games_state(request: HttpRequest) -> dict:
+    if not hasattr(request, "_next_games_state"):
+        request._next_games_state = game_helper.get_upcoming_games(
+            timezone.localdate()
+        ).aggregate(
+            games=Count("id", distinct=True),
+            last_game=Max("id"),
+            updated_at=Max("updated_at"),
+            latest_booking=Max("bookinghistoryforgame__creation_date"),
+        )
+    return request._next_games_state
+
+
+def _etag(request: HttpRequest, *parts) -> str:
+    parts += (
+        request.user.pk,
+        request.user.is_superuser,
+        request.META.get("CSRF_COOKIE"),
+        timezone.localdate(),
+        cache_helper.get_players_version(),
+    )
+    return hashlib.md5(
+        "|".join(str(part) for part in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+def game_details_last_modified(request: HttpRequest, game_id: int) -> datetime | None:
+    state = _game_details_state(request, game_id)
+    if state is None or _has_pending_messages(request):
+        return None
+    return _latest(state["updated_at"], state["latest_booking"])
+
+
+def game_details_etag(request: HttpRequest, game_id: int) -> str | None:
+    state = _game_details_state(request, game_id)
+    if state is None or _has_pending_messages(request):
+        return None
+    return _etag(
+        request,
+        "game_details",
+        game_id,
+        state["updated_at"],
+        state["latest_booking"],
+        request.GET.urlencode(),
+    )
+
+
+def next_games_last_modified(request: HttpRequest) -> datetime | None:
+    if _has_pending_messages(request):
+        return None
+    state = _next_games_state(request)
+    return _latest(state["updated_at"], state["latest_booking"])
+
+
+def next_games_etag(request: HttpRequest) -> str | None:
+    if _has_pending_messages(request):
+        return None
+    state = _next_games_state(request)
+    return _etag(
+        request,
+        "next_games",
+        state["games"],
+        state["last_game"],
+        state["updated_at"],
+        state["latest_booking"],
+    )
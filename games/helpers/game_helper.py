@@ -1,13 +1,68 @@
-from django.db.models import Max, OuterRef, Subquery
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db.models import F, Q, QuerySet
 
 from games.models import (
-    BookingHistoryForGame,
+    CurrentBookingForGame,
     Game,
+    GameStatus,
     Player,
     StatusChoices,
 )
 
 
+@dataclass
+class Roster:
+    """Players of a game split by their latest booking status."""
+
+    planned: list[Player] = field(default_factory=list)
+    cancelled: list[Player] = field(default_factory=list)
+    confirmed: list[Player] = field(default_factory=list)
+    reserved: list[Player] = field(default_factory=list)
+    awaiting: list[Player] = field(default_factory=list)
+    resting: list[Player] = field(default_factory=list)
+
+    def by_status(self, status: str) -> list[Player]:
+        return getattr(self, StatusChoices(status).value)
+
+
+def get_roster(game: Game) -> Roster:
+    """
+    Loads every player of the game with their latest status, latest creation date
+    and user in a single query. Players in each bucket are ordered by the
+    creation date of their latest booking history entry.
+    """
+    roster = Roster()
+    current_bookings = (
+        CurrentBookingForGame.objects.filter(game=game)
+        .select_related("player__user")
+        .order_by("creation_date", "id")
+    )
+    for current in current_bookings:
+        player = current.player
+        player.latest_status = current.status
+        player.latest_creation_date = current.creation_date
+        roster.by_status(current.status).append(player)
+    return roster
+
+
+def get_upcoming_games(today: date) -> QuerySet[Game]:
+    """Games from today on which are not played yet, by date."""
+    return (
+        Game.objects.filter(when__gte=today)
+        .exclude(status=GameStatus.PLAYED)
+        .order_by("when")
+    )
+
+
+def get_past_games(today: date) -> QuerySet[Game]:
+    """Games before today or already played, latest first."""
+    return Game.objects.filter(
+        Q(when__lt=today) | Q(status=GameStatus.PLAYED)
+    ).order_by("-when")
+
+
 def get_players_by_status(
     statuses: list[str], game: Game, order_by="latest_creation_date"
 ) -> list[Player]:
@@ -16,22 +71,14 @@ def get_players_by_status(
     ordered by the creation date of their latest booking history entry.
     """
 
-    latest_history_sq = BookingHistoryForGame.objects.filter(
-        player=OuterRef("pk"), game=game
-    ).order_by(
-        "-creation_date"
-    )  # always choose latest by creation_date
-
     players = (
-        Player.objects.filter(status_history__game=game)
+        Player.objects.filter(
+            current_bookings__game=game, current_bookings__status__in=statuses
+        )
         .annotate(
-            latest_status=Subquery(latest_history_sq.values("status")[:1]),
-            latest_creation_date=Subquery(
-                latest_history_sq.values("creation_date")[:1]
-            ),
+            latest_status=F("current_bookings__status"),
+            latest_creation_date=F("current_bookings__creation_date"),
         )
-        .filter(latest_status__in=statuses)
-        .distinct()
         .order_by(order_by)  # e.g. "-latest_creation_date"
     )
 
@@ -39,38 +86,10 @@ def get_players_by_status(
 
 
 # @todo refactor status strings into constants somewhere central
-# #todo try to simplify the queries below
 def get_total_players_for_game(game: Game) -> int:
     """
     Returns the total number of players booked for a given game.
     """
-    latest_status_sq = (
-        BookingHistoryForGame.objects.filter(player=OuterRef("pk"), game=game)
-        .order_by("-creation_date")
-        .values("status")[:1]
-    )
-
-    return (
-        Player.objects.filter(status_history__game=game)
-        .annotate(latest_status=Subquery(latest_status_sq))
-        .filter(latest_status__in=[StatusChoices.CONFIRMED, StatusChoices.PLANNED])
-        .distinct()
-        .count()
-    )
-
-
-def get_number_of_booked_players(game):
-    """Number of players with resent status PLANNED/CONFIRMED"""
-    latest_bookings = (
-        BookingHistoryForGame.objects.filter(game=game)
-        .values("player")
-        .annotate(latest_date=Max("creation_date"))
-        .values_list("latest_date", flat=True)
-    )
-
-    booked_count = BookingHistoryForGame.objects.filter(
-        game=game,
-        status__in=[StatusChoices.PLANNED, StatusChoices.CONFIRMED],
-        creation_date__in=latest_bookings,
+    return CurrentBookingForGame.objects.filter(
+        game=game, status__in=[StatusChoices.CONFIRMED, StatusChoices.PLANNED]
     ).count()
-    return booked_count
@@ -0,0 +1,104 @@
+"""
+Streaming export of BookingHistoryForGame as CSV or JSON.
+
+Rows are read with QuerySet.iterator(chunk_size) (a server-side cursor on
+PostgreSQL) and written one by one, so the memory used doesn't depend on the
+number of exported rows.
+"""
+
+import csv
+import json
+from datetime import date
+from typing import Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from games.models import BookingHistoryForGame
+
+from . import player_helper
+from .player_csv_helper import Echo
+
+EXPORT_FIELDS = [
+    "id",
+    "game_id",
+    "game_date",
+    "game_status",
+    "player_id",
+    "username",
+    "player",
+    "status",
+    "creation_date",
+]
+EXPORT_FORMATS = ["csv", "json"]
+
+
+def get_booking_history(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    game_id: int | None = None,
+    player_id: int | None = None,
+) -> QuerySet[BookingHistoryForGame]:
+    """History rows of the games played between date_from and date_to, oldest first."""
+    history = BookingHistoryForGame.objects.select_related(
+        "game", "player__user"
+    ).order_by("id")
+    if date_from:
+        history = history.filter(game__when__gte=date_from)
+    if date_to:
+        history = history.filter(game__when__lte=date_to)
+    if game_id:
+        history = history.filter(game_id=game_id)
+    if player_id:
+        history = history.filter(player_id=player_id)
+    return history
+
+
+def _rows(history: QuerySet[BookingHistoryForGame], chunk_size: int) -> Iterator[list]:
+    for booking in history.iterator(chunk_size=chunk_size):
+        yield [
+            booking.id,
+            booking.game_id,
+            booking.game.when,
+            booking.game.status,
+            booking.player_id,
+            booking.player.user.username if booking.player.user else "",
+            player_helper.get_display_name(booking.player),
+            booking.status,
+            booking.creation_date,
+        ]
+
+
+def export_csv(
+    history: QuerySet[BookingHistoryForGame], chunk_size=2000
+) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _rows(history, chunk_size):
+        yield writer.writerow(
+            [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in row
+            ]
+        )
+
+
+def export_json(
+    history: QuerySet[BookingHistoryForGame], chunk_size=2000
+) -> Iterator[str]:
+    """A JSON array of objects, one line per row."""
+    separator = "[\n"
+    for row in _rows(history, chunk_size):
+        yield separator + json.dumps(
+            dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder
+        )
+        separator = ",\n"
+    yield "\n]\n" if separator == ",\n" else "[]\n"
+
+
+def export(
+    history: QuerySet[BookingHistoryForGame], export_format: str, chunk_size=2000
+) -> Iterator[str]:
+    if export_format == "json":
+        return export_json(history, chunk_size)
+    return export_csv(history, chunk_size)
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+
+
+class CursorPage:
+    """
+    One page of a queryset ordered by descending id, selected with
+    `id < before` / `id > after` instead of OFFSET, so the cost of a page
+    doesn't depend on how deep it is and no COUNT(*) is needed.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        page_size: int,
+        before: int | None = None,
+        after: int | None = None,
+    ):
+        if after is not None:
+            rows = list(queryset.filter(id__gt=after).order_by("id")[: page_size + 1])
+            self.has_previous = len(rows) > page_size
+            self.has_next = True
+            rows = rows[:page_size][::-1]
+        else:
+            if before is not None:
+                queryset = queryset.filter(id__lt=before)
+            rows = list(queryset.order_by("-id")[: page_size + 1])
+            self.has_previous = before is not None
+            self.has_next = len(rows) > page_size
+            rows = rows[:page_size]
+        self.object_list = rows
+
+    @property
+    def next_cursor(self) -> int | None:
+        return self.object_list[-1].id if self.object_list else None
+
+    @property
+    def previous_cursor(self) -> int | None:
+        return self.object_list[0].id if self.object_list else None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def parse_cursor(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_approximate_count(queryset: QuerySet) -> int:
+    """
+    Number of rows of an unfiltered queryset: the planner estimate on PostgreSQL,
+    otherwise COUNT(*) cached for settings.APPROXIMATE_COUNT_CACHE_TIMEOUT seconds.
+    """
+    table = queryset.model._meta.db_table
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+            row = cursor.fetchone()
+        # -1 until the table is analyzed for the first time
+        if row and row[0] >= 0:
+            return row[0]
+    return cache.get_or_set(
+        f"approximate_count:{table}",
+        queryset.count,
+        getattr(settings, "APPROXIMATE_COUNT_CACHE_TIMEOUT", 300),
+    )
@@ -0,0 +1,87 @@
+"""
+Per-request performance metrics, collected by games.middleware.PerformanceMiddleware.
+
+Code measures itself with measure(name) (or the timed(name) decorator); the
+durations are added to the metrics of the request being handled, outside of
+a measured request nothing is recorded. Nested measurements of the same name
+(e.g. an included template) are counted once, by the outermost one.
+"""
+
+import contextvars
+import functools
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.template.base import Template
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.durations = Counter()  # seconds
+        self.counts = Counter()
+        self._running = Counter()
+
+    @contextmanager
+    def measure(self, name: str):
+        outermost = not self._running[name]
+        self._running[name] += 1
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._running[name] -= 1
+            if outermost:
+                self.durations[name] += time.perf_counter() - began
+                self.counts[name] += 1
+
+
+_current_metrics = contextvars.ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def collect():
+    """Collects the measurements made within the block into new RequestMetrics."""
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def measure(name: str):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+    else:
+        with metrics.measure(name):
+            yield
+
+
+def timed(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def sql_execute_wrapper(execute, sql, params, many, context):
+    """For connection.execute_wrapper(), measures every query as "sql"."""
+    with measure("sql"):
+        return execute(sql, params, many, context)
+
+
+def install_template_timing():
+    """Measures the rendering of Django templates as "template", installed once."""
+    if getattr(Template.render, "measured", False):
+        return
+    render = timed("template")(Template.render)
+    render.measured = True
+    Template.render = render
@@ -0,0 +1,161 @@
+"""
+Bulk import and streaming export of players as CSV, one row per player with
+the PlayerProfileForm fields.
+
+An import validates every row before anything is written: the fields with
+PlayerProfileForm, the uniqueness of usernames and e-mails against the file
+and (one query per batch of rows) against the database. Only a file without
+errors is imported, with one bulk insert of users and one of players.
+"""
+
+import csv
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from games.forms import PlayerProfileForm
+from games.models import Player
+
+from . import cache_helper
+
+User = get_user_model()
+
+CSV_FIELDS = ["username", "first_name", "last_name", "email", "mobile_number", "role"]
+
+
+@dataclass
+class PlayerImport:
+    """Result of an import: the created players or the errors per CSV line."""
+
+    players: list[Player] = field(default_factory=list)
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    rows: int = 0
+
+
+def _validate_batch(batch: list[tuple[int, dict]], result: PlayerImport):
+    """Adds the errors of usernames and e-mails taken in the database."""
+    usernames = {row["username"] for _, row in batch}
+    emails = {row["email"].lower() for _, row in batch}
+    taken_usernames = set(
+        User.objects.filter(username__in=usernames).values_list("username", flat=True)
+    )
+    # e-mails are compared case-insensitively, also on case-sensitive databases
+    taken_emails = set(
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(email_lower__in=emails)
+        .values_list("email_lower", flat=True)
+    )
+    for line, row in batch:
+        if row["username"] in taken_usernames:
+            result.errors.append((line, f"username {row['username']} already exists"))
+        if row["email"].lower() in taken_emails:
+            result.errors.append((line, f"email {row['email']} is already taken"))
+
+
+def import_players(lines: Iterable[str], batch_size=500) -> PlayerImport:
+    """
+    Imports players from CSV lines (a header with CSV_FIELDS first), streamed:
+    only the validated rows are kept in memory.
+    """
+    result = PlayerImport()
+    reader = csv.DictReader(lines)
+    missing = set(CSV_FIELDS) - set(reader.fieldnames or [])
+    if missing:
+        result.errors.append((1, f"missing columns: {', '.join(sorted(missing))}"))
+        return result
+
+    valid_rows = []
+    batch = []
+    seen_usernames, seen_emails = set(), set()
+    for row in reader:
+        result.rows += 1
+        line = reader.line_num
+        form = PlayerProfileForm(
+            {name: (row.get(name) or "").strip() for name in CSV_FIELDS}
+        )
+        if not form.is_valid():
+            result.errors.extend(
+                (line, f"{name}: {error}")
+                for name, errors in form.errors.items()
+                for error in errors
+            )
+            continue
+        data = form.cleaned_data
+        data["username"] = User.normalize_username(data["username"])
+        data["email"] = User.objects.normalize_email(data["email"])
+        if data["username"] in seen_usernames:
+            result.errors.append((line, f"username {data['username']} is repeated"))
+        if data["email"].lower() in seen_emails:
+            result.errors.append((line, f"email {data['email']} is repeated"))
+        seen_usernames.add(data["username"])
+        seen_emails.add(data["email"].lower())
+
+        batch.append((line, data))
+        if len(batch) >= batch_size:
+            _validate_batch(batch, result)
+            valid_rows.extend(batch)
+            batch = []
+    if batch:
+        _validate_batch(batch, result)
+        valid_rows.extend(batch)
+
+    if result.errors:
+        result.errors.sort()
+        return result
+
+    users = []
+    for _, data in valid_rows:
+        user = User(
+            username=data["username"],
+            first_name=data["first_name"],
+            last_name=data["last_name"],
+            email=data["email"],
+        )
+        user.set_unusable_password()
+        users.append(user)
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+        result.players = Player.objects.bulk_create(
+            [
+                Player(
+                    user=user,
+                    mobile_number=data["mobile_number"],
+                    role=data["role"],
+                )
+                for user, (_, data) in zip(users, valid_rows)
+            ],
+            batch_size=batch_size,
+        )
+    # bulk_create sends no post_save, see signals.player_changed
+    cache_helper.bump_players_version()
+    return result
+
+
+class Echo:
+    """File-like object handing back what csv.writer writes."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_players(chunk_size=1000) -> Iterator[str]:
+    """CSV lines of all players, read in chunks; the format import_players reads."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for player in (
+        Player.objects.select_related("user").order_by("id").iterator(chunk_size)
+    ):
+        user = player.user
+        yield writer.writerow(
+            [
+                user.username if user else "",
+                user.first_name if user else "",
+                user.last_name if user else "",
+                user.email if user else "",
+                player.mobile_number,
+                player.role,
+            ]
+        )
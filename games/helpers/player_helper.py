@@ -1,5 +1,5 @@
 from futsal_app import settings
-from games.models import BookingHistoryForGame, Game, Player
+from games.models import BookingHistoryForGame, CurrentBookingForGame, Game, Player
 
 
 def get_display_name(player: Player) -> str:
@@ -15,8 +15,9 @@ def get_display_name(player: Player) -> str:
 def get_latest_booking_for_game(
     player: Player, game: Game
 ) -> BookingHistoryForGame | None:
-    return (
-        BookingHistoryForGame.objects.filter(player=player, game=game)
-        .order_by("-creation_date")
+    current = (
+        CurrentBookingForGame.objects.filter(player=player, game=game)
+        .select_related("booking")
         .first()
     )
+    return current.booking if current else None
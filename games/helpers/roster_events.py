@@ -0,0 +1,194 @@
+"""
+Live roster updates of game_details, sent as Server-Sent Events.
+
+A stream starts with a snapshot of the roster and then sends only the players
+whose status changed, limited to the rows game_details shows the user. The page
+re-reads its server-rendered sections on a diff.
+
+Streams are woken up by RosterBroker when bookings of the game are committed in
+the same process. With the shipped setup the status updates are served by
+gunicorn and the streams by uvicorn, so the broker is not reached and changes
+are noticed by polling only: every ROSTER_EVENTS_POLL_INTERVAL seconds a stream
+reads the game's updated_at and newest booking date (one indexed query) and
+the players version of the cache, and reloads the roster only when they changed.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AbstractBaseUser
+from django.db.models import Max
+
+from games.models import (
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    StatusChoices,
+)
+
+from . import cache_helper, player_helper
+
+
+class RosterBroker:
+    """In-process pub/sub: publish() may be called from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, game_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[game_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, game_id: int, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers[game_id] = {
+                subscriber
+                for subscriber in self._subscribers[game_id]
+                if subscriber[1] is not queue
+            }
+            if not self._subscribers[game_id]:
+                del self._subscribers[game_id]
+
+    def publish(self, game_id: int):
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, game_id)
+            except RuntimeError:  # the loop of a finished stream is closed
+                self.unsubscribe(game_id, queue)
+
+
+broker = RosterBroker()
+
+
+def booking_row(booking: BookingHistoryForGame | CurrentBookingForGame) -> dict:
+    """A player's booking as sent to game_details, enough to render its row there."""
+    return {
+        "player_id": booking.player_id,
+        "name": player_helper.get_display_name(booking.player),
+        "status": booking.status,
+    }
+
+
+def get_roster_stamp(game_id: int) -> tuple | None:
+    """Changes whenever the roster of the game may have changed."""
+    state = (
+        Game.objects.filter(id=game_id)
+        .annotate(latest_booking=Max("bookinghistoryforgame__creation_date"))
+        .values_list("updated_at", "latest_booking")
+        .first()
+    )
+    # player names are part of the rows
+    return state, cache_helper.get_players_version()
+
+
+def get_roster_state(game_id: int) -> dict[int, dict]:
+    """
+    {player_id: row} of the current bookings of the game, in one query, in the
+    order of game_helper.get_roster.
+    """
+    return {
+        current.player_id: booking_row(current)
+        for current in CurrentBookingForGame.objects.filter(game_id=game_id)
+        .select_related("player__user")
+        .order_by("creation_date", "id")
+    }
+
+
+def visible_state(
+    state: dict[int, dict], superuser: bool, player_id: int | None
+) -> dict[int, dict]:
+    """
+    The rows of the state game_details shows the user: everyone sees the planned
+    and cancelled players and the substitutes of the cancelled ones; the awaiting
+    players are listed to those who see the reserve table, and the other rows
+    only to their player (superusers see everything).
+    """
+    if superuser:
+        return state
+    by_status = defaultdict(list)
+    for row in state.values():
+        by_status[row["status"]].append(row)
+    own = state.get(player_id)
+    sees_reserve_table = player_id is None or (
+        own is not None
+        and own["status"]
+        in [StatusChoices.RESERVED, StatusChoices.CONFIRMED, StatusChoices.AWAITING]
+    )
+    visible = {
+        row["player_id"]
+        for row in by_status[StatusChoices.PLANNED]
+        + by_status[StatusChoices.CANCELLED]
+        + by_status[StatusChoices.CONFIRMED][: len(by_status[StatusChoices.CANCELLED])]
+        + (by_status[StatusChoices.AWAITING] if sees_reserve_table else [])
+    }
+    if own is not None:
+        visible.add(player_id)
+    return {player_id: row for player_id, row in state.items() if player_id in visible}
+
+
+def _viewer(user: AbstractBaseUser) -> tuple[bool, int | None]:
+    player = getattr(user, "player", None)
+    return user.is_superuser, player.id if player else None
+
+
+def roster_diff(old: dict[int, dict], new: dict[int, dict]) -> dict[str, list]:
+    return {
+        "changed": [row for player_id, row in new.items() if old.get(player_id) != row],
+        "removed": [player_id for player_id in old if player_id not in new],
+    }
+
+
+def _event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def roster_event_stream(
+    game_id: int, user: AbstractBaseUser
+) -> AsyncIterator[str]:
+    """
+    Events of one game for the user for ROSTER_EVENTS_MAX_DURATION seconds;
+    the browser reconnects afterwards and starts with a new snapshot.
+    """
+    poll_interval = settings.ROSTER_EVENTS_POLL_INTERVAL
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ROSTER_EVENTS_MAX_DURATION
+    queue = broker.subscribe(game_id)
+    try:
+        superuser, player_id = await sync_to_async(_viewer)(user)
+        stamp = await sync_to_async(get_roster_stamp)(game_id)
+        state = visible_state(
+            await sync_to_async(get_roster_state)(game_id), superuser, player_id
+        )
+        yield f"retry: {int(poll_interval * 1000)}\n"
+        yield _event("snapshot", {"changed": list(state.values()), "removed": []})
+        while loop.time() < deadline:
+            try:
+                await asyncio.wait_for(queue.get(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            new_stamp = await sync_to_async(get_roster_stamp)(game_id)
+            if new_stamp == stamp:
+                yield ": keep-alive\n\n"
+                continue
+            stamp = new_stamp
+            new_state = visible_state(
+                await sync_to_async(get_roster_state)(game_id), superuser, player_id
+            )
+            diff = roster_diff(state, new_state)
+            if diff["changed"] or diff["removed"]:
+                state = new_state
+                yield _event("diff", diff)
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(game_id, queue)
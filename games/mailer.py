@@ -1,14 +1,76 @@
+import logging
+from smtplib import SMTPException
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 
-from futsal_app import settings
-from games.helpers import game_helper, player_helper
-from games.models import Game, Player
+from games.helpers import game_helper, performance_helper, player_helper
+from games.models import Game, OutboundEmail, Player
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
+def _deliver(messages: list[EmailMultiAlternatives]):
+    """
+    Puts the messages into the outbox (drained by the send_queued_mail command)
+    or, with EMAIL_OUTBOX_ENABLED turned off, sends them right away
+    over a single connection.
+    """
+    if not messages:
+        return
+    if getattr(settings, "EMAIL_OUTBOX_ENABLED", True):
+        OutboundEmail.objects.enqueue(messages)
+    else:
+        get_connection().send_messages(messages)
+
+
+def send_queued_emails(batch_size=50, max_attempts=None, connection=None) -> int:
+    """
+    Sends up to batch_size due emails from the outbox over a single connection,
+    returns the number of processed emails. Emails failing on the SMTP level
+    are retried with exponential backoff until max_attempts is reached, the
+    ones which can't be sent at all are marked as failed right away.
+
+    The emails are claimed first, so that several workers can drain the outbox
+    without sending an email twice. The connection is left open if it was
+    passed in, so that a long-running worker can reuse it between batches.
+    """
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    retry_delay = settings.EMAIL_OUTBOX_RETRY_DELAY
+    emails = OutboundEmail.objects.claim(batch_size, settings.EMAIL_OUTBOX_LEASE)
+    if not emails:
+        return 0
+
+    owns_connection = connection is None
+    connection = connection or get_connection()
+    try:
+        for email in emails:
+            try:
+                connection.open()
+                connection.send_messages([email.to_message(connection)])
+            except (SMTPException, OSError) as e:
+                logger.warning("Sending email %s failed: %s", email.pk, e)
+                email.mark_failed(str(e), max_attempts, retry_delay)
+                # the connection may be broken, next email gets a fresh one
+                connection.close()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # a malformed email (e.g. an invalid address) fails the same way
+                # on every attempt, it is given up so the rest of the outbox drains
+                logger.exception("Email %s can't be sent", email.pk)
+                email.mark_failed(f"{type(e).__name__}: {e}", 1, retry_delay)
+            else:
+                email.mark_sent()
+    finally:
+        if owns_connection:
+            connection.close()
+    return len(emails)
+
+
+@performance_helper.timed("mail")
 def send_welcome_email(user, activation_link):
     subject = "Welcome to our site!"
     from_email = settings.DEFAULT_FROM_EMAIL
@@ -28,9 +90,10 @@ def send_welcome_email(user, activation_link):
 
     msg = EmailMultiAlternatives(subject, text_content, from_email, to)
     msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    _deliver([msg])
 
 
+@performance_helper.timed("mail")
 def send_game_update_email(user, game, update_type):
     subject = f"Update on Game {game.id}"
     from_email = settings.DEFAULT_FROM_EMAIL
@@ -51,14 +114,17 @@ def send_game_update_email(user, game, update_type):
 
     msg = EmailMultiAlternatives(subject, text_content, from_email, to)
     msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    _deliver([msg])
 
 
-def send_player_status_update_email(player: Player, game, status: str):
+def _player_status_update_messages(
+    player: Player, game, status: str, player_display_name: str
+) -> list[EmailMultiAlternatives]:
+    if not player.user or not player.user.email:
+        return []
     subject = "Your Futsal Player Status Has Been Updated"
     from_email = settings.DEFAULT_FROM_EMAIL
     to = [player.user.email]
-    player_display_name = player_helper.get_display_name(player)
     # Fallback plain text version
     text_content = f"Hello {player_display_name}, there is an update regarding Game on {game.when}. Your status is now {status}."
 
@@ -74,9 +140,54 @@ def send_player_status_update_email(player: Player, game, status: str):
 
     msg = EmailMultiAlternatives(subject, text_content, from_email, to)
     msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    return [msg]
+
+
+def _admin_status_update_messages(
+    game: Game, status: str, player_display_name: str
+) -> list[EmailMultiAlternatives]:
+    admin_emails = list(
+        User.objects.filter(is_superuser=True)
+        .exclude(email="")
+        .values_list("email", flat=True)
+    )
+    if not admin_emails:
+        return []
+
+    # Fallback plain text version
+    text_content = f"For the game on {game.when} the player {player_display_name} changed status to {status}."
+
+    # Render the template with context, once for all admins
+    html_content = render_to_string(
+        "emails/player_status_update_for_admin.html",
+        {
+            "player_display_name": player_display_name,
+            "game": game,
+            "status": status,
+            "no_players": game_helper.get_total_players_for_game(game),
+        },
+    )
+    subject = "The status change for the player"
+    from_email = settings.DEFAULT_FROM_EMAIL
+    messages = []
+    for admin_email in admin_emails:
+        # feature: check if admin wants to receive such emails
+        msg = EmailMultiAlternatives(subject, text_content, from_email, [admin_email])
+        msg.attach_alternative(html_content, "text/html")
+        messages.append(msg)
+    return messages
 
 
+@performance_helper.timed("mail")
+def send_player_status_update_email(player: Player, game, status: str):
+    _deliver(
+        _player_status_update_messages(
+            player, game, status, player_helper.get_display_name(player)
+        )
+    )
+
+
+@performance_helper.timed("mail")
 def send_player_status_update_email_to_admins(player: Player, game: Game, status: str):
     """
     Send an email notification to all admin users when a player changes their status for a game.
@@ -88,9 +199,10 @@ def send_player_status_update_email_to_admins(player: Player, game: Game, status
     - status: the new status string
     - no_players: total players for the game (via game_helper.get_total_players_for_game)
 
-    For each superuser (User.objects.filter(is_superuser=True)) an individual EmailMultiAlternatives
-    message is created and sent to the admin.email address using settings.DEFAULT_FROM_EMAIL as the
-    sender. The subject is set to "The status change for the player".
+    The HTML is rendered once, then for each superuser with an email address an individual
+    EmailMultiAlternatives message is created for the admin.email address using
+    settings.DEFAULT_FROM_EMAIL as the sender. The subject is set to "The status change for the player".
+    All messages are delivered as one batch (see _deliver).
 
     Parameters:
         player (Player): The player whose status changed.
@@ -101,16 +213,15 @@ def send_player_status_update_email_to_admins(player: Player, game: Game, status
         None
 
     Side effects:
-        - Sends one email per admin user (synchronous I/O).
+        - Queues one email per admin user in the outbox, or sends them over a single
+          connection when the outbox is disabled.
         - Renders a template to produce HTML content.
         - May produce log entries or exceptions from the email backend or template system.
 
     Notes / Potential failure modes:
         - If the template is missing, render_to_string may raise TemplateDoesNotExist.
-        - Email delivery may fail and raise smtplib.SMTPException or backend-specific exceptions.
-        - Admin users without an email address will receive an email to an empty recipient list (behavior depends on email backend).
-        - The function currently iterates and sends emails synchronously; consider delegating to a background task
-          to avoid blocking request handling and to better handle retries.
+        - Email delivery happens in the send_queued_mail command, which retries failed emails.
+        - Admin users without an email address are skipped.
         - There is a comment indicating a preference check ("check if admin wants to receive such emails") but
           no implementation: implement admin notification preferences if required.
 
@@ -121,26 +232,21 @@ def send_player_status_update_email_to_admins(player: Player, game: Game, status
         - settings.DEFAULT_FROM_EMAIL
         - player_helper and game_helper utilities used for display name and player counts.
     """
+    _deliver(
+        _admin_status_update_messages(
+            game, status, player_helper.get_display_name(player)
+        )
+    )
 
-    # Fallback plain text version
-    text_content = f"For the game on {game.when} the player {player_helper.get_display_name(player)} changed status to {status}."
 
-    # Render the template with context
-    html_content = render_to_string(
-        "emails/player_status_update_for_admin.html",
-        {
-            "player_display_name": player_helper.get_display_name(player),
-            "game": game,
-            "status": status,
-            "no_players": game_helper.get_total_players_for_game(game),
-        },
+@performance_helper.timed("mail")
+def send_player_status_update_notifications(player: Player, game: Game, status: str):
+    """
+    Notifies the player and all admins about the player's status change
+    as one batch of messages.
+    """
+    player_display_name = player_helper.get_display_name(player)
+    _deliver(
+        _player_status_update_messages(player, game, status, player_display_name)
+        + _admin_status_update_messages(game, status, player_display_name)
     )
-    subject = "The status change for the player"
-    from_email = settings.DEFAULT_FROM_EMAIL
-    admins = User.objects.filter(is_superuser=True)
-    for admin in admins:
-        # feature: check if admin wants to receive such emails
-        to = [admin.email]
-        msg = EmailMultiAlternatives(subject, text_content, from_email, to)
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from games.models import BookingHistoryArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the superseded booking history of old played or cancelled games "
+        "into one compressed archive per game. The final status of every player "
+        "stays in the booking history; games are archived in batches, each in "
+        "its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=365,
+            help="Archive only the games played at least this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=50, help="Games per batch."
+        )
+        parser.add_argument(
+            "--max-batches", type=int, help="Stop after this many batches."
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.localdate() - timedelta(days=options["older_than_days"])
+        games = BookingHistoryArchive.objects.archivable_games(before)
+
+        if options["dry_run"]:
+            game_ids = list(games.values_list("id", flat=True))
+            rows = BookingHistoryArchive.objects.superseded(game_ids).count()
+            self.stdout.write(
+                f"Would archive {rows} booking history rows of {len(game_ids)} games "
+                f"played before {before}."
+            )
+            return
+
+        archived_games = archived_rows = batches = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            game_ids = list(games.values_list("id", flat=True)[: options["batch_size"]])
+            if not game_ids:
+                break
+            archived_rows += BookingHistoryArchive.objects.archive(game_ids)
+            archived_games += len(game_ids)
+            batches += 1
+            self.stdout.write(f"Batch {batches}: {len(game_ids)} games archived.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived_rows} booking history rows of "
+                f"{archived_games} games."
+            )
+        )
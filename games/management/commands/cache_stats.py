@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from games.helpers import cache_helper
+
+
+class Command(BaseCommand):
+    help = "Shows the hits and misses of the game cache (rosters and game tiles)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after showing them.",
+        )
+
+    def handle(self, *args, **options):
+        stats = cache_helper.get_cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_ratio = stats["hits"] / lookups if lookups else 0
+        self.stdout.write(
+            f"Hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit ratio: {hit_ratio:.1%}"
+        )
+        if options["reset"]:
+            cache_helper.reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
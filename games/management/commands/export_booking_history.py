@@ -0,0 +1,53 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from games.helpers import history_export_helper
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the booking history as CSV or JSON, optionally only of the games "
+        "in a date range, of one game or of one player. Rows are streamed, the "
+        "memory used doesn't grow with the size of the history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=history_export_helper.EXPORT_FORMATS, default="csv"
+        )
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="First game date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Last game date (YYYY-MM-DD).",
+        )
+        parser.add_argument("--game", type=int)
+        parser.add_argument("--player", type=int)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--output", help="File to write, standard output by default."
+        )
+
+    def handle(self, *args, **options):
+        history = history_export_helper.get_booking_history(
+            date_from=options["date_from"],
+            date_to=options["date_to"],
+            game_id=options["game"],
+            player_id=options["player"],
+        )
+        lines = history_export_helper.export(
+            history, options["format"], chunk_size=options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as file:
+                file.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
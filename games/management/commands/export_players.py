@@ -0,0 +1,21 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from games.helpers import player_csv_helper
+
+
+class Command(BaseCommand):
+    help = "Exports all players as CSV, in the format read by import_players."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="CSV file to write, standard output by default."
+        )
+
+    def handle(self, *args, **options):
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as file:
+                file.writelines(player_csv_helper.export_players())
+        else:
+            sys.stdout.writelines(player_csv_helper.export_players())
@@ -0,0 +1,389 @@
+import random
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from games.helpers import cache_helper
+from games.helpers.booking_helper import get_next_status, get_status_for_absence
+from games.models import (
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    GameStatus,
+    Player,
+    PlayerRole,
+    PlayerSeasonStats,
+    PlayerStatus,
+    StatusChoices,
+    bookings_bulk_changed,
+)
+
+User = get_user_model()
+
+# the checkbox click a player with the given status makes
+CLICKS = {
+    StatusChoices.PLANNED: False,
+    StatusChoices.CANCELLED: True,
+    StatusChoices.RESERVED: True,
+    StatusChoices.AWAITING: False,
+    StatusChoices.CONFIRMED: False,
+}
+
+
+class GameSimulation:
+    """
+    Plays the bookings of one game in memory, with the same transitions as
+    booking_helper.change_player_status, and collects the history rows
+    as (player_id, status, creation_date).
+    """
+
+    def __init__(self, game: Game, clock: datetime):
+        self.game = game
+        self.clock = clock
+        self.status = {}
+        self.counts = Counter()
+        self.awaiting = []  # in the order the players started waiting
+        self.bookings = []
+
+    def book(self, player_id: int, status: str):
+        old_status = self.status.get(player_id)
+        if old_status == StatusChoices.AWAITING:
+            self.awaiting.remove(player_id)
+        if status == StatusChoices.AWAITING:
+            self.awaiting.append(player_id)
+        if old_status is not None:
+            self.counts[old_status] -= 1
+        self.counts[status] += 1
+        self.status[player_id] = status
+        self.bookings.append((player_id, status, self.clock))
+
+    def has_free_slot(self) -> bool:
+        return (
+            self.counts[StatusChoices.CANCELLED] > self.counts[StatusChoices.CONFIRMED]
+        )
+
+    def seed(self, permanent_ids: list[int], active_ids: list[int], absences):
+        """Like booking_helper.seed_game_roster."""
+        for player_id in permanent_ids:
+            self.book(player_id, StatusChoices.PLANNED)
+        for player_id in active_ids:
+            self.book(player_id, StatusChoices.RESERVED)
+        for absence in absences:
+            self.book(
+                absence.player_id,
+                get_status_for_absence(
+                    self.status.get(absence.player_id), absence.status
+                ),
+            )
+
+    def click(self, player_id: int, checked: bool):
+        current_status = self.status[player_id]
+        new_status = get_next_status(current_status, checked, self.has_free_slot)
+        if new_status != current_status:
+            self.book(player_id, new_status)
+        if self.has_free_slot() and self.awaiting:
+            self.book(self.awaiting[0], StatusChoices.CONFIRMED)
+
+    def play(self, rng: random.Random, clicks: int, until: datetime):
+        """Random clicks of the booked players, spread until the given time."""
+        step = (until - self.clock).total_seconds() / max(clicks, 1)
+        # clicks keep the players among the statuses of CLICKS
+        candidates = [
+            player_id for player_id, status in self.status.items() if status in CLICKS
+        ]
+        if not candidates:
+            return
+        for _ in range(clicks):
+            player_id = rng.choice(candidates)
+            current_status = self.status[player_id]
+            checked = CLICKS[current_status]
+            if current_status == StatusChoices.AWAITING and rng.random() < 0.5:
+                checked = True  # asks again whether a slot is free
+            self.clock += timedelta(seconds=rng.uniform(0, step))
+            self.click(player_id, checked)
+
+
+def _insert(model, fields: list[str], rows: list[tuple]):
+    """
+    Inserts the rows with a single executemany. bulk_create spends most of its
+    time preparing a model instance per row, which dominates with millions of rows.
+    """
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(model._meta.get_field(field_name).column) for field_name in fields
+    )
+    placeholders = ", ".join(["%s"] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote_name(model._meta.db_table)} ({columns}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic club for testing and benchmarking: players with "
+        "users, weekly games, absences and a booking history following the "
+        "status change rules. The same --seed generates the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=500)
+        parser.add_argument("--games", type=int, default=100)
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="Date of the first game (YYYY-MM-DD), by default half of the "
+            "games are in the past.",
+        )
+        parser.add_argument("--interval-days", type=int, default=7)
+        parser.add_argument(
+            "--clicks-per-game",
+            type=int,
+            default=30,
+            help="Checkbox clicks simulated per game after its roster is seeded.",
+        )
+        parser.add_argument(
+            "--absence-rate",
+            type=float,
+            default=0.3,
+            help="Share of players with an absence.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Prefix of the generated usernames, descriptions and e-mails.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50_000,
+            help="History rows inserted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(
+                f"Users with the prefix '{prefix}' exist already, use another --prefix."
+            )
+        rng = random.Random(options["seed"])
+        interval = timedelta(days=options["interval_days"])
+        start = options["start"] or (date.today() - interval * (options["games"] // 2))
+
+        players = self._create_players(rng, prefix, options["players"])
+        games = self._create_games(rng, prefix, start, interval, options["games"])
+        absences = self._create_absences(
+            rng, players, start, interval * options["games"], options["absence_rate"]
+        )
+        history = self._create_history(
+            rng,
+            players,
+            games,
+            absences,
+            options["clicks_per_game"],
+            options["batch_size"],
+        )
+        # the games are inserted in bulk, without the signal refreshing the stats
+        for season in sorted({game.season for game in games}):
+            PlayerSeasonStats.objects.refresh(season)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(players)} players, {len(games)} games, "
+                f"{len(absences)} absences and {history} booking history rows."
+            )
+        )
+        if cache_helper.is_process_local():
+            self.stdout.write(self.style.WARNING(cache_helper.PROCESS_LOCAL_WARNING))
+
+    def _create_players(
+        self, rng: random.Random, prefix: str, count: int
+    ) -> list[Player]:
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}_{idx}",
+                    first_name=f"First{idx}",
+                    last_name=f"Last{idx}",
+                    email=f"{prefix}_{idx}@example.com",
+                    password="!",
+                )
+                for idx in range(count)
+            ],
+            batch_size=1000,
+        )
+        users = User.objects.filter(username__startswith=f"{prefix}_").order_by("id")
+        Player.objects.bulk_create(
+            [
+                Player(
+                    user=user,
+                    mobile_number=f"{rng.randrange(10**8, 10**9)}",
+                    role=rng.choices(
+                        [PlayerRole.PERMANENT, PlayerRole.ACTIVE, PlayerRole.INACTIVE],
+                        weights=[1, 6, 3],
+                    )[0],
+                )
+                for user in users
+            ],
+            batch_size=1000,
+        )
+        return list(
+            Player.objects.filter(user__username__startswith=f"{prefix}_").order_by(
+                "id"
+            )
+        )
+
+    def _create_games(
+        self,
+        rng: random.Random,
+        prefix: str,
+        start: date,
+        interval: timedelta,
+        count: int,
+    ) -> list[Game]:
+        today = date.today()
+        games = []
+        for idx in range(count):
+            when = start + interval * idx
+            status = GameStatus.PLAYED if when < today else GameStatus.PLANNED
+            if rng.random() < 0.05:
+                status = GameStatus.CANCELLED
+            games.append(
+                Game(when=when, status=status, description=f"{prefix} game {idx}")
+            )
+        return Game.objects.bulk_create(games, batch_size=1000)
+
+    def _create_absences(
+        self,
+        rng: random.Random,
+        players: list[Player],
+        start: date,
+        span: timedelta,
+        rate: float,
+    ) -> list[PlayerStatus]:
+        absences = []
+        for player in players:
+            if rng.random() >= rate:
+                continue
+            for _ in range(rng.randint(1, 3)):
+                date_start = start + timedelta(days=rng.randrange(max(span.days, 1)))
+                absences.append(
+                    PlayerStatus(
+                        player=player,
+                        date_start=date_start,
+                        date_end=date_start + timedelta(days=rng.randint(0, 21)),
+                        # mostly holidays, sometimes a booking made up front
+                        status=rng.choices(
+                            [StatusChoices.RESTING, StatusChoices.CANCELLED],
+                            weights=[9, 1],
+                        )[0],
+                        description="Generated absence",
+                    )
+                )
+        return PlayerStatus.objects.bulk_create(absences, batch_size=1000)
+
+    def _create_history(
+        self,
+        rng: random.Random,
+        players: list[Player],
+        games: list[Game],
+        absences: list[PlayerStatus],
+        clicks: int,
+        batch_size: int,
+    ) -> int:
+        permanent_ids = [p.id for p in players if p.role == PlayerRole.PERMANENT]
+        active_ids = [p.id for p in players if p.role == PlayerRole.ACTIVE]
+        absences = sorted(
+            absences, key=lambda absence: (absence.date_start, absence.id)
+        )
+
+        total = 0
+        simulations = []
+        for game in games:
+            # the roster is seeded a week before the game, then players click
+            seeded_at = timezone.make_aware(
+                datetime.combine(game.when - timedelta(days=7), time(9))
+            )
+            simulation = GameSimulation(game, seeded_at)
+            simulation.seed(
+                permanent_ids,
+                active_ids,
+                [
+                    absence
+                    for absence in absences
+                    if absence.date_start <= game.when <= absence.date_end
+                ],
+            )
+            simulation.play(rng, clicks, until=seeded_at + timedelta(days=6))
+            simulations.append(simulation)
+            if sum(len(sim.bookings) for sim in simulations) >= batch_size:
+                total += self._record(simulations)
+                simulations = []
+        if simulations:
+            total += self._record(simulations)
+        return total
+
+    def _record(self, simulations: list[GameSimulation]) -> int:
+        """
+        Inserts the history rows of the simulated games and their current
+        bookings, and sets the games' booking counters, in one transaction.
+        """
+        adapted = {}  # most rows of a game share the time it was seeded
+
+        def adapt(value: datetime):
+            if value not in adapted:
+                adapted[value] = connection.ops.adapt_datetimefield_value(value)
+            return adapted[value]
+
+        history = [
+            (simulation.game.id, player_id, status, creation_date)
+            for simulation in simulations
+            for player_id, status, creation_date in simulation.bookings
+        ]
+        game_ids = [simulation.game.id for simulation in simulations]
+        with transaction.atomic():
+            _insert(
+                BookingHistoryForGame,
+                ["game", "player", "status", "creation_date"],
+                [row[:3] + (adapt(row[3]),) for row in history],
+            )
+            # the generated games are new, their rows are the ones just inserted
+            booking_ids = (
+                BookingHistoryForGame.objects.filter(game_id__in=game_ids)
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+            latest = {
+                (game_id, player_id): (booking_id, status, creation_date)
+                for booking_id, (game_id, player_id, status, creation_date) in zip(
+                    booking_ids, history
+                )
+            }
+            _insert(
+                CurrentBookingForGame,
+                ["game", "player", "booking", "status", "creation_date"],
+                [
+                    (game_id, player_id, booking_id, status, adapt(creation_date))
+                    for (game_id, player_id), (
+                        booking_id,
+                        status,
+                        creation_date,
+                    ) in latest.items()
+                ],
+            )
+            Game.objects.apply_booking_count_changes(
+                {simulation.game.id: simulation.counts for simulation in simulations}
+            )
+            bookings_bulk_changed.send(
+                sender=BookingHistoryForGame, game_ids=set(game_ids)
+            )
+        if self.verbosity > 1:
+            self.stdout.write(f"Inserted {len(history)} booking history rows.")
+        return len(history)
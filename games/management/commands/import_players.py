@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from games.helpers import player_csv_helper
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports players from a CSV file with the columns "
+        f"{', '.join(player_csv_helper.CSV_FIELDS)}. Nothing is imported "
+        "unless every row is valid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file, '-' reads standard input.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["path"] == "-":
+            result = player_csv_helper.import_players(
+                sys.stdin, batch_size=options["batch_size"]
+            )
+        else:
+            try:
+                with open(options["path"], encoding="utf-8-sig", newline="") as file:
+                    result = player_csv_helper.import_players(
+                        file, batch_size=options["batch_size"]
+                    )
+            except (OSError, UnicodeDecodeError) as e:
+                raise CommandError(e)
+
+        if result.errors:
+            for line, error in result.errors:
+                self.stderr.write(f"line {line}: {error}")
+            raise CommandError(
+                f"{len(result.errors)} errors in {result.rows} rows, "
+                "no players were imported."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {len(result.players)} players.")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from games.helpers import cache_helper
+from games.models import CurrentBookingForGame
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the current booking status of every player from BookingHistoryForGame."
+
+    def handle(self, *args, **options):
+        count = CurrentBookingForGame.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} current bookings."))
+        if cache_helper.is_process_local():
+            self.stdout.write(self.style.WARNING(cache_helper.PROCESS_LOCAL_WARNING))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from games.models import Game, GameStatus, PlayerSeasonStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-season attendance stats of all players, of every "
+        "season with played games or only of the given ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, action="append", dest="seasons")
+
+    def handle(self, *args, **options):
+        seasons = options["seasons"] or sorted(
+            day.year
+            for day in Game.objects.filter(status=GameStatus.PLAYED).dates(
+                "when", "year"
+            )
+        )
+        for season in seasons:
+            count = PlayerSeasonStats.objects.refresh(season)
+            self.stdout.write(f"Season {season}: stats of {count} players.")
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(seasons)} seasons."))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from games.mailer import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Sends emails waiting in the outbox, retrying failed ones with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Defaults to settings.EMAIL_OUTBOX_MAX_ATTEMPTS.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll the outbox every --interval seconds.",
+        )
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        # one connection for the whole run, it is closed whenever the outbox is empty
+        connection = get_connection()
+        total = 0
+        try:
+            while True:
+                processed = send_queued_emails(
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                    connection=connection,
+                )
+                total += processed
+                if processed:
+                    continue
+                if not options["loop"]:
+                    break
+                connection.close()
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} queued emails."))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from games.helpers import cache_helper
+from games.models import (
+    BOOKING_COUNTER_FIELDS,
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-game booking counters from BookingHistoryForGame "
+        "and reports (or repairs) the games whose counters are wrong."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rebuild the current bookings and the counters from the history.",
+        )
+
+    def handle(self, *args, **options):
+        expected = CurrentBookingForGame.objects.count_by_game(
+            BookingHistoryForGame.objects.latest_per_player()
+        )
+        wrong_games = []
+        for game in Game.objects.order_by("when"):
+            for status, field_name in BOOKING_COUNTER_FIELDS.items():
+                stored = getattr(game, field_name)
+                if stored != expected[game.id][status]:
+                    wrong_games.append(game)
+                    self.stdout.write(
+                        f"{game}: {field_name} is {stored}, "
+                        f"expected {expected[game.id][status]}"
+                    )
+
+        if not wrong_games:
+            self.stdout.write(self.style.SUCCESS("All game counters are correct."))
+            return
+
+        if options["repair"]:
+            with transaction.atomic():
+                CurrentBookingForGame.objects.rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Repaired counters of {len(set(wrong_games))} games."
+                )
+            )
+            if cache_helper.is_process_local():
+                self.stdout.write(
+                    self.style.WARNING(cache_helper.PROCESS_LOCAL_WARNING)
+                )
+        else:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{len(set(wrong_games))} games have wrong counters, "
+                    "run with --repair to fix them."
+                )
+            )
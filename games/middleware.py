@@ -0,0 +1,104 @@
+import json
+import logging
+import random
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from games.helpers import performance_helper
+
+logger = logging.getLogger("games.performance")
+
+# measured in the request, see performance_helper
+MEASUREMENTS = ("sql", "template", "mail")
+
+
+class PerformanceMiddleware:
+    """
+    Logs the URL name, total time, SQL queries, template rendering and mailer
+    time of a PERFORMANCE_SAMPLE_RATE share of the requests as one JSON line
+    (logger "games.performance") and, with PERFORMANCE_SERVER_TIMING, adds them
+    to the Server-Timing header. Not loaded unless PERFORMANCE_MONITORING is on;
+    requests left out of the sample are passed through untouched.
+
+    Runs in the sync or the async chain, so the async roster events view is not
+    moved to a thread under ASGI. Streaming responses are measured until they
+    are returned, not while their content is sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERFORMANCE_MONITORING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = getattr(settings, "PERFORMANCE_SAMPLE_RATE", 1.0)
+        self.server_timing = getattr(settings, "PERFORMANCE_SERVER_TIMING", False)
+        performance_helper.install_template_timing()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        with performance_helper.collect() as metrics, self._wrap_queries():
+            with metrics.measure("total"):
+                response = self.get_response(request)
+        return self._record(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        with performance_helper.collect() as metrics:
+            # database connections are per thread: the wrappers go on the
+            # connections of the thread running the request's sync code
+            queries = await sync_to_async(self._wrap_queries)()
+            try:
+                with metrics.measure("total"):
+                    response = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.close)()
+        return self._record(request, response, metrics)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _wrap_queries(self) -> ExitStack:
+        """Measures the queries of this thread's connections until closed."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(performance_helper.sql_execute_wrapper)
+            )
+        return stack
+
+    def _record(self, request, response, metrics):
+        record = {
+            "url_name": getattr(request.resolver_match, "view_name", None),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(metrics.durations["total"] * 1000, 2),
+        }
+        for name in MEASUREMENTS:
+            record[f"{name}_count"] = metrics.counts[name]
+            record[f"{name}_ms"] = round(metrics.durations[name] * 1000, 2)
+        logger.info(json.dumps(record), extra={"performance": record})
+
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join(
+                [f"total;dur={record['total_ms']}"]
+                + [
+                    f'{name};dur={record[f"{name}_ms"]};desc="{record[f"{name}_count"]}"'
+                    for name in MEASUREMENTS
+                    if record[f"{name}_count"]
+                ]
+            )
+        return response
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def fill_current_bookings(apps, schema_editor):
+    history_model = apps.get_model("games", "BookingHistoryForGame")
+    current_model = apps.get_model("games", "CurrentBookingForGame")
+
+    latest_id_sq = (
+        history_model.objects.filter(game=OuterRef("game"), player=OuterRef("player"))
+        .order_by("-creation_date", "-id")
+        .values("id")[:1]
+    )
+    latest_bookings = history_model.objects.annotate(
+        latest_id=Subquery(latest_id_sq)
+    ).filter(id=F("latest_id"))
+
+    current_model.objects.bulk_create(
+        [
+            current_model(
+                game_id=booking.game_id,
+                player_id=booking.player_id,
+                booking_id=booking.id,
+                status=booking.status,
+                creation_date=booking.creation_date,
+            )
+            for booking in latest_bookings.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0025_alter_bookinghistoryforgame_status_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CurrentBookingForGame",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("planned", "Planned"),
+                            ("cancelled", "Cancelled"),
+                            ("confirmed", "Confirmed"),
+                            ("reserved", "Reserved"),
+                            ("resting", "Resting"),
+                            ("awaiting", "Awaiting"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("creation_date", models.DateTimeField()),
+                (
+                    "booking",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="games.bookinghistoryforgame",
+                    ),
+                ),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="current_bookings",
+                        to="games.game",
+                    ),
+                ),
+                (
+                    "player",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="current_bookings",
+                        to="games.player",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["game", "status", "creation_date"],
+                        name="games_curre_game_id_d29424_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("game", "player"),
+                        name="unique_current_booking_per_player",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_current_bookings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0026_currentbookingforgame"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bookinghistoryforgame",
+            index=models.Index(
+                fields=["game", "player", "-creation_date"],
+                name="booking_game_player_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookinghistoryforgame",
+            index=models.Index(
+                fields=["game", "-creation_date"], name="booking_game_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookinghistoryforgame",
+            index=models.Index(
+                fields=["game", "status"], name="booking_game_status_idx"
+            ),
+        ),
+    ]
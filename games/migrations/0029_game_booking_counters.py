@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+COUNTER_FIELDS = {
+    "planned": "planned_count",
+    "confirmed": "confirmed_count",
+    "cancelled": "cancelled_count",
+    "awaiting": "awaiting_count",
+    "reserved": "reserved_count",
+}
+
+
+def fill_counters(apps, schema_editor):
+    game_model = apps.get_model("games", "Game")
+    current_model = apps.get_model("games", "CurrentBookingForGame")
+
+    counts = (
+        current_model.objects.filter(status__in=COUNTER_FIELDS.keys())
+        .values("game_id", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in counts:
+        game_model.objects.filter(pk=row["game_id"]).update(
+            **{COUNTER_FIELDS[row["status"]]: row["count"]}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0028_outboundemail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="awaiting_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="cancelled_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="confirmed_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="planned_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="reserved_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0030_game_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["when"], name="game_when_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="playerstatus",
+            index=models.Index(
+                fields=["date_end", "date_start"], name="absence_dates_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playerstatus",
+            index=models.Index(
+                fields=["player", "date_end", "date_start"],
+                name="absence_player_dates_idx",
+            ),
+        ),
+    ]
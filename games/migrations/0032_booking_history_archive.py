@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0031_date_range_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingHistoryArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("row_count", models.PositiveIntegerField(default=0)),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "game",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="history_archive",
+                        to="games.game",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0032_booking_history_archive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerSeasonStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("season", models.PositiveSmallIntegerField()),
+                ("games_played", models.PositiveIntegerField(default=0)),
+                ("games_substituted", models.PositiveIntegerField(default=0)),
+                ("games_cancelled", models.PositiveIntegerField(default=0)),
+                ("late_cancellations", models.PositiveIntegerField(default=0)),
+                ("games_on_reserve", models.PositiveIntegerField(default=0)),
+                ("promotions", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "player",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="season_stats",
+                        to="games.player",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["season"], name="player_stats_season_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("player", "season"), name="unique_player_season_stats"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("games", "0033_player_season_stats"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="game",
+            name="awaiting_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="game",
+            name="cancelled_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="game",
+            name="confirmed_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="game",
+            name="planned_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="game",
+            name="reserved_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
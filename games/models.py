@@ -1,10 +1,46 @@
+import json
+import zlib
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
 
 User = get_user_model()
 
 
+def _delete_rows(model, ids=None, batch_size=500, column=None) -> int:
+    """
+    Deletes the rows with the given ids, or values of the given column (all
+    the rows without ids), with plain DELETE statements: the rows aren't
+    loaded and no delete signals are sent.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if ids is None:
+            cursor.execute(f"DELETE FROM {table}")
+            return cursor.rowcount
+        ids = list(ids)
+        column = connection.ops.quote_name(column or model._meta.pk.column)
+        deleted = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start : start + batch_size]
+            cursor.execute(
+                f"DELETE FROM {table} "
+                f"WHERE {column} IN ({', '.join(['%s'] * len(batch))})",
+                batch,
+            )
+            deleted += cursor.rowcount
+        return deleted
+
+
 class PlayerRole(models.TextChoices):
     ACTIVE = "Active", "Active"
     INACTIVE = "Inactive", "Inactive"
@@ -37,6 +73,26 @@ class GameStatus(models.TextChoices):
     CANCELLED = "Cancelled", "Cancelled"
 
 
+class GameManager(models.Manager):
+
+    def apply_booking_count_changes(self, changes: dict[int, Counter]):
+        """
+        Applies {game_id: Counter({status: delta})} to the booking counters
+        of all the games with a single UPDATE.
+        """
+        updates = {}
+        for status, field_name in BOOKING_COUNTER_FIELDS.items():
+            whens = [
+                When(pk=game_id, then=Value(delta[status]))
+                for game_id, delta in changes.items()
+                if delta[status]
+            ]
+            if whens:
+                updates[field_name] = F(field_name) + Case(*whens, default=Value(0))
+        if updates:
+            self.filter(pk__in=changes.keys()).update(**updates)
+
+
 class Game(models.Model):
 
     when = models.DateField()
@@ -44,6 +100,59 @@ class Game(models.Model):
         max_length=100, choices=GameStatus.choices, default=GameStatus.PLANNED
     )
     description = models.TextField(null=True, blank=True)
+    # changes of the game itself, bookings have their own creation_date
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # number of players per current booking status, kept up to date
+    # by CurrentBookingManager, see the verify_game_counters command;
+    # only ever changed by UPDATEs relative to the stored values, see save()
+    planned_count = models.PositiveIntegerField(default=0, editable=False)
+    confirmed_count = models.PositiveIntegerField(default=0, editable=False)
+    cancelled_count = models.PositiveIntegerField(default=0, editable=False)
+    awaiting_count = models.PositiveIntegerField(default=0, editable=False)
+    reserved_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = GameManager()
+
+    class Meta:
+        # games in a date range (absences, the upcoming and past games)
+        indexes = [models.Index(fields=["when"], name="game_when_idx")]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        game = super().from_db(db, field_names, values)
+        # the stored status, to tell when a game moves to or from Played
+        game.loaded_status = game.__dict__.get("status")
+        return game
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # the loaded counters may be stale already, bookings change them
+            # concurrently, so they are never written back
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in BOOKING_COUNTER_FIELDS.values()
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        # the bookings go with two statements instead of being loaded and
+        # deleted in batches by the cascade
+        with transaction.atomic():
+            _delete_rows(CurrentBookingForGame, [self.pk], column="game_id")
+            _delete_rows(BookingHistoryForGame, [self.pk], column="game_id")
+            return super().delete(*args, **kwargs)
+
+    @property
+    def season(self) -> int:
+        """Seasons are calendar years, see PlayerSeasonStats."""
+        return self._meta.get_field("when").to_python(self.when).year
+
+    @property
+    def number_of_booked_players(self) -> int:
+        return self.planned_count + self.confirmed_count
 
     def __str__(self):
         return f"{self.when} - {self.status}"
@@ -65,6 +174,32 @@ class StatusChoices(models.TextChoices):
         return [(value, label) for value, label in cls.choices if value not in exclude]
 
 
+BOOKING_COUNTER_FIELDS = {
+    StatusChoices.PLANNED: "planned_count",
+    StatusChoices.CONFIRMED: "confirmed_count",
+    StatusChoices.CANCELLED: "cancelled_count",
+    StatusChoices.AWAITING: "awaiting_count",
+    StatusChoices.RESERVED: "reserved_count",
+}
+
+
+class PlayerStatusManager(models.Manager):
+    """Date lookups of absences, answered by the (date_end, date_start) indexes."""
+
+    def on(self, day: date):
+        """Absences covering the given day."""
+        return self.filter(date_start__lte=day, date_end__gte=day)
+
+    def overlapping(self, date_start: date, date_end: date):
+        """Absences sharing at least one day with [date_start, date_end]."""
+        return self.filter(date_start__lte=date_end, date_end__gte=date_start)
+
+    def absent_player_ids_on(self, day: date) -> set[int]:
+        # few absences cover a day, DISTINCT would make the database scan
+        # the player index instead
+        return set(self.on(day).values_list("player_id", flat=True))
+
+
 class PlayerStatus(models.Model):
 
     player = models.ForeignKey(Player, on_delete=models.CASCADE)
@@ -75,12 +210,58 @@ class PlayerStatus(models.Model):
     )
     description = models.TextField(null=True, blank=True)
 
+    objects = PlayerStatusManager()
+
+    class Meta:
+        # Lookups ask about recent and upcoming days: the absences ending after
+        # such a day are few, while nearly all of them started before it.
+        # Leading with date_end keeps the range scan short as the years add up.
+        indexes = [
+            models.Index(fields=["date_end", "date_start"], name="absence_dates_idx"),
+            models.Index(
+                fields=["player", "date_end", "date_start"],
+                name="absence_player_dates_idx",
+            ),
+        ]
+
     def __str__(self):
         return (
             f"{self.player} from {self.date_start} to {self.date_end} - {self.status}"
         )
 
 
+# Sent with `game_ids` when bookings were written in bulk, bypassing post_save
+bookings_bulk_changed = Signal()
+
+
+class BookingHistoryManager(models.Manager):
+
+    def bulk_record(
+        self, bookings: list["BookingHistoryForGame"]
+    ) -> list["BookingHistoryForGame"]:
+        """
+        Inserts the history rows in bulk and updates the current bookings
+        in the same transaction. For repeated (game, player) the last row wins.
+        """
+        with transaction.atomic():
+            created = self.bulk_create(bookings, batch_size=500)
+            CurrentBookingForGame.objects.record_many(created)
+            bookings_bulk_changed.send(
+                sender=BookingHistoryForGame,
+                game_ids={booking.game_id for booking in created},
+            )
+        return created
+
+    def latest_per_player(self):
+        """The latest entry of every (game, player), derived from the whole log."""
+        latest_id_sq = (
+            self.filter(game=OuterRef("game"), player=OuterRef("player"))
+            .order_by("-creation_date", "-id")
+            .values("id")[:1]
+        )
+        return self.annotate(latest_id=Subquery(latest_id_sq)).filter(id=F("latest_id"))
+
+
 class BookingHistoryForGame(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
     player = models.ForeignKey(
@@ -91,5 +272,614 @@ class BookingHistoryForGame(models.Model):
     )
     creation_date = models.DateTimeField(auto_now_add=True)
 
+    objects = BookingHistoryManager()
+
+    class Meta:
+        indexes = [
+            # latest entry of a player in a game
+            models.Index(
+                fields=["game", "player", "-creation_date"],
+                name="booking_game_player_date_idx",
+            ),
+            # booking history of a game, newest first
+            models.Index(
+                fields=["game", "-creation_date"], name="booking_game_date_idx"
+            ),
+            models.Index(fields=["game", "status"], name="booking_game_status_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # the history row and the current status projection are written together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            CurrentBookingForGame.objects.record(self)
+
     def __str__(self):
         return f"{self.player} - {self.status} on {self.game}"
+
+
+def _count_change(old_status: str | None, new_status: str | None) -> Counter:
+    change = Counter()
+    if old_status != new_status:
+        change[old_status] -= 1
+        change[new_status] += 1
+    return change
+
+
+class CurrentBookingManager(models.Manager):
+    """
+    Every change of the current bookings goes through this manager, which also
+    keeps the per-status counters on Game up to date.
+    """
+
+    def record(self, booking: BookingHistoryForGame):
+        """
+        Makes the given history row the current booking of its (game, player)
+        unless a newer row is already recorded.
+        """
+        current = (
+            self.select_for_update()
+            .filter(game_id=booking.game_id, player_id=booking.player_id)
+            .first()
+        )
+        if current is None:
+            self.create(
+                game_id=booking.game_id,
+                player_id=booking.player_id,
+                booking=booking,
+                status=booking.status,
+                creation_date=booking.creation_date,
+            )
+            old_status = None
+        elif current.creation_date <= booking.creation_date:
+            old_status = current.status
+            current.booking = booking
+            current.status = booking.status
+            current.creation_date = booking.creation_date
+            current.save(update_fields=["booking", "status", "creation_date"])
+        else:
+            return
+        Game.objects.apply_booking_count_changes(
+            {booking.game_id: _count_change(old_status, booking.status)}
+        )
+
+    def record_many(self, bookings: list[BookingHistoryForGame]):
+        """
+        Makes the given history rows, freshly inserted or the latest ones of
+        their (game, player), the current bookings.
+        """
+        latest = {(booking.game_id, booking.player_id): booking for booking in bookings}
+        if not latest:
+            return
+        game_ids = {game_id for game_id, _ in latest}
+        player_ids = {player_id for _, player_id in latest}
+        old_statuses = {
+            (game_id, player_id): status
+            for game_id, player_id, status in self.filter(
+                game_id__in=game_ids, player_id__in=player_ids
+            ).values_list("game_id", "player_id", "status")
+            if (game_id, player_id) in latest
+        }
+
+        self.bulk_create(
+            [
+                self.model(
+                    game_id=booking.game_id,
+                    player_id=booking.player_id,
+                    booking_id=booking.id,
+                    status=booking.status,
+                    creation_date=booking.creation_date,
+                )
+                for booking in latest.values()
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["game", "player"],
+            update_fields=["booking", "status", "creation_date"],
+        )
+
+        changes = defaultdict(Counter)
+        for key, booking in latest.items():
+            changes[booking.game_id].update(
+                _count_change(old_statuses.get(key), booking.status)
+            )
+        Game.objects.apply_booking_count_changes(changes)
+
+    def removed(self, currents: list["CurrentBookingForGame"]):
+        """
+        Takes deleted current bookings off the counters of their games. Called
+        for every delete, also cascading ones, see signals.current_booking_deleted.
+        """
+        changes = defaultdict(Counter)
+        for current in currents:
+            changes[current.game_id].update(_count_change(current.status, None))
+        Game.objects.apply_booking_count_changes(changes)
+
+    def refresh(self, pairs: set[tuple[int, int]]):
+        """
+        Re-derives the current bookings of the (game, player) pairs from the
+        history, e.g. after history rows were deleted, see signals.booking_deleted.
+        """
+        if not pairs:
+            return
+        latest = [
+            booking
+            for booking in BookingHistoryForGame.objects.latest_per_player().filter(
+                game_id__in={game_id for game_id, _ in pairs},
+                player_id__in={player_id for _, player_id in pairs},
+            )
+            if (booking.game_id, booking.player_id) in pairs
+        ]
+        self.record_many(latest)
+
+    def rebuild(self) -> int:
+        """
+        Recreates the whole projection from BookingHistoryForGame,
+        returns the number of current bookings.
+        """
+        with transaction.atomic():
+            # the counters are recounted below, not per deleted row
+            _delete_rows(self.model)
+            current = self.bulk_create(
+                [
+                    self.model(
+                        game_id=booking.game_id,
+                        player_id=booking.player_id,
+                        booking_id=booking.id,
+                        status=booking.status,
+                        creation_date=booking.creation_date,
+                    )
+                    for booking in BookingHistoryForGame.objects.latest_per_player().iterator()
+                ],
+                batch_size=500,
+            )
+            self.recount()
+        return len(current)
+
+    def count_by_game(self, queryset=None) -> dict[int, Counter]:
+        """{game_id: Counter({status: number of players})} of the given current bookings."""
+        queryset = self.all() if queryset is None else queryset
+        counts = defaultdict(Counter)
+        for row in (
+            queryset.values("game_id", "status")
+            .annotate(count=models.Count("id"))
+            .order_by()
+        ):
+            counts[row["game_id"]][row["status"]] = row["count"]
+        return counts
+
+    def recount(self):
+        """Sets the booking counters of every game from the current bookings."""
+        counts = self.count_by_game()
+        game_ids = set(Game.objects.values_list("id", flat=True))
+        Game.objects.bulk_update(
+            [
+                Game(
+                    id=game_id,
+                    **{
+                        field_name: counts[game_id][status]
+                        for status, field_name in BOOKING_COUNTER_FIELDS.items()
+                    },
+                )
+                for game_id in game_ids
+            ],
+            fields=list(BOOKING_COUNTER_FIELDS.values()),
+            batch_size=500,
+        )
+        bookings_bulk_changed.send(sender=Game, game_ids=game_ids)
+
+
+class CurrentBookingForGame(models.Model):
+    """
+    Latest BookingHistoryForGame entry of every player in a game.
+
+    The history is append-only, so instead of looking for the latest entry
+    on every read, it is kept here, updated together with each history insert.
+    """
+
+    game = models.ForeignKey(
+        Game, on_delete=models.CASCADE, related_name="current_bookings"
+    )
+    player = models.ForeignKey(
+        Player, on_delete=models.CASCADE, related_name="current_bookings"
+    )
+    booking = models.OneToOneField(
+        BookingHistoryForGame, on_delete=models.CASCADE, related_name="+"
+    )
+    status = models.CharField(max_length=50, choices=StatusChoices.choices)
+    creation_date = models.DateTimeField()
+
+    objects = CurrentBookingManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["game", "player"], name="unique_current_booking_per_player"
+            )
+        ]
+        indexes = [models.Index(fields=["game", "status", "creation_date"])]
+
+    def __str__(self):
+        return f"{self.player} - {self.status} on {self.game} (current)"
+
+
+ARCHIVED_FIELDS = ["id", "player_id", "status", "creation_date"]
+
+
+class BookingHistoryArchiveManager(models.Manager):
+
+    def superseded(self, game_ids):
+        """History rows of the games which are no one's current booking any more."""
+        return BookingHistoryForGame.objects.filter(game_id__in=game_ids).filter(
+            ~Exists(CurrentBookingForGame.objects.filter(booking_id=OuterRef("pk")))
+        )
+
+    def archivable_games(self, before: date):
+        """Played or cancelled games before the given day with superseded history."""
+        superseded = BookingHistoryForGame.objects.filter(game=OuterRef("pk")).filter(
+            ~Exists(CurrentBookingForGame.objects.filter(booking_id=OuterRef("pk")))
+        )
+        return (
+            Game.objects.filter(
+                status__in=[GameStatus.PLAYED, GameStatus.CANCELLED], when__lt=before
+            )
+            .filter(Exists(superseded))
+            .order_by("when", "id")
+        )
+
+    def archive(self, game_ids: list[int]) -> int:
+        """
+        Moves the superseded history rows of the games into their archives and
+        returns the number of moved rows. The current bookings (the final status
+        of every player) stay in BookingHistoryForGame.
+        """
+        with transaction.atomic():
+            superseded = self.superseded(game_ids)
+            rows = defaultdict(list)
+            for game_id, *row in superseded.order_by("id").values_list(
+                "game_id", *ARCHIVED_FIELDS
+            ):
+                rows[game_id].append(row)
+            if not rows:
+                return 0
+
+            archives = {
+                archive.game_id: archive
+                for archive in self.select_for_update().filter(game_id__in=rows)
+            }
+            new_archives = []
+            for game_id, game_rows in rows.items():
+                archive = archives.get(game_id) or self.model(game_id=game_id)
+                archive.set_rows(
+                    archive.rows()
+                    + [dict(zip(ARCHIVED_FIELDS, row)) for row in game_rows]
+                )
+                if archive.pk is None:
+                    new_archives.append(archive)
+            self.bulk_create(new_archives)
+            self.bulk_update(archives.values(), ["data", "row_count", "archived_at"])
+
+            # no per-row post_delete: the games are touched once below
+            moved = _delete_rows(
+                BookingHistoryForGame,
+                [row[0] for game_rows in rows.values() for row in game_rows],
+            )
+            Game.objects.filter(id__in=rows).update(updated_at=timezone.now())
+            bookings_bulk_changed.send(sender=self.model, game_ids=set(rows))
+        return moved
+
+
+class BookingHistoryArchive(models.Model):
+    """
+    The superseded history rows of an old game, as one zlib-compressed JSON
+    list, moved out of BookingHistoryForGame by the archive_booking_history
+    command.
+    """
+
+    game = models.OneToOneField(
+        Game, on_delete=models.CASCADE, related_name="history_archive"
+    )
+    data = models.BinaryField()
+    row_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = BookingHistoryArchiveManager()
+
+    def rows(self) -> list[dict]:
+        """The archived rows, oldest first, creation_date as an ISO string."""
+        if not self.data:
+            return []
+        return json.loads(zlib.decompress(self.data))
+
+    def set_rows(self, rows: list[dict]):
+        self.data = zlib.compress(
+            json.dumps(rows, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+        )
+        self.row_count = len(rows)
+        self.archived_at = timezone.now()
+
+    def __str__(self):
+        return f"{self.row_count} archived bookings of {self.game}"
+
+
+# a cancellation from the day before the game on
+LATE_CANCELLATION = timedelta(days=1)
+
+
+# the columns of PlayerSeasonStats written by PlayerSeasonStatsManager.refresh
+STATS_COLUMNS = [
+    "player_id",
+    "season",
+    "games_played",
+    "games_substituted",
+    "games_cancelled",
+    "late_cancellations",
+    "games_on_reserve",
+    "promotions",
+    "updated_at",
+]
+
+
+class PlayerSeasonStatsManager(models.Manager):
+
+    def refresh(self, season: int, player_ids=None) -> int:
+        """
+        Replaces the stored stats of the season (of all players, or those of
+        player_ids, a list or a subquery) with the final statuses of its played
+        games, in a number of queries independent of the number of players: an
+        INSERT ... SELECT grouping the current bookings, then one UPDATE counting
+        the promotions in the history and in the archives.
+        """
+        games = Game.objects.filter(status=GameStatus.PLAYED, when__year=season)
+        bookings = CurrentBookingForGame.objects.filter(game__in=games)
+        stored = self.filter(season=season)
+        if player_ids is not None:
+            bookings = bookings.filter(player_id__in=player_ids)
+            stored = stored.filter(player_id__in=player_ids)
+
+        # the superseded rows of archived games, see archive_booking_history
+        archived_promotions = Counter()
+        for archive in BookingHistoryArchive.objects.filter(game__in=games):
+            archived_promotions.update(
+                row["player_id"]
+                for row in archive.rows()
+                if row["status"] == StatusChoices.CONFIRMED
+            )
+
+        cancelled = models.Q(status=StatusChoices.CANCELLED)
+        rows = (
+            bookings.values("player_id")
+            .annotate(
+                season=Value(season),
+                games_played=models.Count(
+                    "id",
+                    filter=models.Q(
+                        status__in=[StatusChoices.PLANNED, StatusChoices.CONFIRMED]
+                    ),
+                ),
+                games_substituted=models.Count(
+                    "id", filter=models.Q(status=StatusChoices.CONFIRMED)
+                ),
+                games_cancelled=models.Count("id", filter=cancelled),
+                late_cancellations=models.Count(
+                    "id",
+                    filter=cancelled
+                    & models.Q(
+                        creation_date__date__gte=F("game__when") - LATE_CANCELLATION
+                    ),
+                ),
+                games_on_reserve=models.Count(
+                    "id",
+                    filter=models.Q(
+                        status__in=[StatusChoices.RESERVED, StatusChoices.AWAITING]
+                    ),
+                ),
+                promotions=Value(0),
+                updated_at=Value(timezone.now()),
+            )
+            .values_list(*STATS_COLUMNS)
+            .order_by()
+        )
+        promotions = (
+            BookingHistoryForGame.objects.filter(
+                game__in=games,
+                status=StatusChoices.CONFIRMED,
+                player_id=OuterRef("player_id"),
+            )
+            .values("player_id")
+            .annotate(count=models.Count("id"))
+            .values("count")
+        )
+        archived = [
+            When(player_id=player_id, then=Value(count))
+            for player_id, count in archived_promotions.items()
+        ]
+
+        with transaction.atomic():
+            stored.delete()
+            sql, params = rows.query.sql_with_params()
+            table = connection.ops.quote_name(self.model._meta.db_table)
+            columns = ", ".join(
+                connection.ops.quote_name(self.model._meta.get_field(name).column)
+                for name in STATS_COLUMNS
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {table} ({columns}) {sql}", params)
+                count = cursor.rowcount
+            stored.update(
+                promotions=Coalesce(Subquery(promotions), Value(0))
+                + Case(*archived, default=Value(0))
+            )
+        return count
+
+    def refresh_game(self, game: Game) -> int:
+        """Refreshes the season stats of the players booked in the game."""
+        return self.refresh(
+            game.season,
+            CurrentBookingForGame.objects.filter(game=game).values("player_id"),
+        )
+
+
+class PlayerSeasonStats(models.Model):
+    """
+    Attendance of a player in the played games of a season (a calendar year),
+    derived from the final status of every booking. Refreshed for the players
+    of a game when it moves to or from Played (see signals.game_played), for
+    the players whose bookings of a played game change, or for whole seasons
+    by the refresh_player_stats command.
+    """
+
+    player = models.ForeignKey(
+        Player, on_delete=models.CASCADE, related_name="season_stats"
+    )
+    season = models.PositiveSmallIntegerField()
+    games_played = models.PositiveIntegerField(default=0)
+    # played in place of a cancelled player, after being promoted from the reserve
+    games_substituted = models.PositiveIntegerField(default=0)
+    games_cancelled = models.PositiveIntegerField(default=0)
+    late_cancellations = models.PositiveIntegerField(default=0)
+    games_on_reserve = models.PositiveIntegerField(default=0)
+    # reserve to confirmed, including the promotions the player later gave up
+    promotions = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PlayerSeasonStatsManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["player", "season"], name="unique_player_season_stats"
+            )
+        ]
+        indexes = [models.Index(fields=["season"], name="player_stats_season_idx")]
+
+    @property
+    def attendance_rate(self) -> float | None:
+        """Share of the games with a place in the team the player played."""
+        places = self.games_played + self.games_cancelled
+        return self.games_played / places if places else None
+
+    @property
+    def cancellation_rate(self) -> float | None:
+        places = self.games_played + self.games_cancelled
+        return self.games_cancelled / places if places else None
+
+    def __str__(self):
+        return f"{self.player} in {self.season}"
+
+
+class OutboundEmailStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENT = "sent", "Sent"
+    FAILED = "failed", "Failed"
+
+
+class OutboundEmailManager(models.Manager):
+
+    def enqueue(self, messages: list[EmailMultiAlternatives]):
+        """Stores the messages to be delivered later by the send_queued_mail command."""
+        return self.bulk_create(
+            [
+                self.model(
+                    subject=msg.subject,
+                    body=msg.body,
+                    html_body=next(
+                        (
+                            content
+                            for content, mimetype in msg.alternatives
+                            if mimetype == "text/html"
+                        ),
+                        "",
+                    ),
+                    from_email=msg.from_email,
+                    to=list(msg.to),
+                )
+                for msg in messages
+            ]
+        )
+
+    def due(self, now=None):
+        return self.filter(
+            status=OutboundEmailStatus.PENDING,
+            next_attempt_at__lte=now or timezone.now(),
+        ).order_by("id")
+
+    def claim(self, limit: int, lease: int) -> list["OutboundEmail"]:
+        """
+        Takes up to limit due emails for sending and marks them as in flight by
+        moving their next attempt lease seconds ahead, so that other workers skip
+        them. An email of a worker which died while sending is due again once
+        the lease runs out.
+        """
+        now = timezone.now()
+        claimed_until = now + timedelta(seconds=lease)
+        with transaction.atomic():
+            due = self.due(now)
+            if connection.features.has_select_for_update_skip_locked:
+                # rows being claimed by another worker are skipped, not waited for
+                due = due.select_for_update(skip_locked=True)
+            ids = list(due.values_list("id", flat=True)[:limit])
+            # the due condition is checked again by the update, without row locks
+            # (SQLite) an email claimed by another worker in the meantime is left out
+            self.due(now).filter(pk__in=ids).update(next_attempt_at=claimed_until)
+        return list(
+            self.filter(pk__in=ids, next_attempt_at=claimed_until).order_by("id")
+        )
+
+
+class OutboundEmail(models.Model):
+    """
+    Outbox of emails, filled by the mailer and drained by the send_queued_mail
+    command, so that requests don't wait for the mail server.
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=20,
+        choices=OutboundEmailStatus.choices,
+        default=OutboundEmailStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboundEmailManager()
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def to_message(self, connection=None) -> EmailMultiAlternatives:
+        msg = EmailMultiAlternatives(
+            self.subject, self.body, self.from_email, self.to, connection=connection
+        )
+        if self.html_body:
+            msg.attach_alternative(self.html_body, "text/html")
+        return msg
+
+    def mark_sent(self):
+        self.status = OutboundEmailStatus.SENT
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ""
+        self.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+
+    def mark_failed(self, error: str, max_attempts: int, retry_delay: int):
+        """Schedules a retry with exponential backoff or gives up after max_attempts."""
+        self.attempts += 1
+        self.last_error = error
+        if self.attempts >= max_attempts:
+            self.status = OutboundEmailStatus.FAILED
+        else:
+            self.next_attempt_at = timezone.now() + timedelta(
+                seconds=retry_delay * 2 ** (self.attempts - 1)
+            )
+        self.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} - {self.status}"
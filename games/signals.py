@@ -0,0 +1,223 @@
+"""
+Cache invalidation: bumps the cached versions of games when they change
+(and keeps Game.updated_at in step with deleted bookings). Deleted bookings,
+also by queryset and cascading deletes, are taken off the current bookings
+and the game counters here, once per delete() rather than per row: the rows
+a delete removes are collected until the last of them is gone, see
+_PendingDelete. Committed booking
+changes are also published to the live roster streams, and the season
+stats of the players are refreshed when a game moves to or from Played and
+when the bookings of a played game change.
+Versions are bumped right away, so the writing request reads its own changes,
+and once more after the commit, so a concurrent request can't keep the state
+from before the commit cached under the new version.
+"""
+
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from games.helpers import cache_helper, roster_events
+from games.models import (
+    BookingHistoryForGame,
+    CurrentBookingForGame,
+    Game,
+    GameStatus,
+    Player,
+    PlayerSeasonStats,
+    PlayerStatus,
+    bookings_bulk_changed,
+)
+
+User = get_user_model()
+
+
+def _deleted_along_with(origin, *models) -> bool:
+    """Whether the delete() of origin, an instance or a queryset, is of the models."""
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, models)
+    return isinstance(origin, models)
+
+
+class _PendingDelete:
+    """The booking rows removed by one delete() of origin, handled together."""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.remaining = 0  # instances with a pre_delete but no post_delete yet
+        self.removed = []
+        self.refresh = set()
+        self.game_ids = set()
+
+    def apply(self):
+        CurrentBookingForGame.objects.removed(self.removed)
+        CurrentBookingForGame.objects.refresh(self.refresh)
+        if self.game_ids:
+            # the newest creation date may not change, the game's Last-Modified must
+            Game.objects.filter(id__in=self.game_ids).update(updated_at=timezone.now())
+            bookings_bulk_changed.send(
+                sender=BookingHistoryForGame,
+                game_ids=self.game_ids,
+                player_ids={current.player_id for current in self.removed}
+                | {player_id for _, player_id in self.refresh},
+            )
+
+
+_deletes = threading.local()
+
+
+def _pending_delete(origin) -> _PendingDelete:
+    pending = getattr(_deletes, "pending", None)
+    if pending is None:
+        pending = _deletes.pending = {}
+    if id(origin) not in pending:
+        pending[id(origin)] = _PendingDelete(origin)
+    return pending[id(origin)]
+
+
+def _deleted(origin):
+    """
+    Called after every post_delete counted by delete_started: the delete() is
+    over once all its instances are gone.
+    """
+    pending = _pending_delete(origin)
+    pending.remaining -= 1
+    if pending.remaining <= 0:
+        del _deletes.pending[id(origin)]
+        pending.apply()
+
+
+def _bump_now_and_on_commit(bump, *args):
+    bump(*args)
+    transaction.on_commit(lambda: bump(*args))
+
+
+def _bump_games(*game_ids: int):
+    _bump_now_and_on_commit(cache_helper.bump_game_version, *game_ids)
+
+
+def _publish_on_commit(*game_ids: int):
+    def publish():
+        for game_id in game_ids:
+            roster_events.broker.publish(game_id)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def game_changed(sender, instance: Game, **kwargs):
+    _bump_games(instance.id)
+    _bump_now_and_on_commit(cache_helper.bump_schedule_version)
+
+
+@receiver(post_save, sender=Game)
+def game_played(sender, instance: Game, **kwargs):
+    was_played = getattr(instance, "loaded_status", None) == GameStatus.PLAYED
+    if (instance.status == GameStatus.PLAYED) != was_played:
+        PlayerSeasonStats.objects.refresh_game(instance)
+    instance.loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Game)
+def played_game_deleted(sender, instance: Game, **kwargs):
+    if instance.status == GameStatus.PLAYED:
+        # its bookings are gone already, the whole season is recomputed
+        PlayerSeasonStats.objects.refresh(instance.season)
+
+
+@receiver(post_save, sender=BookingHistoryForGame)
+def booking_changed(sender, instance: BookingHistoryForGame, **kwargs):
+    _bump_games(instance.game_id)
+    _publish_on_commit(instance.game_id)
+
+
+@receiver(pre_delete, sender=BookingHistoryForGame)
+@receiver(pre_delete, sender=CurrentBookingForGame)
+@receiver(pre_delete, sender=Player)
+@receiver(pre_delete, sender=User)
+def delete_started(sender, origin=None, **kwargs):
+    # every pre_delete of a delete() is sent before its first post_delete
+    if not _deleted_along_with(origin, Game):
+        _pending_delete(origin).remaining += 1
+
+
+@receiver(post_delete, sender=BookingHistoryForGame)
+def booking_deleted(sender, instance: BookingHistoryForGame, origin=None, **kwargs):
+    if _deleted_along_with(origin, Game):
+        return
+    pending = _pending_delete(origin)
+    if not _deleted_along_with(origin, Player, User):
+        # a deleted current booking went with its history row, the latest
+        # remaining row of the player takes its place
+        pending.refresh.add((instance.game_id, instance.player_id))
+    pending.game_ids.add(instance.game_id)
+    _deleted(origin)
+
+
+@receiver(post_delete, sender=CurrentBookingForGame)
+def current_booking_deleted(
+    sender, instance: CurrentBookingForGame, origin=None, **kwargs
+):
+    if _deleted_along_with(origin, Game):
+        return
+    _pending_delete(origin).removed.append(instance)
+    _deleted(origin)
+
+
+@receiver(post_delete, sender=Player)
+@receiver(post_delete, sender=User)
+def player_deleted(sender, origin=None, **kwargs):
+    _deleted(origin)
+
+
+@receiver(post_save, sender=CurrentBookingForGame)
+def current_booking_changed(sender, instance: CurrentBookingForGame, **kwargs):
+    # the game comes with the history row, usually without a query
+    game = instance.booking.game
+    if game.status == GameStatus.PLAYED:
+        PlayerSeasonStats.objects.refresh(game.season, [instance.player_id])
+
+
+@receiver(bookings_bulk_changed)
+def bookings_changed_in_bulk(sender, game_ids, player_ids=None, **kwargs):
+    _bump_games(*game_ids)
+    _publish_on_commit(*game_ids)
+    if sender is not BookingHistoryForGame:
+        # archived history and recounted counters leave the final statuses as
+        # they were
+        return
+    played = Game.objects.filter(id__in=game_ids, status=GameStatus.PLAYED)
+    for season in played.dates("when", "year"):
+        PlayerSeasonStats.objects.refresh(
+            season.year,
+            (
+                player_ids
+                if player_ids is not None
+                else CurrentBookingForGame.objects.filter(
+                    game__in=played.filter(when__year=season.year)
+                ).values("player_id")
+            ),
+        )
+
+
+@receiver(post_save, sender=PlayerStatus)
+@receiver(post_delete, sender=PlayerStatus)
+def absence_changed(sender, instance: PlayerStatus, **kwargs):
+    game_ids = Game.objects.filter(
+        when__gte=instance.date_start, when__lte=instance.date_end
+    ).values_list("id", flat=True)
+    _bump_games(*game_ids)
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_save, sender=User)
+def player_changed(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login", "password"}:
+        return
+    _bump_now_and_on_commit(cache_helper.bump_players_version)
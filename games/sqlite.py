@@ -0,0 +1,19 @@
+"""
+Opt-in tuning of SQLite connections (settings.SQLITE_TUNING), for deployments
+which stay on the default database: with the WAL journal readers don't wait
+for the writer, and synchronous=NORMAL syncs the journal at checkpoints only
+instead of on every commit.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
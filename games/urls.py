@@ -18,12 +18,25 @@ urlpatterns = [
         views.game_player_status_update,
         name="game_player_status_update_url",
     ),
+    path(
+        "game/<int:game_id>/events/",
+        views.game_roster_events,
+        name="game_roster_events_url",
+    ),
     path("players/", views.all_players, name="all_players_url"),
+    # before player_details, which takes any player_id
+    path("players/import/", views.import_players, name="import_players_url"),
+    path("players/export/", views.export_players, name="export_players_url"),
     path("players/<player_id>/", views.player_details, name="player_details_url"),
     path("add_player", views.add_player, name="add_player_url"),
     path("add_game", views.add_game, name="add_game_url"),
     path("add_absence", views.add_absence, name="add_absence_url"),
     path("booking_history/", views.booking_history, name="booking_history_url"),
+    path(
+        "booking_history/export/",
+        views.export_booking_history,
+        name="export_booking_history_url",
+    ),
     path("logout/", LogoutView.as_view(next_page="/accounts/login"), name="logout_url"),
     path("login/", LoginView.as_view(next_page="next_games_url"), name="login_url"),
     path(
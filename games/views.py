@@ -1,26 +1,34 @@
+import codecs
 from datetime import datetime
 from typing import Iterable
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator
-from django.db import IntegrityError
-from django.db.models import Count, Q
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FilteredRelation, Q
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
-from django.views.decorators.http import require_POST
-
-from games.forms import PlayerProfileForm
-from games.helpers import game_helper, player_helper
-from games.mailer import (
-    send_player_status_update_email,
-    send_player_status_update_email_to_admins,
-    send_welcome_email,
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+
+from games.forms import BookingHistoryExportForm, PlayerProfileForm
+from games.helpers import (
+    booking_helper,
+    cache_helper,
+    conditional_helper,
+    history_export_helper,
+    player_csv_helper,
+    player_helper,
+    roster_events,
 )
+from games.helpers.pagination import CursorPage, get_approximate_count, parse_cursor
+from games.mailer import send_welcome_email
 
 from .models import (
     BookingHistoryForGame,
@@ -35,6 +43,11 @@ from .models import (
 
 User = get_user_model()
 
+# awaiting is a reply to a free slot, not something an absence sets
+ABSENCE_STATUS_CHOICES = StatusChoices.filtered_choices(
+    exclude=[StatusChoices.AWAITING]
+)
+
 
 class Breadcrumb:
     def __init__(self, path, label):
@@ -43,31 +56,25 @@ class Breadcrumb:
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=conditional_helper.next_games_etag,
+    last_modified_func=conditional_helper.next_games_last_modified,
+)
 def next_games(request):
-    found_games = (
-        Game.objects.filter(when__gte=datetime.today())
-        .exclude(status="Played")
-        .select_related()
-        .order_by("when")
-        .prefetch_related("bookinghistoryforgame_set")
-    )
-
-    for game in found_games:
-        game.number_of_booked_players = game_helper.get_number_of_booked_players(game)
+    today = timezone.localdate()
+    found_games = cache_helper.get_games(cache_helper.get_upcoming_game_ids(today))
 
     return render(request, "games/next_games.html", {"games": found_games})
 
 
 @login_required
 def past_games(request):
-    found_games = (
-        Game.objects.filter(Q(when__lt=datetime.today()) | Q(status=GameStatus.PLAYED))
-        .order_by("-when")
-        .all()
-    )
-    games_paginator = Paginator(found_games, 20)
+    today = timezone.localdate()
+    games_paginator = Paginator(cache_helper.get_past_game_ids(today), 20)
     games_page_number = request.GET.get("games_page")
     games_page_obj = games_paginator.get_page(games_page_number)
+    games_page_obj.object_list = cache_helper.get_games(games_page_obj.object_list)
     return render(request, "games/past_games.html", {"games": games_page_obj})
 
 
@@ -91,19 +98,24 @@ def _apply_substitute_to_cancelled_players(
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=conditional_helper.game_details_etag,
+    last_modified_func=conditional_helper.game_details_last_modified,
+)
 def game_details(request, game_id):
     game = get_object_or_404(Game, id=game_id)
 
-    planned_players = game_helper.get_players_by_status([StatusChoices.PLANNED], game)
-    cancelled_players = game_helper.get_players_by_status(
-        [StatusChoices.CANCELLED], game
-    )
-    reserved_players = game_helper.get_players_by_status([StatusChoices.RESERVED], game)
-    confirmed_players = game_helper.get_players_by_status(
-        [StatusChoices.CONFIRMED], game
+    roster = cache_helper.get_roster(game)
+
+    booking_history_paginator = Paginator(
+        BookingHistoryForGame.objects.filter(game=game)
+        .select_related("player__user")
+        .order_by("-creation_date"),
+        25,
     )
-    awaiting_players = game_helper.get_players_by_status(
-        [StatusChoices.AWAITING], game, order_by="latest_creation_date"
+    booking_history_page_obj = booking_history_paginator.get_page(
+        request.GET.get("history_page")
     )
 
     if game.when < timezone.now().date():
@@ -123,26 +135,24 @@ def game_details(request, game_id):
         "games/game_details.html",
         {
             "game": game,
-            "planned_players_for_game": planned_players,
-            "reserved_players_for_game": reserved_players,
-            "confirmed_players_for_game": confirmed_players,
-            "awaiting_players_for_game": awaiting_players,
-            "number_of_booked_players": len(planned_players)
-            + len(confirmed_players)
-            + len(awaiting_players),
-            "number_of_confirmed_players": len(confirmed_players),
+            "planned_players_for_game": roster.planned,
+            "reserved_players_for_game": roster.reserved,
+            "confirmed_players_for_game": roster.confirmed,
+            "awaiting_players_for_game": roster.awaiting,
+            "number_of_booked_players": len(roster.planned)
+            + len(roster.confirmed)
+            + len(roster.awaiting),
+            "number_of_confirmed_players": len(roster.confirmed),
             "cancelled_with_substitutes": _apply_substitute_to_cancelled_players(
-                cancelled=cancelled_players, confirmed=confirmed_players
-            ),
-            "number_of_cancelled_players": len(cancelled_players),
-            "booking_history": BookingHistoryForGame.objects.filter(game=game).order_by(
-                "-creation_date"
+                cancelled=roster.cancelled, confirmed=roster.confirmed
             ),
+            "number_of_cancelled_players": len(roster.cancelled),
+            "booking_history": booking_history_page_obj,
             "status_options": GameStatus.labels,
             "breadcrumbs": breadcrumbs,
             "player_should_see_reserved_table": _player_should_see_reserved_table(
                 request.user,
-                reserved_players + confirmed_players + awaiting_players,
+                roster.reserved + roster.confirmed + roster.awaiting,
             ),
         },
     )
@@ -167,75 +177,41 @@ def game_status_update(request, game_id):
     status_value = request.POST.get("status")
     description = request.POST.get("description")
 
+    update_fields = ["updated_at"]
     if status_value:
         game.status = status_value
+        update_fields.append("status")
     if description is not None:
         game.description = description
-    game.save()
+        update_fields.append("description")
+    game.save(update_fields=update_fields)
     return redirect("game_details_url", game_id=game_id)
 
 
-def _check_if_empty_slots(game):
-    # function to determine if there are empty slots
-    cancelled_count = len(
-        game_helper.get_players_by_status([StatusChoices.CANCELLED], game)
-    )
-    confirmed_count = len(
-        game_helper.get_players_by_status([StatusChoices.CONFIRMED], game)
-    )
-
-    if cancelled_count > confirmed_count:
-        return StatusChoices.CONFIRMED
-
-    return StatusChoices.AWAITING
+def _wants_json(request) -> bool:
+    return "application/json" in request.headers.get("Accept", "")
 
 
-def _apply_status_change_logic(current_status, checked, game):
-    status_handler = {
-        (StatusChoices.PLANNED, False): lambda game: StatusChoices.CANCELLED,
-        (StatusChoices.CANCELLED, True): lambda game: StatusChoices.PLANNED,
-        (StatusChoices.RESERVED, True): lambda game: StatusChoices.AWAITING,
-        (StatusChoices.AWAITING, True): _check_if_empty_slots,
-        (StatusChoices.AWAITING, False): lambda game: StatusChoices.RESERVED,
-        (StatusChoices.CONFIRMED, False): lambda game: StatusChoices.RESERVED,
-        (StatusChoices.PLANNED, True): lambda game: StatusChoices.PLANNED,
-    }
-    try:
-        return status_handler[(current_status, checked)](game)
-    except KeyError:
-        raise ValueError(f"No handler for status={current_status}, checked={checked}")
-
-
-def _apply_transition_from_awaiting_to_confirmed(game):
-    awaiting_players = game_helper.get_players_by_status(
-        [StatusChoices.AWAITING], game, order_by="latest_creation_date"
-    )
-    if len(awaiting_players) > 0:
-
-        if StatusChoices.CONFIRMED == _check_if_empty_slots(game):
-            player_to_confirm = awaiting_players[0]
-            BookingHistoryForGame.objects.create(
-                player=player_to_confirm,
-                game=game,
-                status=StatusChoices.CONFIRMED,
-                creation_date=timezone.now(),
-            )
-            send_player_status_update_email(
-                player_to_confirm, game, StatusChoices.CONFIRMED
-            )
-            send_player_status_update_email_to_admins(
-                player_to_confirm, game, StatusChoices.CONFIRMED
-            )
+def _player_status_update_error(request, game_id, message: str, status: int):
+    if _wants_json(request):
+        return JsonResponse({"error": message}, status=status)
+    messages.error(request, message)
+    return redirect("game_details_url", game_id=game_id)
 
 
 @login_required
 @require_POST
 def game_player_status_update(request, game_id):
+    """
+    Applies a checkbox click of the roster. Requests accepting JSON get
+    the changed rows instead of a redirect to game_details.
+    """
     found_game = get_object_or_404(Game, id=game_id)
 
     if found_game.status != "Planned" and not request.user.is_superuser:
-        messages.error(request, "Can only change status for Planned games.")
-        return redirect("game_details_url", game_id=game_id)
+        return _player_status_update_error(
+            request, game_id, "Can only change status for Planned games.", 403
+        )
 
     player_pk = request.POST.get("player_id")
     checked = "on" == request.POST.get("checked")
@@ -243,33 +219,42 @@ def game_player_status_update(request, game_id):
     player = get_object_or_404(Player, pk=player_pk)
 
     if not (request.user.is_superuser or player.user == request.user):
-        messages.error(request, "You can only change your own status.")
-        return redirect("game_details_url", game_id=game_id)
+        return _player_status_update_error(
+            request, game_id, "You can only change your own status.", 403
+        )
 
     if not BookingHistoryForGame.objects.filter(
         player=player, game=found_game
     ).exists():
-        messages.error(request, "Player not found in this game.")
-        return redirect("game_details_url", game_id=game_id)
-
-    current_booking = player_helper.get_latest_booking_for_game(player, found_game)
-    current_status = current_booking.status if current_booking else None
+        return _player_status_update_error(
+            request, game_id, "Player not found in this game.", 404
+        )
 
-    new_status = _apply_status_change_logic(current_status, checked, found_game)
+    try:
+        changes = booking_helper.change_player_status(found_game, player, checked)
+    except ValueError as e:
+        return _player_status_update_error(
+            request, game_id, f"Can't change the status: {e}", 400
+        )
 
-    if current_status != new_status:
-        BookingHistoryForGame.objects.create(
-            player=player,
-            game=found_game,
-            status=new_status,
-            creation_date=timezone.now(),
+    if _wants_json(request):
+        return JsonResponse(
+            {"changed": [roster_events.booking_row(booking) for booking in changes]}
         )
-        send_player_status_update_email(player, found_game, new_status)
-        send_player_status_update_email_to_admins(player, found_game, new_status)
+    return redirect("game_details_url", game_id=game_id)
 
-    _apply_transition_from_awaiting_to_confirmed(found_game)
 
-    return redirect("game_details_url", game_id=game_id)
+@login_required
+async def game_roster_events(request, game_id):
+    """Server-Sent Events with the roster changes of the game, see roster_events."""
+    game = await aget_object_or_404(Game, id=game_id)
+    response = StreamingHttpResponse(
+        roster_events.roster_event_stream(game.id, await request.auser()),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx must pass the events through
+    return response
 
 
 @login_required
@@ -284,7 +269,20 @@ def all_players(request):
         inactive_players=Count("id", filter=Q(role=PlayerRole.INACTIVE)),
     )
 
-    players = Player.objects.all()
+    season = timezone.localdate().year
+    players = (
+        Player.objects.select_related("user")
+        .annotate(
+            stats=FilteredRelation(
+                "season_stats", condition=Q(season_stats__season=season)
+            )
+        )
+        .annotate(
+            games_played=F("stats__games_played"),
+            games_cancelled=F("stats__games_cancelled"),
+            late_cancellations=F("stats__late_cancellations"),
+        )
+    )
     if filter_name and len(filter_name) > 1:
         players = players.filter(
             Q(user__first_name__icontains=filter_name)
@@ -303,6 +301,7 @@ def all_players(request):
             "players": players,
             "details": stat_counts,
             "status": status,
+            "season": season,
         },
     )
 
@@ -358,6 +357,7 @@ def player_details(request, player_id):
         {
             "player": player,
             "player_role_choices": PlayerRole.choices,
+            "season_stats": player.season_stats.order_by("-season"),
             "breadcrumbs": [
                 Breadcrumb(reverse("all_players_url"), "All Players"),
                 Breadcrumb(
@@ -418,6 +418,54 @@ def check_username_and_email(request):
     )
 
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def import_players(request):
+    errors = []
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if upload is None:
+            messages.error(request, "Choose a CSV file to import.")
+        else:
+            try:
+                result = player_csv_helper.import_players(
+                    codecs.iterdecode(upload, "utf-8-sig")
+                )
+            except UnicodeDecodeError:
+                # nothing is written before the whole file is read
+                messages.error(
+                    request, "The file is not UTF-8 encoded, no players were imported."
+                )
+            else:
+                if not result.errors:
+                    messages.success(
+                        request, f"Imported {len(result.players)} players."
+                    )
+                    return redirect("all_players_url")
+                messages.error(
+                    request,
+                    f"{len(result.errors)} errors in {result.rows} rows, "
+                    "no players were imported.",
+                )
+                errors = result.errors[:100]
+
+    return render(
+        request,
+        "games/import_players.html",
+        {"errors": errors, "csv_fields": player_csv_helper.CSV_FIELDS},
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_players(request):
+    response = StreamingHttpResponse(
+        player_csv_helper.export_players(), content_type="text/csv"
+    )
+    response["Content-Disposition"] = 'attachment; filename="players.csv"'
+    return response
+
+
 @login_required()
 def booking_history(request):
     page_size = request.GET.get("page_size", 25)
@@ -427,91 +475,76 @@ def booking_history(request):
         page_size = 25
     page_size = max(5, min(page_size, 100))
 
-    found_booking_history = BookingHistoryForGame.objects.all().order_by("-id")
-    paginator = Paginator(found_booking_history, page_size)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    found_booking_history = BookingHistoryForGame.objects.select_related(
+        "game", "player__user"
+    ).order_by("-id")
+
+    cursor_pagination = settings.BOOKING_HISTORY_PAGINATION == "cursor"
+    if cursor_pagination:
+        page_obj = CursorPage(
+            found_booking_history,
+            page_size,
+            before=parse_cursor(request.GET.get("before")),
+            after=parse_cursor(request.GET.get("after")),
+        )
+    else:
+        paginator = Paginator(found_booking_history, page_size)
+        page_number = request.GET.get("page")
+        page_obj = paginator.get_page(page_number)
 
     return render(
         request,
         "games/booking_history.html",
         {
             "booking_history": page_obj,
+            "cursor_pagination": cursor_pagination,
+            "approximate_count": (
+                get_approximate_count(BookingHistoryForGame.objects.all())
+                if cursor_pagination
+                else None
+            ),
             "page_size": page_size,
             "page_sizes": [10, 25, 50, 100],
         },
     )
 
 
-def _create_booking_for_players(game: Game, players: Iterable[Player], status):
-    for player in players:
-        BookingHistoryForGame.objects.create(game=game, player=player, status=status)
+@login_required
+def export_booking_history(request):
+    form = BookingHistoryExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    filters = form.cleaned_data
+    export_format = filters["format"] or "csv"
+    history = history_export_helper.get_booking_history(
+        date_from=filters["date_from"],
+        date_to=filters["date_to"],
+        game_id=filters["game"],
+        player_id=filters["player"],
+    )
+    response = StreamingHttpResponse(
+        history_export_helper.export(history, export_format),
+        content_type="text/csv" if export_format == "csv" else "application/json",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="booking_history.{export_format}"'
+    )
+    return response
 
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def add_game(request):
     if request.method == "POST":
-        game = Game.objects.create(
-            when=datetime.strptime(request.POST.get("when", ""), "%Y-%m-%d"),
-            status=request.POST.get("status", GameStatus.PLANNED),
-            description=request.POST.get("description", ""),
-        )
-        if request.POST.get("set_players"):
-
-            _create_booking_for_players(
-                game,
-                Player.objects.filter(role=PlayerRole.PERMANENT),
-                StatusChoices.PLANNED,
-            )
-            _create_booking_for_players(
-                game,
-                Player.objects.filter(role=PlayerRole.ACTIVE),
-                StatusChoices.RESERVED,
+        with transaction.atomic():
+            game = Game.objects.create(
+                when=datetime.strptime(request.POST.get("when", ""), "%Y-%m-%d"),
+                status=request.POST.get("status", GameStatus.PLANNED),
+                description=request.POST.get("description", ""),
             )
-
-            psm_list = PlayerStatus.objects.all().order_by("date_start")
-            game_date = game.when.date() if hasattr(game.when, "date") else game.when
-
-            for psm in psm_list:
-                if psm.date_start <= game_date <= psm.date_end:
-                    if psm.status == StatusChoices.RESTING:
-                        games_in_range = Game.objects.filter(
-                            when__gte=psm.date_start, when__lte=psm.date_end
-                        )
-                        for game_in_range in games_in_range:
-                            latest_booking = (
-                                BookingHistoryForGame.objects.filter(
-                                    player=psm.player, game=game_in_range
-                                )
-                                .order_by("-creation_date")
-                                .first()
-                            )
-
-                            if latest_booking:
-                                current_status_key = latest_booking.status
-                                if current_status_key in [
-                                    StatusChoices.PLANNED,
-                                    StatusChoices.CANCELLED,
-                                ]:
-                                    new_status = StatusChoices.CANCELLED
-                                elif current_status_key in [
-                                    StatusChoices.CONFIRMED,
-                                    StatusChoices.RESERVED,
-                                ]:
-                                    new_status = StatusChoices.RESERVED
-                                else:
-                                    new_status = psm.status
-                            else:
-                                new_status = psm.status
-
-                            BookingHistoryForGame.objects.create(
-                                game=game_in_range, player=psm.player, status=new_status
-                            )
-                    else:
-                        BookingHistoryForGame.objects.create(
-                            game=game, player=psm.player, status=psm.status
-                        )
+            if request.POST.get("set_players"):
+                booking_helper.seed_game_roster(game)
 
         return redirect("next_games_url")
 
@@ -526,11 +559,10 @@ def add_game(request):
 
 @login_required
 def add_absence(request):
-    players = Player.objects.all()
-    if request.user.is_superuser:
-        status = PlayerStatus.objects.all().order_by("-id")
-    else:
-        status = PlayerStatus.objects.filter(player__user=request.user).order_by("-id")
+    players = Player.objects.select_related("user")
+    status = PlayerStatus.objects.select_related("player__user").order_by("-id")
+    if not request.user.is_superuser:
+        status = status.filter(player__user=request.user)
     status_paginator = Paginator(status, 15)
     status_page_number = request.GET.get("status_page")
     status_page_obj = status_paginator.get_page(status_page_number)
@@ -544,53 +576,16 @@ def add_absence(request):
 
         try:
             player = Player.objects.get(pk=player_id)
-            date_start = datetime.strptime(date_start_str, "%Y-%m-%d")
-            date_end = datetime.strptime(date_end_str, "%Y-%m-%d")
-
-            PlayerStatus.objects.create(
-                player=player,
-                date_start=date_start,
-                date_end=date_end,
-                status=status,
-                description=description,
+            date_start = datetime.strptime(date_start_str, "%Y-%m-%d").date()
+            date_end = datetime.strptime(date_end_str, "%Y-%m-%d").date()
+            if status not in dict(ABSENCE_STATUS_CHOICES):
+                raise ValueError(f"unknown status {status!r}")
+            if date_start > date_end:
+                raise ValueError("the absence ends before it starts")
+
+            booking_helper.add_absence(
+                player, date_start, date_end, status, description=description
             )
-
-            games_in_range = Game.objects.filter(
-                when__gte=date_start, when__lte=date_end
-            )
-
-            resting_status_key = StatusChoices.RESTING
-
-            for game in games_in_range:
-                latest_booking = (
-                    BookingHistoryForGame.objects.filter(player=player, game=game)
-                    .order_by("-creation_date")
-                    .first()
-                )
-
-                if status == resting_status_key and latest_booking:
-                    current_status_key = latest_booking.status
-                    if current_status_key in [
-                        StatusChoices.PLANNED,
-                        StatusChoices.CANCELLED,
-                    ]:
-                        new_status = StatusChoices.CANCELLED
-                    elif current_status_key in [
-                        StatusChoices.CONFIRMED,
-                        StatusChoices.RESERVED,
-                    ]:
-                        new_status = StatusChoices.RESERVED
-                    else:
-                        new_status = status
-                else:
-                    new_status = status
-
-                BookingHistoryForGame.objects.create(
-                    player=player,
-                    game=game,
-                    status=new_status,
-                    creation_date=timezone.now(),
-                )
             messages.success(
                 request, f"Absence for {player.user.username} has been added."
             )
@@ -598,7 +593,7 @@ def add_absence(request):
 
         except Player.DoesNotExist:
             messages.error(request, "Selected player does not exist.")
-        except Exception as e:
+        except (TypeError, ValueError) as e:
             messages.error(request, f"Error while adding absence: {e}")
 
     return render(
@@ -606,9 +601,7 @@ def add_absence(request):
         "games/add_absence.html",
         {
             "players": players,
-            "status_choices": StatusChoices.filtered_choices(
-                exclude=[StatusChoices.AWAITING]
-            ),
+            "status_choices": ABSENCE_STATUS_CHOICES,
             "status": status_page_obj,
         },
     )